@@ -0,0 +1,545 @@
+# -*- coding: utf-8 -*-
+''' Medidas de rendimiento de las funciones de análisis de preguntas
+
+Sin parámetros se ejecutan los benchmarks de cada optimización sobre el fichero real. Con
+--suite se ejecuta la suite completa: mide el tiempo y la memoria máxima de cada función
+pública sobre el fichero real y sobre colecciones sintéticas de varios tamaños, guarda los
+resultados en JSON y, si se indica un fichero de resultados anterior, señala las regresiones.
+
+USO:
+    python stackoverflow_BENCHMARK.py
+    python stackoverflow_BENCHMARK.py --suite [--tamaños 100000 1000000] [--salida resultados.json]
+                                      [--comparar anteriores.json] [--umbral 1.25]
+'''
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from importlib.util import find_spec
+from time import perf_counter
+
+# Las gráficas se generan sin ventana, para que plt.show() no bloquee las medidas
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+from stackoverflow_SOLUCION import *
+from stackoverflow_almacen import PreguntasStore, memoria_lista_preguntas
+from stackoverflow_normalizacion import normalizar_titulos, PreguntasNormalizadas, contar_palabras_clave_normalizadas
+from stackoverflow_vistas import PreguntasMaterializadas
+from stackoverflow_coocurrencias import MatrizDocumentoTermino
+from stackoverflow_aproximado import ContadorSpaceSaving, ContadorCountMin, exhaustividad_top_k
+from stackoverflow_cache import borrar_cache
+from stackoverflow_paralelo import *
+from stackoverflow_busqueda import IndiceInvertido, buscar_recorriendo
+from stackoverflow_carga import leer_preguntas_paralelo
+from stackoverflow_informes import generar_informe
+from stackoverflow_servicio import ServicioPreguntas, consultar
+from stackoverflow_sintetico import generar_dataset
+
+FICHERO = '../data/stackoverflow_python_questions.csv'
+
+################################################################
+#  Utilidades
+################################################################
+
+def cronometrar(funcion, *args, repeticiones=3, preparar=None, **kwargs):
+    ''' Ejecuta una función varias veces y devuelve el mejor tiempo en segundos
+
+    ENTRADA:
+       - funcion: función que se quiere medir
+       - args, kwargs: parámetros con los que se llama a la función
+       - repeticiones: número de ejecuciones -> int
+       - preparar: función sin parámetros que se ejecuta antes de cada medida (fuera del tiempo)
+    SALIDA:
+       - mejor tiempo de ejecución, en segundos -> float
+    '''
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        if preparar is not None:
+            preparar()
+        inicio = perf_counter()
+        funcion(*args, **kwargs)
+        mejor = min(mejor, perf_counter() - inicio)
+    return mejor
+
+
+################################################################
+#  Benchmarks
+################################################################
+
+def benchmark_cache(fichero):
+    print("BENCHMARK de la caché binaria de 'leer_preguntas'")
+    sin_cache = cronometrar(leer_preguntas, fichero, cache=False)
+    fria = cronometrar(leer_preguntas, fichero, preparar=lambda: borrar_cache(fichero))
+    caliente = cronometrar(leer_preguntas, fichero)
+    almacen = cronometrar(PreguntasStore.desde_fichero, fichero)
+    print("   - Sin caché:              {:8.1f} ms".format(sin_cache * 1000))
+    print("   - Carga en frío:          {:8.1f} ms (análisis + escritura de la caché)".format(fria * 1000))
+    print("   - Carga en caliente:      {:8.1f} ms ({:.1f}x)".format(caliente * 1000, sin_cache / caliente))
+    print("   - PreguntasStore (mmap):  {:8.1f} ms ({:.1f}x)\n".format(almacen * 1000, sin_cache / almacen))
+
+
+def benchmark_importacion(repeticiones=5):
+    print("BENCHMARK del tiempo de importación de stackoverflow_SOLUCION")
+    # Cada medida se hace en un intérprete nuevo, sin la variable MPLBACKEND
+    programa = ('import sys, time; t = time.perf_counter(); import stackoverflow_SOLUCION; '
+                'print(time.perf_counter() - t, "matplotlib" in sys.modules)')
+    entorno = {k: v for k, v in os.environ.items() if k != 'MPLBACKEND'}
+    medidas = [subprocess.run([sys.executable, '-c', programa], capture_output=True, text=True,
+                              env=entorno, check=True).stdout.split() for _ in range(repeticiones)]
+    matplotlib = subprocess.run([sys.executable, '-c', programa.replace('stackoverflow_SOLUCION', 'matplotlib.pyplot')],
+                                capture_output=True, text=True, env=entorno, check=True).stdout.split()
+    print("   - import stackoverflow_SOLUCION: {:8.1f} ms (matplotlib importado: {})".format(
+        min(float(segundos) for segundos, _ in medidas) * 1000, medidas[0][1]))
+    print("   - import matplotlib.pyplot:      {:8.1f} ms\n".format(float(matplotlib[0]) * 1000))
+
+
+def benchmark_carga(fichero, procesos=(1, 2, 4)):
+    print("BENCHMARK de la lectura en paralelo del CSV ('leer_preguntas_paralelo')")
+    megas = os.path.getsize(fichero) / 2**20
+    secuencial = cronometrar(leer_preguntas, fichero, cache=False)
+    print("   - {:.1f} MB, {} procesadores".format(megas, os.cpu_count()))
+    print("   - leer_preguntas:           {:8.1f} ms {:7.1f} MB/s".format(secuencial * 1000, megas / secuencial))
+    for n in procesos:
+        tiempo = cronometrar(leer_preguntas_paralelo, fichero, procesos=n)
+        print("   - paralelo, {} proceso(s):   {:8.1f} ms {:7.1f} MB/s ({:.2f}x)".format(
+            n, tiempo * 1000, megas / tiempo, secuencial / tiempo))
+    print()
+
+
+def benchmark_informes(fichero, procesos=(1, 2)):
+    print("BENCHMARK de 'generar_informe' frente a llamar a los mostrar_* gráfica a gráfica")
+    preguntas = leer_preguntas(fichero)
+    grupos = [['list', 'file', 'string'], ['django', 'flask', 'pyramid'],
+              ['numpy', 'pandas', 'scipy'], ['mysql', 'sqlite', 'postgresql']]
+    especificacion = [{'tipo': tipo, 'etiquetas': grupo} for grupo in grupos for tipo in ('distribucion', 'evolucion')]
+    with tempfile.TemporaryDirectory() as directorio:
+        def una_a_una():
+            for i, grafica in enumerate(especificacion):
+                mostrar = mostrar_distribucion_etiquetas if grafica['tipo'] == 'distribucion' else mostrar_evolucion_etiquetas
+                mostrar(preguntas, grafica['etiquetas'], fichero=os.path.join(directorio, '{}.png'.format(i)))
+        pasada = cronometrar(cubo_etiqueta_año, preguntas)
+        separadas = cronometrar(una_a_una)
+        print("   - {} gráficas; una pasada (cubo_etiqueta_año): {:8.1f} ms".format(len(especificacion), pasada * 1000))
+        print("   - mostrar_* una a una:             {:8.1f} ms".format(separadas * 1000))
+        for n in procesos:
+            tiempo = cronometrar(generar_informe, preguntas, especificacion, directorio, procesos=n)
+            print("   - generar_informe, {} proceso(s):   {:8.1f} ms ({:.1f}x una pasada)".format(
+                n, tiempo * 1000, tiempo / pasada))
+    print()
+
+
+def benchmark_servicio(fichero, stopwords, consultas=200):
+    print("BENCHMARK de 'ServicioPreguntas' (consultas HTTP en 127.0.0.1)")
+    import asyncio
+    servicio = ServicioPreguntas(leer_preguntas(fichero), stopwords)
+    objetivos = ['/contar_etiquetas', '/calcular_etiquetas', '/calcular_preguntas_mejor_valoradas?limite=10',
+                 '/contar_palabras_clave?top_n=20'] + ['/filtrar_por_a%C3%B1o?a%C3%B1o={}'.format(a)
+                                                      for a in range(2008, 2017)]
+
+    async def medir():
+        servidor = await servicio.iniciar(0)
+        puerto = servidor.sockets[0].getsockname()[1]
+        bucle = asyncio.get_running_loop()
+        get = lambda objetivo: bucle.run_in_executor(None, consultar, puerto, objetivo)
+        # Mientras se calcula una consulta pesada, el servicio sigue respondiendo a las demás
+        pesada = get('/contar_palabras_clave')
+        await asyncio.sleep(0.01)
+        inicio = perf_counter()
+        await get('/metricas')
+        durante = perf_counter() - inicio
+        await pesada
+        for i in range(consultas):
+            await get(objetivos[i % len(objetivos)])
+        metricas = (await get('/metricas'))[1]
+        servidor.close()
+        await servidor.wait_closed()
+        return durante, metricas
+
+    durante, metricas = asyncio.run(medir())
+    for ruta, medidas in metricas['rutas'].items():
+        print("   - {:36s} {:4d} consultas, p50 {:8.2f} ms, p99 {:8.2f} ms".format(
+            ruta, medidas['consultas'], medidas['p50_ms'], medidas['p99_ms']))
+    print("   - /metricas durante una consulta pesada: {:.1f} ms".format(durante * 1000))
+    print("   - Caché: {}\n".format(metricas['cache']))
+
+
+def benchmark_vocabulario(fichero):
+    print("BENCHMARK del vocabulario de etiquetas (cadenas compartidas y códigos)")
+    compartidas = leer_preguntas(fichero, cache=False)
+    # La misma colección con un objeto str distinto en cada pregunta, como antes del vocabulario
+    separadas = [Pregunta(p.puntuacion, p.titulo, p.año, p.etiqueta.encode('utf-8').decode('utf-8'))
+                 for p in compartidas]
+    almacen = PreguntasStore.desde_fichero(fichero, cache=False)
+    print("   - Memoria: cadenas separadas {:.1f} MB, compartidas {:.1f} MB".format(
+        memoria_lista_preguntas(separadas) / 2**20, memoria_lista_preguntas(compartidas) / 2**20))
+    casos = [('contar_etiquetas', contar_etiquetas, ()),
+             ('calcular_etiquetas', calcular_etiquetas, ()),
+             ('filtrar_por_etiqueta', filtrar_por_etiqueta, ('django',)),
+             ('cubo_etiqueta_año', cubo_etiqueta_año, ())]
+    for nombre, funcion, args in casos:
+        t_separadas = cronometrar(funcion, separadas, *args, repeticiones=7)
+        t_compartidas = cronometrar(funcion, compartidas, *args, repeticiones=7)
+        t_codigos = cronometrar(funcion, almacen, *args, repeticiones=7)
+        print("   - {:22s} separadas: {:7.2f} ms, compartidas: {:7.2f} ms ({:.2f}x), "
+              "PreguntasStore: {:7.2f} ms".format(nombre, t_separadas * 1000, t_compartidas * 1000,
+                                                    t_separadas / t_compartidas, t_codigos * 1000))
+    print()
+
+
+def benchmark_palabras_clave(fichero, stopwords):
+    print("BENCHMARK de 'contar_palabras_clave' (escalado lineal)")
+    preguntas = leer_preguntas(fichero)
+    for fraccion in (8, 4, 2, 1):
+        muestra = preguntas[:len(preguntas) // fraccion]
+        tiempo = cronometrar(contar_palabras_clave, muestra, stopwords)
+        tiempo_top = cronometrar(contar_palabras_clave, muestra, stopwords, top_n=100)
+        print("   - {:6d} preguntas: {:8.1f} ms ({:.2f} µs/pregunta), top_n=100: {:8.1f} ms".format(
+            len(muestra), tiempo * 1000, tiempo * 1e6 / len(muestra), tiempo_top * 1000))
+    configurar_cache_palabras_clave(maximo=len(preguntas))
+    contar_palabras_clave(preguntas, stopwords)
+    memoizada = cronometrar(contar_palabras_clave, preguntas, stopwords)
+    print("   - Con memoización (caché llena): {:8.1f} ms, {}".format(
+        memoizada * 1000, estadisticas_cache_palabras_clave()))
+    configurar_cache_palabras_clave(maximo=0)
+    print()
+
+
+def benchmark_aproximado(fichero, stopwords):
+    print("BENCHMARK de los contadores aproximados de 'contar_palabras_clave'")
+    preguntas = leer_preguntas(fichero)
+    exactas = contar_palabras_clave(preguntas, stopwords)
+    tiempo = cronometrar(contar_palabras_clave, preguntas, stopwords)
+    memoria = memoria_pico(lambda: contar_palabras_clave(preguntas, stopwords))
+    print("   - {:28s} {:8.1f} ms, pico de memoria {:7.2f} MB ({} términos)".format(
+        'Counter exacto', tiempo * 1000, memoria / 2**20, len(exactas)))
+    contadores = [('Space-Saving capacidad=1000', lambda: ContadorSpaceSaving(1000)),
+                  ('Space-Saving capacidad=5000', lambda: ContadorSpaceSaving(5000)),
+                  ('Count-Min epsilon=0.01', lambda: ContadorCountMin(0.01, 0.01)),
+                  ('Count-Min epsilon=0.001', lambda: ContadorCountMin(0.001, 0.01))]
+    for nombre, crear in contadores:
+        contar = lambda: contar_palabras_clave(preguntas, stopwords, aproximado=crear())
+        tiempo = cronometrar(contar)
+        memoria = memoria_pico(contar)
+        aproximadas = contar()
+        print("   - {:28s} {:8.1f} ms, pico de memoria {:7.2f} MB, exhaustividad top-10/100/500: {}".format(
+            nombre, tiempo * 1000, memoria / 2**20,
+            [round(exhaustividad_top_k(exactas, aproximadas, k), 3) for k in (10, 100, 500)]))
+    print()
+
+
+def benchmark_coocurrencias(fichero, stopwords):
+    print("BENCHMARK de la matriz documento-término (coocurrencias con matrices dispersas)")
+    preguntas = leer_preguntas(fichero)
+
+    def con_diccionarios():
+        # Mismos recuentos recorriendo las preguntas con Counter
+        bigramas, coocurrencias, por_etiqueta, por_año = Counter(), Counter(), Counter(), Counter()
+        for p in preguntas:
+            terminos = calcular_palabras_clave(p.titulo, stopwords)
+            bigramas.update(zip(terminos, terminos[1:]))
+            distintos = list(dict.fromkeys(terminos))
+            coocurrencias.update((a, b) for i, a in enumerate(distintos) for b in distintos[i + 1:])
+            por_etiqueta.update((t, p.etiqueta) for t in terminos)
+            por_año.update((t, p.año) for t in terminos)
+
+    def con_matriz(matriz):
+        matriz.bigramas()
+        matriz.coocurrencias()
+        matriz.palabras_por_etiqueta()
+        matriz.palabras_por_año()
+
+    matriz = MatrizDocumentoTermino.desde_preguntas(preguntas, stopwords)
+    t_diccionarios = cronometrar(con_diccionarios)
+    t_construccion = cronometrar(MatrizDocumentoTermino.desde_preguntas, preguntas, stopwords)
+    t_matriz = cronometrar(con_matriz, matriz)
+    print("   - Con diccionarios: {:8.1f} ms, pico de memoria {:6.1f} MB".format(
+        t_diccionarios * 1000, memoria_pico(con_diccionarios) / 2**20))
+    print("   - Con la matriz:    {:8.1f} ms (construcción {:.1f} ms + tablas {:.1f} ms), "
+          "pico de memoria {:6.1f} MB".format((t_construccion + t_matriz) * 1000, t_construccion * 1000,
+                                               t_matriz * 1000, memoria_pico(lambda: con_matriz(matriz)) / 2**20))
+    for nombre, calcular in [('bigramas', matriz.bigramas), ('coocurrencias', matriz.coocurrencias),
+                             ('palabras_por_etiqueta', matriz.palabras_por_etiqueta),
+                             ('palabras_por_año', matriz.palabras_por_año)]:
+        print("     {:22s} {:7.1f} ms, {} celdas".format(nombre, cronometrar(calcular) * 1000, len(calcular())))
+    with tempfile.TemporaryDirectory() as directorio:
+        destino = os.path.join(directorio, 'matriz.npz')
+        t_guardar = cronometrar(matriz.guardar, destino)
+        t_cargar = cronometrar(MatrizDocumentoTermino.cargar, destino)
+        print("   - Guardar: {:.1f} ms, cargar: {:.1f} ms, {:.2f} MB en disco".format(
+            t_guardar * 1000, t_cargar * 1000, os.path.getsize(destino) / 2**20))
+    print()
+
+
+def benchmark_vistas(fichero, stopwords):
+    print("BENCHMARK de los resúmenes materializados (PreguntasMaterializadas)")
+    preguntas = leer_preguntas(fichero)
+    materializadas = PreguntasMaterializadas(preguntas, stopwords)
+    consultas = [('contar_etiquetas(año=2015)', lambda p: contar_etiquetas(filtrar_por_año(p, 2015))),
+                 ('contar_palabras_clave(año=2015)',
+                  lambda p: contar_palabras_clave(filtrar_por_año(p, 2015), stopwords, 20)),
+                 ("mejor_valoradas(etiqueta='django')",
+                  lambda p: calcular_preguntas_mejor_valoradas(filtrar_por_etiqueta(p, 'django'))),
+                 ('cubo_etiqueta_año', lambda p: cubo_etiqueta_año(p))]
+    for nombre, consulta in consultas:
+        t_primera = cronometrar(consulta, materializadas, repeticiones=1, preparar=materializadas.invalidar)
+        t_recorrido = cronometrar(consulta, preguntas)
+        t_resumen = cronometrar(consulta, materializadas)
+        print("   - {:36s} recorrido: {:8.2f} ms, resumen: {:7.3f} ms ({:.0f}x), primera vez: {:8.2f} ms".format(
+            nombre, t_recorrido * 1000, t_resumen * 1000, t_recorrido / t_resumen, t_primera * 1000))
+    with tempfile.TemporaryDirectory() as directorio:
+        copia = os.path.join(directorio, os.path.basename(fichero))
+        shutil.copy(fichero, copia)
+        t_calcular = cronometrar(PreguntasMaterializadas.desde_fichero, copia, stopwords, precalcular=True,
+                                 repeticiones=1)
+        t_cargar = cronometrar(PreguntasMaterializadas.desde_fichero, copia, stopwords, precalcular=True)
+        print("   - Todos los resúmenes: calcular y guardar {:.1f} ms, cargar del disco {:.1f} ms".format(
+            t_calcular * 1000, t_cargar * 1000))
+    print()
+
+
+def benchmark_normalizacion(fichero, stopwords):
+    print("BENCHMARK de la normalización de títulos")
+    preguntas = leer_preguntas(fichero)
+    titulos = [p.titulo for p in preguntas]
+    casos = [('calcular_palabras_clave', lambda: [calcular_palabras_clave(t) for t in titulos]),
+             ('normalizar_titulos', lambda: normalizar_titulos(titulos))]
+    procesos = os.cpu_count() or 1
+    if procesos > 1:
+        casos.append(('normalizar_titulos ({} procesos)'.format(procesos),
+                      lambda: normalizar_titulos(titulos, procesos=procesos)))
+    for nombre, normalizar in casos:
+        tiempo = cronometrar(normalizar)
+        print("   - {:34s} {:8.1f} ms ({:7.0f} títulos/s)".format(nombre, tiempo * 1000, len(titulos) / tiempo))
+    normalizadas = PreguntasNormalizadas(preguntas)
+    t_original = cronometrar(contar_palabras_clave, preguntas, stopwords)
+    t_normalizadas = cronometrar(contar_palabras_clave_normalizadas, normalizadas, stopwords)
+    print("   - contar_palabras_clave: {:.1f} ms, contar_palabras_clave_normalizadas: {:.1f} ms ({:.2f}x)".format(
+        t_original * 1000, t_normalizadas * 1000, t_original / t_normalizadas))
+    print()
+
+
+def benchmark_paralelo(fichero, stopwords, procesos=4):
+    print("BENCHMARK de las funciones paralelas ({} procesos)".format(procesos))
+    preguntas = leer_preguntas(fichero)
+    casos = [('contar_etiquetas', contar_etiquetas, contar_etiquetas_paralelo, ()),
+             ('contar_palabras_clave', contar_palabras_clave, contar_palabras_clave_paralelo, (stopwords,)),
+             ('agrupar_preguntas_por_año', agrupar_preguntas_por_año, agrupar_preguntas_por_año_paralelo, ())]
+    for nombre, secuencial, paralela, args in casos:
+        t_secuencial = cronometrar(secuencial, preguntas, *args)
+        t_paralela = cronometrar(paralela, preguntas, *args, procesos=procesos)
+        print("   - {:26s} secuencial: {:8.1f} ms, paralela: {:8.1f} ms".format(
+            nombre, t_secuencial * 1000, t_paralela * 1000))
+    print()
+
+
+def benchmark_indice_invertido(fichero, stopwords):
+    print("BENCHMARK de 'IndiceInvertido' frente a recorrer los títulos")
+    preguntas = leer_preguntas(fichero)
+    construccion = cronometrar(IndiceInvertido.desde_preguntas, preguntas, stopwords, repeticiones=1)
+    indice = IndiceInvertido.desde_preguntas(preguntas, stopwords)
+    print("   - Construcción del índice: {:8.1f} ms".format(construccion * 1000))
+    for consulta, modo in (('django mysql', 'and'), ('list comprehension', 'and'), ('numpy pandas', 'or')):
+        con_indice = cronometrar(indice.buscar, consulta, modo, limite=None)
+        recorriendo = cronometrar(buscar_recorriendo, preguntas, consulta, modo, stopwords)
+        print("   - '{}' ({}): índice {:8.3f} ms, recorrido {:8.1f} ms ({:.0f}x)".format(
+            consulta, modo, con_indice * 1000, recorriendo * 1000, recorriendo / con_indice))
+    print()
+
+
+def benchmark_backend_numpy(fichero):
+    print("BENCHMARK del backend 'numpy' frente al backend 'python' (misma colección, mismo resultado)")
+    print("   (numpy en frío incluye construir las columnas; en caliente las reutiliza)")
+    from stackoverflow_numpy import olvidar_columnas
+    preguntas = leer_preguntas(fichero)
+    # Una list normal no guarda las columnas: numpy las construye en cada llamada
+    colecciones = [('leer_preguntas', preguntas),
+                   ('list', list(preguntas)),
+                   ('PreguntasStore', PreguntasStore.desde_fichero(fichero))]
+    casos = [('filtrar_por_año', filtrar_por_año, (2015,)),
+             ('contar_etiquetas', contar_etiquetas, ()),
+             ('calcular_preguntas_mejor_valoradas', calcular_preguntas_mejor_valoradas, (10,)),
+             ('cubo_etiqueta_año', cubo_etiqueta_año, ('frecuencia',))]
+    for coleccion, preguntas in colecciones:
+        print("   {}:".format(coleccion))
+        for nombre, funcion, args in casos:
+            olvidar_columnas(preguntas)
+            assert funcion(preguntas, *args, backend='numpy') == funcion(preguntas, *args, backend='python'), nombre
+            python = cronometrar(funcion, preguntas, *args, backend='python')
+            frio = cronometrar(funcion, preguntas, *args, backend='numpy', preparar=lambda: olvidar_columnas(preguntas))
+            caliente = cronometrar(funcion, preguntas, *args, backend='numpy')
+            print("   - {:36s} python: {:7.2f} ms, numpy en frío: {:7.2f} ms ({:5.1f}x), "
+                  "numpy en caliente: {:7.2f} ms ({:5.1f}x)".format(
+                      nombre, python * 1000, frio * 1000, python / frio, caliente * 1000, python / caliente))
+    print()
+
+
+################################################################
+#  Suite completa
+################################################################
+
+ETIQUETAS = ['list', 'file', 'string']
+
+
+def memoria_pico(funcion):
+    ''' Ejecuta una función y devuelve la memoria máxima reservada durante la ejecución, en bytes
+    '''
+    tracemalloc.start()
+    try:
+        funcion()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def casos_suite(fichero, stopwords):
+    ''' Devuelve las funciones públicas que mide la suite, preparadas para un fichero
+
+    ENTRADA:
+       - fichero: nombre del fichero de preguntas -> str
+       - stopwords: palabras huecas -> frozenset(str)
+    SALIDA:
+       - lista de tuplas (nombre, función sin parámetros) -> [(str, function)]
+    '''
+    preguntas = leer_preguntas(fichero, cache=False)
+    casos = [
+        ('leer_preguntas', lambda: leer_preguntas(fichero, cache=False)),
+        ('leer_preguntas_paralelo', lambda: leer_preguntas_paralelo(fichero)),
+        ('filtrar_por_año', lambda: filtrar_por_año(preguntas, 2012)),
+        ('calcular_etiquetas', lambda: calcular_etiquetas(preguntas)),
+        ('calcular_preguntas_mejor_valoradas', lambda: calcular_preguntas_mejor_valoradas(preguntas)),
+        ('contar_etiquetas', lambda: contar_etiquetas(preguntas)),
+        ('mostrar_distribucion_etiquetas', lambda: _sin_pantalla(mostrar_distribucion_etiquetas, preguntas)),
+        ('calcular_palabras_clave', lambda: [calcular_palabras_clave(p.titulo, stopwords) for p in preguntas]),
+        ('contar_palabras_clave', lambda: contar_palabras_clave(preguntas, stopwords)),
+        ('agrupar_preguntas_por_año', lambda: agrupar_preguntas_por_año(preguntas)),
+        ('mostrar_evolucion_etiquetas', lambda: _sin_pantalla(mostrar_evolucion_etiquetas, preguntas)),
+    ]
+    if find_spec('matplotlib') is None:
+        casos = [(nombre, funcion) for nombre, funcion in casos if not nombre.startswith('mostrar_')]
+    return casos
+
+
+def _sin_pantalla(mostrar, preguntas):
+    from matplotlib import pyplot as plt
+    mostrar(preguntas, ETIQUETAS)
+    plt.close('all')
+
+
+def ejecutar_suite(tamaños, stopwords, repeticiones=3):
+    ''' Mide el tiempo y la memoria máxima de las funciones públicas con varios tamaños de colección
+
+    Las colecciones sintéticas se generan con stackoverflow_sintetico la primera vez y se
+    reutilizan en las ejecuciones siguientes ('../data/sintetico_<tamaño>.csv').
+
+    ENTRADA:
+       - tamaños: números de preguntas de las colecciones sintéticas -> [int]
+       - stopwords: palabras huecas -> frozenset(str)
+       - repeticiones: número de ejecuciones de cada medida de tiempo -> int
+    SALIDA:
+       - resultados, por colección ('real' o el número de preguntas) y por función, con el mejor
+         tiempo en segundos y la memoria máxima en bytes
+                               -> {str: {str: {'segundos': float, 'memoria_pico': int}}}
+    '''
+    ficheros = {'real': FICHERO}
+    for tamaño in tamaños:
+        sintetico = '../data/sintetico_{}.csv'.format(tamaño)
+        if not os.path.exists(sintetico):
+            print("   Generando {} ...".format(sintetico))
+            generar_dataset(FICHERO, sintetico, tamaño)
+        ficheros[str(tamaño)] = sintetico
+
+    resultados = dict()
+    for coleccion, fichero in ficheros.items():
+        print("SUITE: colección '{}'".format(coleccion))
+        resultados[coleccion] = dict()
+        for nombre, funcion in casos_suite(fichero, stopwords):
+            segundos = cronometrar(funcion, repeticiones=repeticiones)
+            memoria = memoria_pico(funcion)
+            resultados[coleccion][nombre] = {'segundos': segundos, 'memoria_pico': memoria}
+            print("   - {:36s} {:10.1f} ms {:10.1f} MB".format(nombre, segundos * 1000, memoria / 2**20))
+        print()
+    return resultados
+
+
+def guardar_resultados(resultados, fichero):
+    ''' Guarda los resultados de la suite en JSON, junto con la fecha y la versión de Python
+    '''
+    with open(fichero, 'w', encoding='utf-8') as f:
+        json.dump({'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+                   'python': platform.python_version(),
+                   'resultados': resultados}, f, indent=2, ensure_ascii=False)
+
+
+def comparar_resultados(anteriores, actuales, umbral=1.25):
+    ''' Compara dos ejecuciones de la suite y devuelve las medidas que han empeorado
+
+    ENTRADA:
+       - anteriores, actuales: resultados de ejecutar_suite
+                               -> {str: {str: {'segundos': float, 'memoria_pico': int}}}
+       - umbral: proporción a partir de la cual un empeoramiento se considera regresión -> float
+    SALIDA:
+       - lista de tuplas (colección, función, medida, valor anterior, valor actual)
+                               -> [(str, str, str, float, float)]
+    '''
+    regresiones = []
+    for coleccion, funciones in actuales.items():
+        for nombre, medidas in funciones.items():
+            anterior = anteriores.get(coleccion, {}).get(nombre)
+            if anterior is None:
+                continue
+            for medida, valor in medidas.items():
+                if anterior[medida] and valor / anterior[medida] > umbral:
+                    regresiones.append((coleccion, nombre, medida, anterior[medida], valor))
+    return regresiones
+
+
+################################################################
+#  Programa principal
+################################################################
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Medidas de rendimiento del análisis de preguntas')
+    parser.add_argument('--suite', action='store_true', help='ejecutar la suite completa')
+    parser.add_argument('--tamaños', type=int, nargs='*', default=[1000000, 10000000],
+                        help='tamaños de las colecciones sintéticas de la suite')
+    parser.add_argument('--salida', default='benchmark.json', help='fichero JSON de resultados')
+    parser.add_argument('--comparar', help='fichero JSON de una ejecución anterior')
+    parser.add_argument('--umbral', type=float, default=1.25, help='proporción que se considera regresión')
+    argumentos = parser.parse_args()
+
+    with open('../data/stopwords.txt') as f:
+        stopwords = frozenset(p.strip() for p in f)
+
+    if argumentos.suite:
+        resultados = ejecutar_suite(argumentos.tamaños, stopwords)
+        guardar_resultados(resultados, argumentos.salida)
+        if argumentos.comparar:
+            with open(argumentos.comparar, encoding='utf-8') as f:
+                anteriores = json.load(f)['resultados']
+            regresiones = comparar_resultados(anteriores, resultados, argumentos.umbral)
+            for coleccion, nombre, medida, anterior, actual in regresiones:
+                print("REGRESIÓN en '{}' ({}): {} pasa de {:.4g} a {:.4g}".format(
+                    nombre, coleccion, medida, anterior, actual))
+            if not regresiones:
+                print("Sin regresiones respecto a {}".format(argumentos.comparar))
+    else:
+        benchmark_importacion()
+        benchmark_cache(FICHERO)
+        benchmark_vocabulario(FICHERO)
+        benchmark_carga(FICHERO)
+        benchmark_palabras_clave(FICHERO, stopwords)
+        benchmark_aproximado(FICHERO, stopwords)
+        benchmark_coocurrencias(FICHERO, stopwords)
+        benchmark_vistas(FICHERO, stopwords)
+        benchmark_normalizacion(FICHERO, stopwords)
+        benchmark_paralelo(FICHERO, stopwords)
+        benchmark_indice_invertido(FICHERO, stopwords)
+        benchmark_informes(FICHERO)
+        benchmark_servicio(FICHERO, stopwords)
+        benchmark_backend_numpy(FICHERO)
@@ -31,65 +31,249 @@ Estas son las primeras líneas de un fichero de entrada:
 
 FUNCIONES A IMPLEMENTAR:
 ------------------------
-- leer_preguntas(fichero):
+- leer_preguntas(fichero, cache=True, procesos=1):
     lee el fichero de preguntas y devuelve una lista de tuplas con nombre
-- filtrar_por_año(preguntas, año):
+- filtrar_por_año(preguntas, año, backend='python'):
     recibe una lista de preguntas y devuelve solo las del año recibido como parámetro
+- filtrar_por_etiqueta(preguntas, etiqueta):
+    recibe una lista de preguntas y devuelve solo las de la etiqueta recibida como parámetro
 - calcular_etiquetas(preguntas):
     calcula el conjunto de etiquetas usadas en la colección de preguntas
-- calcular_preguntas_mejor_valoradas(preguntas, limite=10):
+- calcular_preguntas_mejor_valoradas(preguntas, limite=10, backend='python'):
     calcula las preguntas con las puntuaciones más altas
-- contar_etiquetas(preguntas):
-    calcula las frecuencias de las etiquetas de una lista de preguntas
-- mostrar_distribucion_etiquetas(preguntas, etiquetas):
+- mejor_valoradas_por_grupo(preguntas, clave='año', limite=10):
+    calcula las preguntas con las puntuaciones más altas de cada año o de cada etiqueta
+- contar_etiquetas(preguntas, backend='python', aproximado=None):
+    calcula las frecuencias de las etiquetas de una lista de preguntas (exactas o, con
+    'aproximado', estimadas con un contador de memoria fija de stackoverflow_aproximado)
+- mostrar_distribucion_etiquetas(preguntas, etiquetas, fichero=None):
     muestra un diagrama de tarta con la distribución de uso de varias etiquetas
-- calcular_palabras_clave(titulo, stopwords=[]):
+- calcular_palabras_clave(titulo, stopwords=frozenset()):
     calcula la lista de palabras clave del título de una pregunta
-- contar_palabras_clave(preguntas, stopwords=[]):
-    calcula las frecuencias de las palabras clave usadas en una lista de preguntas
+- contar_palabras_clave(preguntas, stopwords=frozenset(), top_n=None, aproximado=None):
+    calcula las frecuencias de las palabras clave usadas en una lista de preguntas (exactas
+    o estimadas con un contador aproximado)
+- extractor_palabras_clave():
+    devuelve la función que calcula las palabras clave de cada título en los bucles, con o sin
+    instrumentación según esté activa
+- configurar_cache_palabras_clave(maximo=100000), estadisticas_cache_palabras_clave():
+    activan y consultan la memoización (LRU) de calcular_palabras_clave
 - agrupar_preguntas_por_año(preguntas):
     calcula un diccionario con una lista de preguntas por cada año
-- mostrar_evolucion_etiquetas(preguntas, etiquetas):
+- mostrar_evolucion_etiquetas(preguntas, etiquetas, cubo=None, backend='python', fichero=None):
     muestra la evolución del uso de etiquetas a lo largo del tiempo
+- dibujar_tarta(ejes, tamaños, etiquetas), dibujar_evolucion(ejes, años, evoluciones, etiquetas):
+    dibujan las gráficas de los mostrar_* en unos ejes de matplotlib (ver stackoverflow_informes)
+
+matplotlib solo se importa al dibujar una gráfica, así que el resto de funciones no pagan su
+tiempo de importación ni necesitan una pantalla. Con el parámetro 'fichero' las gráficas se
+guardan directamente en un fichero PNG o SVG (según su extensión) con el backend Agg de
+matplotlib, sin usar pyplot ni abrir ninguna ventana.
+
+
+AGREGADOS:
+----------
+- cubo_etiqueta_año(preguntas, medida='frecuencia', backend='python'):
+    calcula en una sola pasada la frecuencia, suma o media de puntuaciones de cada par (etiqueta, año)
+- calcular_evoluciones(cubo, etiquetas):
+    calcula la evolución por años de varias etiquetas consultando el cubo
+
+Las colecciones de stackoverflow_vistas (PreguntasMaterializadas) guardan resúmenes de estos
+agregados, y las funciones de este módulo los usan cuando reciben una de esas colecciones o
+una vista filtrada de ellas, en lugar de recorrer las preguntas.
+
+Las funciones con parámetro 'backend' admiten backend='numpy', que hace los cálculos sobre
+columnas de enteros con NumPy (módulo stackoverflow_numpy, que solo se importa si se usa).
+Las columnas se construyen la primera vez y se guardan en la colección: en la ListaPreguntas
+que devuelve leer_preguntas o en un PreguntasStore. Una list normal (o una rebanada de una
+ListaPreguntas) no puede guardarlas y se construyen en cada llamada, lo que suele costar más
+que el cálculo en Python; para ese caso se puede envolver en ListaPreguntas.
+
+Las funciones públicas están instrumentadas con stackoverflow_perfil: se puede medir su tiempo,
+llamadas, filas procesadas y memoria con la variable de entorno STACKOVERFLOW_PERFIL=1 o con
+el gestor de contexto perfilando().
+
+
+FUNCIONES POR LOTES:
+--------------------
+Para ficheros que no caben en memoria, iterar_preguntas lee el fichero por lotes y las
+siguientes funciones consumen esos lotes de forma incremental. Sus resultados coinciden
+con los de las funciones equivalentes sobre la lista completa.
+
+- iterar_preguntas(fichero, chunk_size=10000):
+    genera lotes (listas) de preguntas leídas del fichero
+- calcular_etiquetas_por_lotes(lotes)
+- contar_etiquetas_por_lotes(lotes)
+- contar_palabras_clave_por_lotes(lotes, stopwords=frozenset())
+- agrupar_preguntas_por_año_por_lotes(lotes)
 '''
 
 import csv
+import heapq
 from collections import namedtuple, Counter
-from itertools import groupby
-from matplotlib import pyplot as plt
+from functools import lru_cache
+from itertools import groupby, islice
+from operator import itemgetter
+from stackoverflow_cache import cargar_cache, guardar_cache, calcular_huella
+from stackoverflow_perfil import instrumentar, perfil_activo
+from stackoverflow_vocabulario import VocabularioEtiquetas
 
 # EJERCICIO 1:
 Pregunta = namedtuple('Pregunta', 'puntuacion, titulo, año, etiqueta')
-def leer_preguntas(fichero):
+
+
+class ListaPreguntas(list):
+    ''' Lista de preguntas en la que el backend 'numpy' puede guardar sus columnas
+
+    Se comporta como una list. La primera vez que se usa con backend='numpy' se guardan en
+    ella las columnas de NumPy, que se reutilizan en las llamadas siguientes; los métodos que
+    modifican la lista las descartan. Las copias y rebanadas son listas normales, sin columnas;
+ListaPreguntas(lista) convierte cualquier lista de preguntas.
+    '''
+    _columnas_numpy = None
+    # Número de modificaciones, para que quien guarde datos derivados de la lista (como los
+    # resúmenes de stackoverflow_vistas) sepa si han quedado obsoletos
+    modificaciones = 0
+
+    def __getstate__(self):
+        # Las columnas no se copian al serializar la lista (por ejemplo, al enviarla a otro proceso)
+        return None
+
+    def _al_modificar(self):
+        self._columnas_numpy = None
+        self.modificaciones += 1
+
+
+def _descartar_columnas(metodo):
+    def envoltorio(self, *args, **kwargs):
+        self._al_modificar()
+        return metodo(self, *args, **kwargs)
+    envoltorio.__name__ = metodo.__name__
+    return envoltorio
+
+
+for _metodo in ('__setitem__', '__delitem__', '__iadd__', '__imul__', 'append', 'extend',
+                'insert', 'pop', 'remove', 'clear', 'sort', 'reverse'):
+    setattr(ListaPreguntas, _metodo, _descartar_columnas(getattr(list, _metodo)))
+
+
+@instrumentar(filas='salida')
+def leer_preguntas(fichero, cache=True, procesos=1):
     ''' Lee el fichero de registros y devuelve una lista de tuplas con nombre
     
     ENTRADA: 
        - fichero: nombre del fichero de entrada -> str
+       - cache: si es True, se leen las preguntas de la caché binaria del fichero cuando
+                es válida, y se crea cuando no existe o ha quedado obsoleta -> bool
+       - procesos: número de procesos con que se analiza el fichero CSV. Con más de uno se
+                   usa leer_preguntas_paralelo (módulo stackoverflow_carga) -> int
     SALIDA: 
+       - lista de preguntas (puntuacion, titulo, año, etiqueta) -> ListaPreguntas(Pregunta(int, str, int, str))
+
+    Las preguntas de una misma etiqueta comparten el mismo objeto str (ver stackoverflow_vocabulario).
+    '''
+    if cache:
+        columnas = cargar_cache(fichero)
+        if columnas is not None:
+            return ListaPreguntas(preguntas_desde_columnas(columnas))
+        # La huella se toma antes de leer: si el fichero cambia mientras tanto, la caché
+        # quedará invalidada en la siguiente lectura
+        huella = calcular_huella(fichero)
+    if procesos > 1:
+        from stackoverflow_carga import leer_preguntas_paralelo
+        preguntas = leer_preguntas_paralelo(fichero, procesos)
+    else:
+        canonica = VocabularioEtiquetas().canonica
+        with open(fichero, 'r', encoding='utf-8') as f:
+            lector = csv.reader(f)
+            next(lector)
+            preguntas = [Pregunta(int(puntuacion), titulo, int(año), canonica(etiqueta)) 
+                         for puntuacion, titulo, año, etiqueta in lector]
+    if cache:
+        guardar_cache(fichero, preguntas, huella)
+    return ListaPreguntas(preguntas)
+
+
+def preguntas_desde_columnas(columnas):
+    ''' Construye la lista de preguntas a partir de sus columnas
+
+    ENTRADA:
+       - columnas: columnas de las preguntas, como las que devuelve cargar_cache -> Columnas
+    SALIDA:
        - lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
     '''
+    etiquetas = columnas.etiquetas
+    titulos = columnas.titulos
+    desplazamientos = columnas.desplazamientos
+    return [Pregunta(puntuacion, str(titulos[inicio:fin], 'utf-8'), año, etiquetas[codigo])
+            for puntuacion, año, codigo, inicio, fin
+            in zip(columnas.puntuaciones, columnas.años, columnas.codigos_etiqueta,
+                   desplazamientos, desplazamientos[1:])]
+
+
+def iterar_preguntas(fichero, chunk_size=10000):
+    ''' Lee el fichero de registros por lotes, sin cargarlo entero en memoria
+
+    ENTRADA:
+       - fichero: nombre del fichero de entrada -> str
+       - chunk_size: número máximo de preguntas de cada lote -> int
+    SALIDA:
+       - generador de lotes de preguntas (puntuacion, titulo, año, etiqueta)
+                               -> iter([Pregunta(int, str, int, str)])
+    '''
+    canonica = VocabularioEtiquetas().canonica
     with open(fichero, 'r', encoding='utf-8') as f:
         lector = csv.reader(f)
         next(lector)
-        preguntas = [Pregunta(int(puntuacion), titulo, int(año), etiqueta) 
-                     for puntuacion, titulo, año, etiqueta in lector]
-    return preguntas
+        while True:
+            lote = [Pregunta(int(puntuacion), titulo, int(año), canonica(etiqueta))
+                    for puntuacion, titulo, año, etiqueta in islice(lector, chunk_size)]
+            if not lote:
+                break
+            yield lote
 
 
 # EJERCICIO 2:
-def filtrar_por_año(preguntas, año):
+@instrumentar
+def filtrar_por_año(preguntas, año, backend='python'):
     ''' Recibe una lista de preguntas y devuelve solo las del año recibido como parámetro
     
     ENTRADA: 
        - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
        - año: del que se seleccionarán las preguntas -> int
+       - backend: 'python' o 'numpy' (ver stackoverflow_numpy) -> str
     SALIDA: 
        - lista de preguntas seleccionadas -> [Pregunta(int, str, int, str)]
+         (con una PreguntasMaterializadas, una VistaFiltrada: una list que además recuerda
+         el filtro para contestar las consultas siguientes con los resúmenes)
     '''
+    if hasattr(preguntas, 'filtrar_por_año'):
+        # Las colecciones indexadas (PreguntasIndexadas) responden sin recorrer las preguntas
+        return preguntas.filtrar_por_año(año)
+    if _usar_numpy(backend):
+        return _backend_numpy().filtrar_por_año(preguntas, año)
     return [p for p in preguntas if p.año==año]
 
 
+@instrumentar
+def filtrar_por_etiqueta(preguntas, etiqueta):
+    ''' Recibe una lista de preguntas y devuelve solo las de la etiqueta recibida como parámetro
+
+    ENTRADA:
+       - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
+       - etiqueta: de la que se seleccionarán las preguntas -> str
+    SALIDA:
+       - lista de preguntas seleccionadas -> [Pregunta(int, str, int, str)]
+         (con una PreguntasMaterializadas, una VistaFiltrada: una list que además recuerda
+         el filtro para contestar las consultas siguientes con los resúmenes)
+    '''
+    if hasattr(preguntas, 'filtrar_por_etiqueta'):
+        return preguntas.filtrar_por_etiqueta(etiqueta)
+    return [p for p in preguntas if p.etiqueta==etiqueta]
+
+
 # EJERCICIO 3:
+@instrumentar
 def calcular_etiquetas(preguntas):
     ''' Calcula el conjunto de etiquetas usadas en la colección de preguntas
     
@@ -98,34 +282,88 @@ def calcular_etiquetas(preguntas):
     SALIDA: 
        - conjunto de etiquetas encontradas -> {str}
     '''
+    if hasattr(preguntas, 'calcular_etiquetas'):
+        return preguntas.calcular_etiquetas()
     return set(p.etiqueta for p in preguntas)
 
 
 # EJERCICIO 4:
-def calcular_preguntas_mejor_valoradas(preguntas, limite=10):
+@instrumentar
+def calcular_preguntas_mejor_valoradas(preguntas, limite=10, backend='python'):
     ''' Calcula las preguntas con las puntuaciones más altas
     
     ENTRADA: 
        - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
        - limite: número de preguntas a recuperar -> int
+       - backend: 'python' o 'numpy' (ver stackoverflow_numpy) -> str
     SALIDA: 
        - lista de tuplas (titulo, puntuacion) ordenada de mayor a menor
         puntuacion  -> [(str, int)]
     '''
-    resultado = [(p.titulo, p.puntuacion) for p in preguntas]
-    resultado.sort(key=lambda x:x[1], reverse=True)
-    return resultado[:limite]
+    if _usar_numpy(backend):
+        return _backend_numpy().calcular_preguntas_mejor_valoradas(preguntas, limite)
+    if hasattr(preguntas, 'preguntas_mejor_valoradas'):
+        # Las colecciones con resúmenes (stackoverflow_vistas) contestan con ellos si pueden;
+        # si no, devuelven None y se recorren las preguntas
+        resultado = preguntas.preguntas_mejor_valoradas(limite)
+        if resultado is not None:
+            return resultado
+    # nlargest mantiene un montículo de tamaño limite: O(N log limite) y admite generadores.
+    # Es estable, así que los empates conservan el orden de la colección
+    return heapq.nlargest(limite, ((p.titulo, p.puntuacion) for p in preguntas), key=itemgetter(1))
+
+
+@instrumentar
+def mejor_valoradas_por_grupo(preguntas, clave='año', limite=10):
+    ''' Calcula en una sola pasada las preguntas con las puntuaciones más altas de cada año o etiqueta
+
+    ENTRADA:
+       - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
+       - clave: campo por el que se agrupan las preguntas, 'año' o 'etiqueta' -> str
+       - limite: número de preguntas a recuperar de cada grupo -> int
+    SALIDA:
+       - diccionario cuyas claves son los años o etiquetas y los valores las listas de tuplas
+         (titulo, puntuacion) ordenadas de mayor a menor puntuacion -> {int | str: [(str, int)]}
+    '''
+    if clave not in ('año', 'etiqueta'):
+        raise ValueError("clave debe ser 'año' o 'etiqueta': {!r}".format(clave))
+    # Un montículo de mínimos de tamaño limite por grupo. El orden (puntuacion, -posicion)
+    # hace que, a igual puntuación, salga antes la pregunta más tardía, como en un
+    # ordenamiento estable
+    monticulos = dict()
+    for posicion, p in enumerate(preguntas):
+        monticulo = monticulos.setdefault(getattr(p, clave), [])
+        elemento = (p.puntuacion, -posicion, p.titulo)
+        if len(monticulo) < limite:
+            heapq.heappush(monticulo, elemento)
+        elif elemento > monticulo[0]:
+            heapq.heapreplace(monticulo, elemento)
+    return {grupo: [(titulo, puntuacion) for puntuacion, _, titulo in sorted(monticulo, reverse=True)]
+            for grupo, monticulo in monticulos.items()}
 
 
 # EJERCICIO 5:
-def contar_etiquetas(preguntas):
+@instrumentar
+def contar_etiquetas(preguntas, backend='python', aproximado=None):
     ''' Calcula las frecuencias de las etiquetas de una lista de preguntas
     
     ENTRADA: 
        - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
+       - backend: 'python' o 'numpy' (ver stackoverflow_numpy) -> str
+       - aproximado: si no es None, contador aproximado (ver stackoverflow_aproximado) en el
+                     que se acumulan las etiquetas; se devuelven solo las que guarda, con su
+                     frecuencia estimada -> ContadorSpaceSaving | ContadorCountMin
     SALIDA: 
        - diccionario cuyas claves son las etiquetas y los valores las frecuecias  -> {str: int}
     '''
+    if aproximado is not None:
+        aproximado.update(p.etiqueta for p in preguntas)
+        return dict(aproximado.items())
+    # Si se pide expresamente el backend NumPy se usa aunque la colección sepa contar sus etiquetas
+    if _usar_numpy(backend):
+        return _backend_numpy().contar_etiquetas(preguntas)
+    if hasattr(preguntas, 'contar_etiquetas'):
+        return preguntas.contar_etiquetas()
     # Lista de etiquetas
     etiquetas = (p.etiqueta for p in preguntas)
     # Counter es una subclase de dict que está diseñada 
@@ -137,12 +375,15 @@ def contar_etiquetas(preguntas):
 
 
 # EJERCICIO 6:
-def mostrar_distribucion_etiquetas(preguntas, etiquetas):
+@instrumentar
+def mostrar_distribucion_etiquetas(preguntas, etiquetas, fichero=None):
     ''' Muestra un diagrama de tarta con la distribución de uso de varias etiquetas
     
     ENTRADA: 
        - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
        - etiquetas: lista de etiquetas que se inlcuirán en la gráfica
+       - fichero: si no es None, la gráfica se guarda en este fichero (.png o .svg) en lugar
+                  de mostrarse en pantalla -> str
     SALIDA EN PANTALLA: 
        - gráfica con un diagrama de tarta con un sector por cada etiqueta recibida
     
@@ -156,20 +397,22 @@ def mostrar_distribucion_etiquetas(preguntas, etiquetas):
     '''
     frecuencias = contar_etiquetas(preguntas)
     num_veces = [frecuencias.get(e,0) for e in etiquetas]
-    # autopct = '%.1f%%' # display the percentage value to 1 decimal  
-    plt.pie(num_veces, labels=etiquetas, autopct='%.1f%%', shadow=True, startangle=90)
-    #plt.pie(num_veces, labels=etiquetas, autopct='%1.1f%%', shadow=True, startangle=90)
-    plt.legend()
-    plt.show()
+    figura, ejes = _crear_grafica(fichero)
+    dibujar_tarta(ejes, num_veces, etiquetas)
+    _terminar_grafica(figura, fichero)
 
 
 # EJERCICIO 7:
-def calcular_palabras_clave(titulo, stopwords=[]):
+SIMBOLOS = '¿?-+/*[](){},;.<>='
+@instrumentar(filas=None)
+def calcular_palabras_clave(titulo, stopwords=frozenset()):
     ''' Calcula la lista de palabras clave del título de una pregunta
     
     ENTRADA: 
        - titulo: descripción de la pregunta -> str
-       - stopwords: palabras huecas, consideradas no relevantes como palabras clave
+       - stopwords: palabras huecas, consideradas no relevantes como palabras clave. Si no es
+                    un conjunto se convierte en uno en cada llamada; con la memoización activa
+                    debe ser un frozenset para no convertirlo cada vez -> frozenset(str)
     SALIDA: 
        - lista de palabras clave encontradas en el título  -> [str]
     PROCEDIMIENTO:
@@ -179,33 +422,124 @@ def calcular_palabras_clave(titulo, stopwords=[]):
        - Dejar en la lista de términos solo aquellos que estén compuestos por letras
        - Eliminar de la lista los términos que aparezcan el la lista de stopwords
     '''
-    simbolos = '¿?-+/*[](){},;.<>='
-    titulo = titulo.lower()
-    terminos = [t.strip() for t in titulo.split(' ')]
-    terminos = [t.strip(simbolos) for t in terminos]
-    terminos = [t for t in terminos if t.isalpha()]
-    terminos = [t for t in terminos if t not in stopwords]
-    return terminos
+    return _palabras_clave(titulo, stopwords)
+
+
+def _palabras_clave(titulo, stopwords=frozenset()):
+    # calcular_palabras_clave sin el envoltorio de instrumentación (ver extractor_palabras_clave)
+    if _palabras_clave_memoizadas is not None:
+        # La clave de la caché es (titulo, stopwords): las stopwords tienen que ser hashables
+        if not isinstance(stopwords, frozenset):
+            stopwords = frozenset(stopwords)
+        return list(_palabras_clave_memoizadas(titulo, stopwords))
+    if not isinstance(stopwords, (set, frozenset)):
+        stopwords = frozenset(stopwords)
+    return _calcular_palabras_clave(titulo, stopwords)
+
+
+def _calcular_palabras_clave(titulo, stopwords):
+    # Todos los pasos en una sola pasada, sin listas intermedias
+    terminos = (t.strip().strip(SIMBOLOS) for t in titulo.lower().split(' '))
+    return [t for t in terminos if t.isalpha() and t not in stopwords]
+
+
+_palabras_clave_memoizadas = None
+def configurar_cache_palabras_clave(maximo=100000):
+    ''' Activa o desactiva la memoización de calcular_palabras_clave
+
+    Los títulos se repiten mucho (duplicados, preguntas repetidas, frases habituales). Con la
+    memoización activa, calcular_palabras_clave guarda las palabras clave de los últimos títulos
+    procesados, con cada conjunto de stopwords, y descarta los menos usados recientemente (LRU).
+    Al reconfigurar la caché se vacía y se ponen a cero sus estadísticas.
+
+    ENTRADA:
+       - maximo: número máximo de títulos guardados. Con 0 o None se desactiva -> int
+    '''
+    global _palabras_clave_memoizadas
+    if maximo:
+        # Se guardan tuplas para que ningún llamador pueda modificar el valor cacheado
+        _palabras_clave_memoizadas = lru_cache(maxsize=maximo)(
+            lambda titulo, stopwords: tuple(_calcular_palabras_clave(titulo, stopwords)))
+    else:
+        _palabras_clave_memoizadas = None
+
+
+def estadisticas_cache_palabras_clave():
+    ''' Devuelve las estadísticas de la memoización de calcular_palabras_clave
+
+    SALIDA:
+       - diccionario con los aciertos, fallos, tamaño actual y tamaño máximo de la caché, o
+         None si la memoización no está activa -> {str: int}
+    '''
+    if _palabras_clave_memoizadas is None:
+        return None
+    info = _palabras_clave_memoizadas.cache_info()
+    return {'aciertos': info.hits, 'fallos': info.misses, 'tamaño': info.currsize, 'maximo': info.maxsize}
 
 
 # EJERCICIO 8:
-def contar_palabras_clave(preguntas, stopwords=[]):
+@instrumentar
+def contar_palabras_clave(preguntas, stopwords=frozenset(), top_n=None, aproximado=None):
     ''' Calcula las frecuencias de las palabras clave usadas en una lista de preguntas
     
     ENTRADA: 
        - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
        - stopwords: palabras huecas, consideradas no relevantes como palabras clave
+       - top_n: si no es None, solo se devuelven los top_n términos más frecuentes -> int
+       - aproximado: si no es None, contador aproximado (ver stackoverflow_aproximado) que se
+                     usa en lugar de un Counter exacto; las frecuencias son estimaciones
+                                           -> ContadorSpaceSaving | ContadorCountMin
     SALIDA: 
        - lista de tuplas (termino, frecuencia) ordenada de mayor a menor frecuencia  -> [(str, int)]
     '''
-    palabras = sum((calcular_palabras_clave(p.titulo, stopwords) for p in preguntas), [])
-    frecuencias = Counter(palabras)
+    # Las stopwords se convierten en conjunto una sola vez para todos los títulos
+    stopwords = frozenset(stopwords)
+    if aproximado is None and hasattr(preguntas, 'frecuencias_palabras_clave'):
+        # Las colecciones con resúmenes (stackoverflow_vistas) contestan sin volver a procesar
+        # los títulos si pueden
+        frecuencias = preguntas.frecuencias_palabras_clave(stopwords)
+        if frecuencias is not None:
+            return ordenar_frecuencias(frecuencias, top_n)
+    extraer = extractor_palabras_clave()
+    frecuencias = Counter() if aproximado is None else aproximado
+    for p in preguntas:
+        frecuencias.update(extraer(p.titulo, stopwords))
+    return ordenar_frecuencias(frecuencias, top_n)
+
+
+def extractor_palabras_clave():
+    ''' Devuelve la función con que se calculan las palabras clave de cada título en un bucle
+
+    Con la instrumentación activa (stackoverflow_perfil) es calcular_palabras_clave, para que
+    se mida cada llamada. Si no, es la misma función sin el envoltorio de instrumentación, que
+    no paga una llamada extra por título. Las dos usan la memoización si está activa.
+
+    SALIDA:
+       - función (titulo, stopwords) que devuelve las palabras clave del título -> function
+    '''
+    return calcular_palabras_clave if perfil_activo() else _palabras_clave
+
+
+def ordenar_frecuencias(frecuencias, top_n=None):
+    ''' Ordena unas frecuencias de mayor a menor, conservando el orden original en los empates
+
+    ENTRADA:
+       - frecuencias: diccionario de frecuencias -> {str: int}
+       - top_n: si no es None, solo se devuelven los top_n elementos más frecuentes. Se
+                seleccionan con un montículo, sin ordenar todas las frecuencias -> int
+    SALIDA:
+       - lista de tuplas (termino, frecuencia) ordenada de mayor a menor frecuencia  -> [(str, int)]
+    '''
+    if top_n is not None:
+        # nlargest es estable: equivale a sorted(..., reverse=True)[:top_n]
+        return heapq.nlargest(top_n, frecuencias.items(), key=itemgetter(1))
     frecuencias = list(frecuencias.items())
     frecuencias.sort(key=lambda x:x[1], reverse=True)
     return frecuencias
 
 
 # EJERCICIO 9:
+@instrumentar
 def agrupar_preguntas_por_año(preguntas):
     ''' Calcula un diccionario con una lista de preguntas por cada año
     
@@ -215,6 +549,8 @@ def agrupar_preguntas_por_año(preguntas):
        - diccionario cuyas claves son los años y los valores la lista de preguntas de cada año  
                                -> {int: [Pregunta(int, str, int, str)]}
     '''
+    if hasattr(preguntas, 'agrupar_preguntas_por_año'):
+        return preguntas.agrupar_preguntas_por_año()
     preguntas_por_año = dict()
     for p in preguntas:
         # Función de diccionario de Python:
@@ -242,12 +578,18 @@ def agrupar_preguntas_por_año(preguntas):
     '''
 
 # EJERCICIO 10: 
-def mostrar_evolucion_etiquetas(preguntas, etiquetas):
+@instrumentar
+def mostrar_evolucion_etiquetas(preguntas, etiquetas, cubo=None, backend='python', fichero=None):
     ''' Muestra la evolución del uso de etiquetas a lo largo del tiempo
     
     ENTRADA: 
        - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
        - etiquetas: lista de etiquetas que se inlcuirán en la gráfica
+       - cubo: cubo de frecuencias ya calculado con cubo_etiqueta_año(preguntas). Si es None
+               se calcula a partir de las preguntas -> {str: {int: int}}
+       - backend: 'python' o 'numpy', usado para calcular el cubo (ver stackoverflow_numpy) -> str
+       - fichero: si no es None, la gráfica se guarda en este fichero (.png o .svg) en lugar
+                  de mostrarse en pantalla -> str
     SALIDA EN PANTALLA: 
        - gráfica con una línea para cada etiqueta con su evolución temporal
     
@@ -264,18 +606,204 @@ def mostrar_evolucion_etiquetas(preguntas, etiquetas):
                       Cada evolución consiste en una lista de frecuencias, alineada con la lista de años, 
                       correspondientes con el número de veces que la etiqueta ha sido usada cada año.   
     '''
-    años = sorted({p.año for p in preguntas})
-    preguntas_por_año = agrupar_preguntas_por_año(preguntas)
-    evoluciones = []
-    for etiqueta in etiquetas:
-        evolucion = []
-        for año in años:
-            frecuencia = len([p for p in preguntas_por_año[año] if p.etiqueta==etiqueta])
-            evolucion.append(frecuencia)
-        evoluciones.append(evolucion)
-    
+    if cubo is None:
+        cubo = cubo_etiqueta_año(preguntas, backend=backend)
+    años, evoluciones = calcular_evoluciones(cubo, etiquetas)
+    figura, ejes = _crear_grafica(fichero)
+    dibujar_evolucion(ejes, años, evoluciones, etiquetas)
+    _terminar_grafica(figura, fichero)
+
+
+################################################################
+#  Gráficas
+################################################################
+
+def _crear_grafica(fichero):
+    ''' Devuelve la figura y los ejes en que se dibuja una gráfica
+
+    Para mostrarla en pantalla se usan los ejes actuales de pyplot. Para guardarla en un
+    fichero se crea una Figure independiente, que se dibuja con Agg sin importar pyplot.
+    '''
+    if fichero is None:
+        from matplotlib import pyplot as plt
+        return plt.gcf(), plt.gca()
+    from matplotlib.figure import Figure
+    figura = Figure()
+    return figura, figura.add_subplot()
+
+
+def _terminar_grafica(figura, fichero):
+    if fichero is None:
+        from matplotlib import pyplot as plt
+        plt.show()
+    else:
+        figura.savefig(fichero)
+
+
+def dibujar_tarta(ejes, tamaños, etiquetas):
+    ''' Dibuja en unos ejes de matplotlib un diagrama de tarta con la distribución de varias etiquetas
+
+    ENTRADA:
+       - ejes: ejes en que se dibuja -> matplotlib.axes.Axes
+       - tamaños: número de preguntas de cada etiqueta -> [int]
+       - etiquetas: nombres de las etiquetas, en el mismo orden -> [str]
+    '''
+    # autopct = '%.1f%%' # display the percentage value to 1 decimal
+    ejes.pie(tamaños, labels=etiquetas, autopct='%.1f%%', shadow=True, startangle=90)
+    ejes.legend()
+
+
+def dibujar_evolucion(ejes, años, evoluciones, etiquetas):
+    ''' Dibuja en unos ejes de matplotlib la evolución por años de varias etiquetas
+
+    ENTRADA:
+       - ejes: ejes en que se dibuja -> matplotlib.axes.Axes
+       - años, evoluciones: resultado de calcular_evoluciones -> [int], [[int]]
+       - etiquetas: nombres de las etiquetas, en el mismo orden que las evoluciones -> [str]
+    '''
     for etiqueta, evolucion in zip(etiquetas, evoluciones):
-        plt.plot(evolucion, label=etiqueta)
-    plt.xticks(range(len(años)), años, rotation=80, fontsize=10)
-    plt.legend()
-    plt.show()
+        ejes.plot(evolucion, label=etiqueta)
+    ejes.set_xticks(range(len(años)))
+    ejes.set_xticklabels(años, rotation=80, fontsize=10)
+    ejes.legend()
+
+
+################################################################
+#  Agregados
+################################################################
+@instrumentar
+def cubo_etiqueta_año(preguntas, medida='frecuencia', backend='python'):
+    ''' Calcula en una sola pasada una medida para cada par (etiqueta, año)
+
+    ENTRADA:
+       - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
+       - medida: 'frecuencia' (número de preguntas), 'suma' (suma de puntuaciones) o
+                 'media' (media de puntuaciones) -> str
+       - backend: 'python' o 'numpy' (ver stackoverflow_numpy) -> str
+    SALIDA:
+       - diccionario cuyas claves son las etiquetas y los valores diccionarios con la medida
+         de cada año en el que aparece la etiqueta  -> {str: {int: int | float}}
+    '''
+    if medida not in ('frecuencia', 'suma', 'media'):
+        raise ValueError("medida debe ser 'frecuencia', 'suma' o 'media': {!r}".format(medida))
+    if _usar_numpy(backend):
+        return _backend_numpy().cubo_etiqueta_año(preguntas, medida)
+    if medida == 'frecuencia' and hasattr(preguntas, 'cubo_etiqueta_año'):
+        return preguntas.cubo_etiqueta_año()
+    frecuencias = dict()
+    sumas = dict()
+    for p in preguntas:
+        frecuencias.setdefault(p.etiqueta, Counter())[p.año] += 1
+        if medida != 'frecuencia':
+            sumas.setdefault(p.etiqueta, Counter())[p.año] += p.puntuacion
+    if medida == 'frecuencia':
+        return frecuencias
+    if medida == 'suma':
+        return sumas
+    return {etiqueta: {año: sumas[etiqueta][año] / n for año, n in por_año.items()}
+            for etiqueta, por_año in frecuencias.items()}
+
+
+def calcular_evoluciones(cubo, etiquetas):
+    ''' Calcula la evolución por años de varias etiquetas a partir de un cubo etiqueta-año
+
+    ENTRADA:
+       - cubo: cubo calculado con cubo_etiqueta_año -> {str: {int: int | float}}
+       - etiquetas: lista de etiquetas de las que se quiere la evolución -> [str]
+    SALIDA:
+       - tupla con la lista de años de la colección, ordenados de menor a mayor, y la lista de
+         evoluciones, alineada con las etiquetas  -> ([int], [[int | float]])
+    '''
+    años = sorted({año for por_año in cubo.values() for año in por_año})
+    evoluciones = [[cubo.get(etiqueta, {}).get(año, 0) for año in años] for etiqueta in etiquetas]
+    return años, evoluciones
+
+
+
+################################################################
+#  Backends
+################################################################
+def _usar_numpy(backend):
+    if backend not in ('python', 'numpy'):
+        raise ValueError("backend debe ser 'python' o 'numpy': {!r}".format(backend))
+    return backend == 'numpy'
+
+
+def _backend_numpy():
+    # Importación diferida: NumPy solo es necesario si se usa backend='numpy'
+    import stackoverflow_numpy
+    return stackoverflow_numpy
+
+
+################################################################
+#  Funciones por lotes
+################################################################
+def calcular_etiquetas_por_lotes(lotes):
+    ''' Calcula el conjunto de etiquetas usadas en una secuencia de lotes de preguntas
+
+    ENTRADA:
+       - lotes: iterable de lotes de preguntas, como los que genera iterar_preguntas
+                               -> iter([Pregunta(int, str, int, str)])
+    SALIDA:
+       - conjunto de etiquetas encontradas -> {str}
+    '''
+    etiquetas = set()
+    for lote in lotes:
+        etiquetas.update(calcular_etiquetas(lote))
+    return etiquetas
+
+
+def contar_etiquetas_por_lotes(lotes):
+    ''' Calcula las frecuencias de las etiquetas de una secuencia de lotes de preguntas
+
+    ENTRADA:
+       - lotes: iterable de lotes de preguntas, como los que genera iterar_preguntas
+                               -> iter([Pregunta(int, str, int, str)])
+    SALIDA:
+       - diccionario cuyas claves son las etiquetas y los valores las frecuecias  -> {str: int}
+    '''
+    frecuencias = Counter()
+    for lote in lotes:
+        frecuencias.update(p.etiqueta for p in lote)
+    return dict(frecuencias)
+
+
+def contar_palabras_clave_por_lotes(lotes, stopwords=frozenset()):
+    ''' Calcula las frecuencias de las palabras clave usadas en una secuencia de lotes de preguntas
+
+    ENTRADA:
+       - lotes: iterable de lotes de preguntas, como los que genera iterar_preguntas
+                               -> iter([Pregunta(int, str, int, str)])
+       - stopwords: palabras huecas, consideradas no relevantes como palabras clave
+    SALIDA:
+       - lista de tuplas (termino, frecuencia) ordenada de mayor a menor frecuencia  -> [(str, int)]
+    '''
+    # Counter conserva el orden de primera aparición de cada término, así que los
+    # empates quedan en el mismo orden que en contar_palabras_clave
+    stopwords = frozenset(stopwords)
+    extraer = extractor_palabras_clave()
+    frecuencias = Counter()
+    for lote in lotes:
+        for p in lote:
+            frecuencias.update(extraer(p.titulo, stopwords))
+    return ordenar_frecuencias(frecuencias)
+
+
+def agrupar_preguntas_por_año_por_lotes(lotes):
+    ''' Calcula un diccionario con una lista de preguntas por cada año a partir de una secuencia de lotes
+
+    El resultado contiene todas las preguntas, así que ocupa tanto como la colección completa;
+    lo que se evita es tener a la vez en memoria la lista completa y el diccionario.
+
+    ENTRADA:
+       - lotes: iterable de lotes de preguntas, como los que genera iterar_preguntas
+                               -> iter([Pregunta(int, str, int, str)])
+    SALIDA:
+       - diccionario cuyas claves son los años y los valores la lista de preguntas de cada año
+                               -> {int: [Pregunta(int, str, int, str)]}
+    '''
+    preguntas_por_año = dict()
+    for lote in lotes:
+        for p in lote:
+            preguntas_por_año.setdefault(p.año, []).append(p)
+    return preguntas_por_año
@@ -1,6 +1,27 @@
 # -*- coding: utf-8 -*-
 
+import asyncio
+import os
+import sys
+import tempfile
+
 from stackoverflow_SOLUCION import *
+from stackoverflow_almacen import PreguntasStore, comparar_memoria
+from stackoverflow_vocabulario import VocabularioEtiquetas
+from stackoverflow_normalizacion import (normalizar_titulo, reparar_mojibake, PreguntasNormalizadas,
+                                        contar_palabras_clave_normalizadas)
+from stackoverflow_vistas import PreguntasMaterializadas
+from stackoverflow_coocurrencias import MatrizDocumentoTermino
+from stackoverflow_aproximado import ContadorSpaceSaving, ContadorCountMin, exhaustividad_top_k
+from stackoverflow_paralelo import *
+from stackoverflow_cache import cargar_agregado
+from stackoverflow_indices import PreguntasIndexadas
+from stackoverflow_busqueda import IndiceInvertido, buscar_recorriendo
+from stackoverflow_incremental import AnalizadorIncremental
+from stackoverflow_carga import leer_preguntas_paralelo
+from stackoverflow_informes import generar_informe, preparar_graficas
+from stackoverflow_servicio import ServicioPreguntas, consultar
+from stackoverflow_perfil import perfilando, informe_perfil, reiniciar_perfil
 
 ################################################################
 #  Funciones de test
@@ -14,6 +35,19 @@ def test_filtrar_por_año(preguntas):
     print("   - Número de preguntas en '{}': {}\n".format(año, len(filtrar_por_año(preguntas, año))))
 
 
+def test_preguntas_indexadas(preguntas):
+    print("TEST de 'PreguntasIndexadas'")
+    indexadas = PreguntasIndexadas(preguntas)
+    print("   - filtrar_por_año: {}".format(filtrar_por_año(indexadas, 2015) == filtrar_por_año(preguntas, 2015)))
+    print("   - filtrar_por_etiqueta: {}".format(
+        filtrar_por_etiqueta(indexadas, 'list') == filtrar_por_etiqueta(preguntas, 'list')))
+    print("   - contar_etiquetas: {}".format(contar_etiquetas(indexadas) == contar_etiquetas(preguntas)))
+    print("   - agrupar_preguntas_por_año: {}".format(
+        agrupar_preguntas_por_año(indexadas) == agrupar_preguntas_por_año(preguntas)))
+    seleccion = indexadas.filtrar(año=2012, etiqueta='list', puntuacion_min=20, puntuacion_max=100)
+    print("   - 'list' en 2012 con puntuación entre 20 y 100: {}\n".format(len(seleccion)))
+
+
 def test_calcular_etiquetas(preguntas):
     print("TEST de 'calcular_etiquetas'")
     etiquetas = calcular_etiquetas(preguntas)
@@ -27,6 +61,18 @@ def test_calcular_preguntas_mejor_valoradas(preguntas):
     for p in preguntas_mejor_valoradas:
         print("   [{}] - {}".format(p[1], p[0]))
     print()
+
+
+def test_mejor_valoradas_por_grupo(preguntas):
+    print("TEST de 'mejor_valoradas_por_grupo'")
+    por_año = mejor_valoradas_por_grupo(preguntas, clave='año', limite=3)
+    for año in sorted(por_año):
+        print("   {} -> {}".format(año, por_año[año]))
+    por_etiqueta = mejor_valoradas_por_grupo(preguntas, clave='etiqueta', limite=3)
+    print("   list -> {}".format(por_etiqueta['list']))
+    print("   - Coincide con calcular_preguntas_mejor_valoradas: {}\n".format(
+        por_etiqueta['list'] == calcular_preguntas_mejor_valoradas(
+            [p for p in preguntas if p.etiqueta == 'list'], limite=3)))
     
 
 def test_contar_etiquetas(preguntas):
@@ -44,6 +90,42 @@ def test_mostrar_distribucion_etiquetas(preguntas):
     mostrar_distribucion_etiquetas(preguntas, etiquetas)
     
     
+def test_graficas_en_fichero(preguntas):
+    print("TEST de las gráficas guardadas en fichero")
+    with tempfile.TemporaryDirectory() as directorio:
+        tarta = os.path.join(directorio, 'distribucion.png')
+        evolucion = os.path.join(directorio, 'evolucion.svg')
+        mostrar_distribucion_etiquetas(preguntas, ['list', 'file', 'string'], fichero=tarta)
+        mostrar_evolucion_etiquetas(preguntas, ['list', 'file', 'string'], fichero=evolucion)
+        print("   - PNG: {} bytes, SVG: {} bytes".format(os.path.getsize(tarta), os.path.getsize(evolucion)))
+    print("   - Sin importar pyplot: {}\n".format('matplotlib.pyplot' not in sys.modules))
+
+
+def test_generar_informe(preguntas):
+    print("TEST de 'generar_informe'")
+    especificacion = [{'tipo': 'distribucion', 'etiquetas': ['list', 'file', 'string'], 'titulo': 'Estructuras'},
+                      {'tipo': 'evolucion', 'etiquetas': ['list', 'file', 'string']},
+                      {'tipo': 'evolucion', 'etiquetas': ['django', 'flask'], 'nombre': 'web'}]
+    frecuencias = contar_etiquetas(preguntas)
+    distribucion = preparar_graficas(preguntas, especificacion)[0]
+    print("   - Tamaños de la distribución: {}".format(
+        distribucion['tamaños'] == [frecuencias.get(e, 0) for e in distribucion['etiquetas']]))
+    with tempfile.TemporaryDirectory() as directorio:
+        indice = generar_informe(preguntas, especificacion, directorio, procesos=2)
+        print("   - Ficheros generados: {}".format(sorted(os.listdir(os.path.dirname(indice)))))
+    try:
+        preparar_graficas(preguntas, [{'tipo': 'evolucion', 'etiquetas': ['list'], 'nombre': '../fuera'}])
+        print("   - Nombre con directorios rechazado: False")
+    except ValueError:
+        print("   - Nombre con directorios rechazado: True")
+    try:
+        preparar_graficas(preguntas, [{'tipo': 'evolucion', 'etiquetas': ['list']},
+                                      {'tipo': 'evolucion', 'etiquetas': ['file'], 'nombre': '01_evolucion'}])
+        print("   - Nombre repetido rechazado: False\n")
+    except ValueError:
+        print("   - Nombre repetido rechazado: True\n")
+
+
 def test_calcular_palabras_clave(stopwords):
     print("TEST de 'calcular_palabras_clave'")
     titulo = 'How do I make a menu that does not require the user to press [enter] to make a selection ?'
@@ -51,12 +133,39 @@ def test_calcular_palabras_clave(stopwords):
     print("   - Quitando stopwords: {}\n".format(calcular_palabras_clave(titulo, stopwords)))
 
 
+def test_cache_palabras_clave(preguntas, stopwords):
+    print("TEST de 'configurar_cache_palabras_clave'")
+    sin_cache = contar_palabras_clave(preguntas, stopwords)
+    configurar_cache_palabras_clave(maximo=50000)
+    contar_palabras_clave(preguntas, stopwords)
+    con_cache = contar_palabras_clave(preguntas, stopwords)
+    print("   - Mismo resultado: {}".format(con_cache == sin_cache))
+    print("   - Estadísticas: {}\n".format(estadisticas_cache_palabras_clave()))
+    configurar_cache_palabras_clave(maximo=0)
+
+
 def test_contar_palabras_clave(preguntas, stopwords):
     print("TEST de 'contar_palabras_clave'")
-    print("   (solo las 5000 primeras preguntas para que la prueba sea más rápida)")
-    frecuencias = contar_palabras_clave(preguntas[:5000], stopwords)
+    frecuencias = contar_palabras_clave(preguntas, stopwords)
     print('   - Número de palabras: {}'.format(len(frecuencias)))
-    print("   - Diez primeras: {}\n".format(frecuencias[:10]))
+    print("   - Diez primeras: {}".format(frecuencias[:10]))
+    print("   - Mismas diez primeras con top_n: {}\n".format(
+        contar_palabras_clave(preguntas, stopwords, top_n=10) == frecuencias[:10]))
+
+
+
+def test_indice_invertido(preguntas, stopwords):
+    print("TEST de 'IndiceInvertido'")
+    indice = IndiceInvertido.desde_preguntas(preguntas, stopwords)
+    for orden in ('puntuacion', 'bm25'):
+        print("   - 'django mysql' por {}:".format(orden))
+        for posicion, valor in indice.buscar('django mysql', orden=orden, limite=3):
+            print("      [{:.1f}] {}".format(valor, preguntas[posicion].titulo))
+    for modo in ('and', 'or'):
+        encontradas = sorted(p for p, _ in indice.buscar('list comprehension', modo=modo, limite=None))
+        print("   - Mismo resultado que recorriendo ({}): {}".format(
+            modo, encontradas == buscar_recorriendo(preguntas, 'list comprehension', modo, stopwords)))
+    print()
 
     
 def test_agrupar_preguntas_por_año(preguntas):
@@ -73,23 +182,277 @@ def test_mostrar_evolucion_etiquetas(preguntas):
     mostrar_evolucion_etiquetas(preguntas, etiquetas)
 
 
+def test_cubo_etiqueta_año(fichero, preguntas):
+    print("TEST de 'cubo_etiqueta_año'")
+    cubo = cargar_agregado(fichero, 'cubo_frecuencia', lambda: cubo_etiqueta_año(preguntas))
+    años, evoluciones = calcular_evoluciones(cubo, ['list', 'file', 'string'])
+    print("   - Años: {}".format(años))
+    print("   - Evolución de 'list': {}".format(evoluciones[0]))
+    medias = cubo_etiqueta_año(preguntas, medida='media')
+    print("   - Puntuación media de 'list': {}\n".format(
+        [round(m, 1) for m in calcular_evoluciones(medias, ['list'])[1][0]]))
+
+
+def test_analizador_incremental(preguntas, stopwords):
+    print("TEST de 'AnalizadorIncremental'")
+    analizador = AnalizadorIncremental(stopwords)
+    for inicio in range(0, len(preguntas), 10000):
+        analizador.añadir(preguntas[inicio:inicio + 10000])
+    eliminadas = preguntas[::7]
+    analizador.eliminar(eliminadas)
+    restantes = [p for i, p in enumerate(preguntas) if i % 7]
+    print("   - contar_etiquetas: {}".format(analizador.contar_etiquetas() == contar_etiquetas(restantes)))
+    print("   - contar_palabras_clave: {}".format(
+        analizador.contar_palabras_clave() == contar_palabras_clave(restantes, stopwords)))
+    print("   - agrupar_preguntas_por_año: {}".format(
+        analizador.agrupar_preguntas_por_año() == agrupar_preguntas_por_año(restantes)))
+    print("   - calcular_preguntas_mejor_valoradas: {}".format(
+        analizador.calcular_preguntas_mejor_valoradas() == calcular_preguntas_mejor_valoradas(restantes)))
+    antes = analizador.contar_etiquetas()
+    try:
+        analizador.eliminar([preguntas[1], eliminadas[0]])
+        rechazado = False
+    except ValueError:
+        rechazado = True
+    print("   - Lote no válido rechazado sin cambios: {}".format(
+        rechazado and analizador.contar_etiquetas() == antes))
+    analizador.guardar('analizador.pickle')
+    recuperado = AnalizadorIncremental.cargar('analizador.pickle')
+    print("   - Recuperado del punto de control: {}\n".format(
+        recuperado.contar_etiquetas() == analizador.contar_etiquetas()))
+    os.remove('analizador.pickle')
+
+
+def test_servicio(preguntas, stopwords):
+    print("TEST de 'ServicioPreguntas'")
+
+    async def probar():
+        servicio = ServicioPreguntas(preguntas, stopwords)
+        servidor = await servicio.iniciar(0)
+        puerto = servidor.sockets[0].getsockname()[1]
+        bucle = asyncio.get_running_loop()
+        get = lambda objetivo: bucle.run_in_executor(None, consultar, puerto, objetivo)
+        _, respuesta = await get('/contar_etiquetas')
+        print("   - contar_etiquetas: {}".format(respuesta == contar_etiquetas(preguntas)))
+        _, respuesta = await get('/calcular_preguntas_mejor_valoradas?limite=5')
+        print("   - calcular_preguntas_mejor_valoradas: {}".format(
+            [tuple(r) for r in respuesta] == calcular_preguntas_mejor_valoradas(preguntas, 5)))
+        respuestas = await asyncio.gather(*[get('/contar_palabras_clave?top_n=10') for _ in range(3)])
+        print("   - contar_palabras_clave (3 consultas a la vez): {}".format(
+            all([tuple(r) for r in respuesta] == contar_palabras_clave(preguntas, stopwords, 10)
+                for _, respuesta in respuestas)))
+        print("   - Ruta desconocida: {}".format((await get('/nada'))[0]))
+        servicio.rutas['/fallo'] = (lambda: 1 / 0, {})
+        print("   - Error inesperado: {}".format(await get('/fallo')))
+
+        async def enviar(peticion):
+            lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+            escritor.write(peticion)
+            linea = await lector.readline()
+            escritor.close()
+            return linea.decode('latin-1').strip()
+        print("   - Petición mal formada: {}".format(await enviar(b'BASURA\r\n\r\n')))
+        print("   - Demasiadas cabeceras: {}".format(
+            await enviar(b'GET /contar_etiquetas HTTP/1.1\r\n' + b'X-A: b\r\n' * 200 + b'\r\n')))
+        metricas = (await get('/metricas'))[1]
+        print("   - Métricas: {} {}\n".format(metricas['cache'], metricas['errores']))
+        servidor.close()
+        await servidor.wait_closed()
+    asyncio.run(probar())
+
+
+def test_preguntas_store(fichero):
+    print("TEST de 'PreguntasStore'")
+    almacen = PreguntasStore.desde_fichero(fichero)
+    print("   - Mismas preguntas que leer_preguntas: {}".format(list(almacen) == leer_preguntas(fichero)))
+    print("   - Mismas frecuencias de etiquetas: {}".format(
+        contar_etiquetas(almacen) == contar_etiquetas(leer_preguntas(fichero))))
+    memoria = comparar_memoria(fichero)
+    print("   - Memoria lista: {lista} bytes, columnar: {columnar} bytes ({proporcion:.1f}x)\n".format(**memoria))
+
+
+def test_leer_preguntas_paralelo(fichero):
+    print("TEST de 'leer_preguntas_paralelo'")
+    preguntas = leer_preguntas(fichero, cache=False)
+    for procesos, partes in ((1, 1), (1, 500), (4, None)):
+        print("   - {} proceso(s), {} fragmentos: {}".format(
+            procesos, partes or 'por defecto', leer_preguntas_paralelo(fichero, procesos, partes) == preguntas))
+    print()
+
+
+def test_vocabulario_etiquetas(fichero, preguntas):
+    print("TEST de 'VocabularioEtiquetas'")
+    vocabulario = VocabularioEtiquetas(['list', 'file'])
+    print("   - Códigos: {}".format([vocabulario.codificar(e) for e in ('file', 'string', 'list')]))
+    print("   - Etiqueta del código 2: {}".format(vocabulario.etiqueta(2)))
+    print("   - Objetos str de etiqueta en leer_preguntas: {} (etiquetas: {})".format(
+        len({id(p.etiqueta) for p in preguntas}), len(calcular_etiquetas(preguntas))))
+    almacen = PreguntasStore.desde_fichero(fichero)
+    print("   - PreguntasStore.contar_etiquetas: {}".format(contar_etiquetas(almacen) == contar_etiquetas(preguntas)))
+    print("   - PreguntasStore.filtrar_por_etiqueta: {}\n".format(
+        filtrar_por_etiqueta(almacen, 'django') == filtrar_por_etiqueta(preguntas, 'django')))
+
+
+def test_conteo_aproximado(preguntas, stopwords):
+    print("TEST de los contadores aproximados")
+    exactas = contar_palabras_clave(preguntas, stopwords)
+    for contador in (ContadorSpaceSaving(1000), ContadorCountMin(0.001, 0.01)):
+        aproximadas = contar_palabras_clave(preguntas, stopwords, aproximado=contador)
+        print("   - {}: {} términos guardados, exhaustividad top-10/100/500: {}".format(
+            type(contador).__name__, len(contador),
+            [round(exhaustividad_top_k(exactas, aproximadas, k), 3) for k in (10, 100, 500)]))
+        print("     Primeros 5: {}".format(aproximadas[:5]))
+    combinado = contar_palabras_clave_paralelo(preguntas, stopwords, top_n=100, procesos=2,
+                                               aproximado=ContadorSpaceSaving(1000))
+    print("   - Combinando dos procesos (Space-Saving), exhaustividad top-100: {}".format(
+        exhaustividad_top_k(exactas, combinado, 100)))
+    etiquetas = contar_etiquetas(preguntas, aproximado=ContadorSpaceSaving(100))
+    print("   - contar_etiquetas con capacidad 100, etiqueta más frecuente: {}\n".format(
+        max(etiquetas.items(), key=lambda x: x[1])))
+
+
+def test_coocurrencias(preguntas, stopwords):
+    print("TEST de 'MatrizDocumentoTermino'")
+    matriz = MatrizDocumentoTermino.desde_preguntas(preguntas, stopwords)
+    print("   - Forma: {}, elementos: {}".format(matriz.forma, len(matriz.indices)))
+    print("   - Palabras clave de la primera pregunta: {}".format(matriz.terminos(0)))
+    print("   - Bigramas más frecuentes: {}".format(matriz.bigramas().mas_frecuentes(5)))
+    print("   - Coocurrencias más frecuentes: {}".format(matriz.coocurrencias().mas_frecuentes(5)))
+    print("   - Palabras de la etiqueta 'django': {}".format(matriz.palabras_por_etiqueta().columna('django', 5)))
+    print("   - Evolución de 'pandas': {}".format(matriz.palabras_por_año().fila('pandas')))
+    with tempfile.TemporaryDirectory() as directorio:
+        fichero = os.path.join(directorio, 'matriz.npz')
+        matriz.guardar(fichero)
+        cargada = MatrizDocumentoTermino.cargar(fichero)
+        print("   - Guardada y cargada: {}".format(
+            cargada.vocabulario == matriz.vocabulario and (cargada.indices == matriz.indices).all()))
+        rara = MatrizDocumentoTermino(matriz.indptr, matriz.indices, ['', 'a\nb'] + matriz.vocabulario[2:],
+                                      matriz.años, matriz.codigos_etiqueta, ['c\nd'] + matriz.etiquetas[1:])
+        rara.guardar(fichero)
+        cargada = MatrizDocumentoTermino.cargar(fichero)
+        print("   - Cadenas vacías o con saltos de línea guardadas y cargadas: {}\n".format(
+            cargada.vocabulario == rara.vocabulario and cargada.etiquetas == rara.etiquetas))
+
+
+def test_preguntas_materializadas(preguntas, stopwords):
+    print("TEST de 'PreguntasMaterializadas'")
+    materializadas = PreguntasMaterializadas(list(preguntas), stopwords)
+    print("   - filtrar_por_año devuelve la misma lista: {}".format(
+        filtrar_por_año(materializadas, 2015) == filtrar_por_año(preguntas, 2015) and
+        isinstance(filtrar_por_año(materializadas, 2015), list)))
+    print("   - contar_etiquetas del año 2015: {}".format(
+        contar_etiquetas(filtrar_por_año(materializadas, 2015)) == contar_etiquetas(filtrar_por_año(preguntas, 2015))))
+    print("   - contar_palabras_clave del año 2015: {}".format(
+        contar_palabras_clave(filtrar_por_año(materializadas, 2015), stopwords, 10) ==
+        contar_palabras_clave(filtrar_por_año(preguntas, 2015), stopwords, 10)))
+    print("   - Mejor valoradas de 'django': {}".format(
+        calcular_preguntas_mejor_valoradas(filtrar_por_etiqueta(materializadas, 'django')) ==
+        calcular_preguntas_mejor_valoradas(filtrar_por_etiqueta(preguntas, 'django'))))
+    print("   - Resúmenes materializados: {}".format(sorted(materializadas.materializados())))
+    print("   - Planes: {}".format(dict(materializadas.planes)))
+    nueva = Pregunta(1000, 'How to invalidate a summary?', 2015, 'cache')
+    materializadas.añadir([nueva])
+    print("   - Tras añadir una pregunta: {}".format(
+        contar_etiquetas(filtrar_por_año(materializadas, 2015)) ==
+        contar_etiquetas(filtrar_por_año(preguntas + [nueva], 2015))))
+    materializadas[0] = nueva
+    print("   - Tras sustituir una pregunta: {}".format(
+        contar_etiquetas(materializadas) == contar_etiquetas([nueva] + preguntas[1:] + [nueva])))
+    print("   - Límite negativo: {}\n".format(
+        calcular_preguntas_mejor_valoradas(materializadas, -1) == calcular_preguntas_mejor_valoradas(preguntas, -1)))
+
+
+def test_normalizacion(preguntas, stopwords):
+    print("TEST de la normalización de títulos")
+    for titulo in ('File size differences after copying a file to a server vÃƒÂ\xada FTP',
+                   'WhatÃ¢Â€Â™s the point of inheritance in Python?',
+                   'Running profile startup files in an embedded IPython\tinstance',
+                   'Saving RSA keys to a file  using pycrypto'):
+        print("   - {!r}\n     reparado: {!r}\n     normalizado: {!r}".format(
+            titulo, reparar_mojibake(titulo), normalizar_titulo(titulo)))
+    normalizadas = PreguntasNormalizadas(preguntas)
+    distintos = sum(1 for p, normalizado in zip(preguntas, normalizadas.titulos_normalizados)
+                    if calcular_palabras_clave(p.titulo) != normalizado.split())
+    print("   - Títulos con términos distintos a los de calcular_palabras_clave: {}".format(distintos))
+    print("   - contar_palabras_clave igual con PreguntasNormalizadas: {}".format(
+        contar_palabras_clave(normalizadas, stopwords) == contar_palabras_clave(preguntas, stopwords)))
+    print("   - MatrizDocumentoTermino igual con PreguntasNormalizadas: {}".format(
+        MatrizDocumentoTermino.desde_preguntas(normalizadas, stopwords).vocabulario ==
+        MatrizDocumentoTermino.desde_preguntas(preguntas, stopwords).vocabulario))
+    print("   - MatrizDocumentoTermino con normalizados=True: {}".format(
+        MatrizDocumentoTermino.desde_preguntas(normalizadas, stopwords, normalizados=True).forma))
+    print("   - contar_palabras_clave_normalizadas: {}\n".format(
+        contar_palabras_clave_normalizadas(normalizadas, stopwords, 10)))
+
+
+def test_funciones_por_lotes(fichero, preguntas, stopwords):
+    print("TEST de las funciones por lotes")
+    lotes = lambda: iterar_preguntas(fichero, chunk_size=5000)
+    print("   - calcular_etiquetas: {}".format(
+        calcular_etiquetas_por_lotes(lotes()) == calcular_etiquetas(preguntas)))
+    print("   - contar_etiquetas: {}".format(
+        contar_etiquetas_por_lotes(lotes()) == contar_etiquetas(preguntas)))
+    print("   - agrupar_preguntas_por_año: {}".format(
+        agrupar_preguntas_por_año_por_lotes(lotes()) == agrupar_preguntas_por_año(preguntas)))
+    print("   - contar_palabras_clave: {}\n".format(
+        contar_palabras_clave_por_lotes(lotes(), stopwords) == contar_palabras_clave(preguntas, stopwords)))
+
+
+def test_funciones_paralelas(preguntas, stopwords):
+    print("TEST de las funciones paralelas")
+    print("   - contar_etiquetas: {}".format(
+        contar_etiquetas_paralelo(preguntas, procesos=4) == contar_etiquetas(preguntas)))
+    print("   - contar_palabras_clave: {}".format(
+        contar_palabras_clave_paralelo(preguntas, stopwords, procesos=4) == contar_palabras_clave(preguntas, stopwords)))
+    print("   - agrupar_preguntas_por_año: {}\n".format(
+        agrupar_preguntas_por_año_paralelo(preguntas, procesos=4, tamaño_lote=1000) == agrupar_preguntas_por_año(preguntas)))
+
+
+def test_perfil(fichero, stopwords):
+    print("TEST de la instrumentación")
+    reiniciar_perfil()
+    with perfilando(memoria=True) as registros:
+        preguntas = leer_preguntas(fichero, cache=False)
+        contar_palabras_clave(preguntas, stopwords)
+        contar_etiquetas(preguntas)
+    print("   - Funciones registradas: {}".format(sorted(registros)))
+    print(informe_perfil(), "\n")
+
+
 ################################################################
 #  Programa principal
 ################################################################
 with open('../data/stopwords.txt') as f:
-    stopwords = [p.strip() for p in f]
+    stopwords = frozenset(p.strip() for p in f)
 
 preguntas = leer_preguntas('../data/stackoverflow_python_questions.csv')
 print(len(preguntas), preguntas[:10], "\n")
 
 #test_filtrar_por_año(preguntas)
+#test_preguntas_indexadas(preguntas)
 #test_calcular_etiquetas(preguntas)
 #test_calcular_preguntas_mejor_valoradas(preguntas)
+#test_mejor_valoradas_por_grupo(preguntas)
 #test_contar_etiquetas(preguntas)
 #test_mostrar_distribucion_etiquetas(preguntas)
+#test_graficas_en_fichero(preguntas)
+#test_generar_informe(preguntas)
 #test_calcular_palabras_clave(stopwords)
 #test_contar_palabras_clave(preguntas, stopwords)
+#test_cache_palabras_clave(preguntas, stopwords)
+#test_indice_invertido(preguntas, stopwords)
 #test_agrupar_preguntas_por_año(preguntas)
 #test_mostrar_evolucion_etiquetas(preguntas)
-
-
+#test_cubo_etiqueta_año('../data/stackoverflow_python_questions.csv', preguntas)
+#test_analizador_incremental(preguntas, stopwords)
+#test_servicio(preguntas, stopwords)
+#test_preguntas_store('../data/stackoverflow_python_questions.csv')
+#test_leer_preguntas_paralelo('../data/stackoverflow_python_questions.csv')
+#test_vocabulario_etiquetas('../data/stackoverflow_python_questions.csv', preguntas)
+#test_conteo_aproximado(preguntas, stopwords)
+#test_coocurrencias(preguntas, stopwords)
+#test_preguntas_materializadas(preguntas, stopwords)
+#test_normalizacion(preguntas, stopwords)
+#test_funciones_por_lotes('../data/stackoverflow_python_questions.csv', preguntas, stopwords)
+#test_funciones_paralelas(preguntas, stopwords)
+#test_perfil('../data/stackoverflow_python_questions.csv', stopwords)
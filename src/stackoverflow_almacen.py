@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+''' Almacén columnar de preguntas de stackoverflow
+
+La función leer_preguntas crea una tupla con nombre por cada registro del fichero. Con la
+colección completa de Kaggle (millones de preguntas) cada tupla, sus enteros y su cadena de
+título ocupan varios cientos de bytes. PreguntasStore guarda la misma información por columnas:
+
+    - puntuaciones: array('i') con la puntuación de cada pregunta
+    - años: array('i') con el año de cada pregunta
+    - codigos_etiqueta: array('i') con el código de la etiqueta de cada pregunta en el
+      vocabulario de etiquetas (VocabularioEtiquetas, codificación por diccionario)
+    - títulos: un único buffer contiguo con los títulos codificados en UTF-8, y un array de
+      desplazamientos que marca dónde empieza y acaba cada título
+
+El almacén se puede recorrer como una secuencia de Pregunta, de forma que las funciones de
+stackoverflow_SOLUCION (filtrar_por_año, contar_etiquetas, ...) funcionan sin cambios.
+calcular_etiquetas, contar_etiquetas y filtrar_por_etiqueta delegan en los métodos del mismo
+nombre del almacén, que trabajan con los códigos de etiqueta sin construir las preguntas.
+'''
+
+import csv
+import sys
+from array import array
+from collections import Counter
+
+from stackoverflow_SOLUCION import Pregunta, leer_preguntas
+from stackoverflow_cache import cargar_cache, escribir_columnas, calcular_huella
+from stackoverflow_vocabulario import VocabularioEtiquetas
+
+
+class PreguntasStore:
+    ''' Colección de preguntas almacenada por columnas
+
+    Se comporta como una secuencia de solo lectura de Pregunta(int, str, int, str): admite
+    len(), iteración, acceso por posición y por rebanadas (que devuelven otro PreguntasStore).
+    '''
+
+    def __init__(self):
+        self.puntuaciones = array('i')
+        self.años = array('i')
+        self.codigos_etiqueta = array('i')
+        self.vocabulario = VocabularioEtiquetas()
+        self._titulos = bytearray()
+        self._desplazamientos = array('q', [0])
+
+    @classmethod
+    def desde_preguntas(cls, preguntas):
+        ''' Crea un almacén a partir de una colección de preguntas
+
+        ENTRADA:
+           - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
+        SALIDA:
+           - almacén con las mismas preguntas -> PreguntasStore
+        '''
+        almacen = cls()
+        for p in preguntas:
+            almacen.añadir(*p)
+        return almacen
+
+    @classmethod
+    def desde_fichero(cls, fichero, cache=True):
+        ''' Lee el fichero de registros directamente en columnas, sin crear tuplas con nombre
+
+        Si cache es True y la caché binaria del fichero es válida, las columnas se proyectan
+        en memoria desde ella y el almacén resultante es de solo lectura (no admite añadir).
+
+        ENTRADA:
+           - fichero: nombre del fichero de entrada -> str
+           - cache: si es True se usa la caché binaria del fichero, y se crea si no existe -> bool
+        SALIDA:
+           - almacén con las preguntas del fichero -> PreguntasStore
+        '''
+        almacen = cls()
+        if cache:
+            columnas = cargar_cache(fichero)
+            if columnas is not None:
+                almacen.puntuaciones = columnas.puntuaciones
+                almacen.años = columnas.años
+                almacen.codigos_etiqueta = columnas.codigos_etiqueta
+                almacen.vocabulario = VocabularioEtiquetas(columnas.etiquetas)
+                almacen._titulos = columnas.titulos
+                almacen._desplazamientos = columnas.desplazamientos
+                return almacen
+            # La huella se toma antes de leer (ver stackoverflow_cache.guardar_cache)
+            huella = calcular_huella(fichero)
+        with open(fichero, 'r', encoding='utf-8') as f:
+            lector = csv.reader(f)
+            next(lector)
+            for puntuacion, titulo, año, etiqueta in lector:
+                almacen.añadir(int(puntuacion), titulo, int(año), etiqueta)
+        if cache:
+            escribir_columnas(fichero, {'puntuaciones': almacen.puntuaciones,
+                                        'años': almacen.años,
+                                        'codigos_etiqueta': almacen.codigos_etiqueta,
+                                        'desplazamientos': almacen._desplazamientos,
+                                        'titulos': array('B', almacen._titulos)},
+                              almacen.etiquetas, huella)
+        return almacen
+
+    @property
+    def etiquetas(self):
+        ''' Etiquetas del vocabulario, indexadas por código
+        '''
+        return self.vocabulario.etiquetas
+
+    def añadir(self, puntuacion, titulo, año, etiqueta):
+        ''' Añade una pregunta al final del almacén
+        '''
+        self.puntuaciones.append(puntuacion)
+        self.años.append(año)
+        self.codigos_etiqueta.append(self.vocabulario.codificar(etiqueta))
+        self._titulos += titulo.encode('utf-8')
+        self._desplazamientos.append(len(self._titulos))
+
+    def codigo_etiqueta(self, etiqueta):
+        ''' Devuelve el código de una etiqueta, o None si no aparece en el almacén
+        '''
+        return self.vocabulario.codigo(etiqueta)
+
+    def calcular_etiquetas(self):
+        etiquetas = self.etiquetas
+        return {etiquetas[codigo] for codigo in set(self.codigos_etiqueta)}
+
+    def contar_etiquetas(self):
+        # Counter conserva el orden de primera aparición de los códigos, que es el de las
+        # etiquetas en la colección (también en una rebanada, que comparte el vocabulario)
+        etiquetas = self.etiquetas
+        return {etiquetas[codigo]: n for codigo, n in Counter(self.codigos_etiqueta).items()}
+
+    def filtrar_por_etiqueta(self, etiqueta):
+        codigo = self.vocabulario.codigo(etiqueta)
+        if codigo is None:
+            return []
+        return [self[i] for i, c in enumerate(self.codigos_etiqueta) if c == codigo]
+
+    def titulo(self, i):
+        ''' Devuelve el título de la pregunta que ocupa la posición i
+        '''
+        inicio, fin = self._desplazamientos[i], self._desplazamientos[i + 1]
+        return str(self._titulos[inicio:fin], 'utf-8')
+
+    def __len__(self):
+        return len(self.puntuaciones)
+
+    def __iter__(self):
+        etiquetas = self.etiquetas
+        titulos = memoryview(self._titulos)
+        desplazamientos = self._desplazamientos
+        for i, (puntuacion, año, codigo) in enumerate(zip(self.puntuaciones, self.años,
+                                                          self.codigos_etiqueta)):
+            titulo = str(titulos[desplazamientos[i]:desplazamientos[i + 1]], 'utf-8')
+            yield Pregunta(puntuacion, titulo, año, etiquetas[codigo])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._rebanada(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('índice de pregunta fuera de rango')
+        return Pregunta(self.puntuaciones[i], self.titulo(i), self.años[i],
+                        self.etiquetas[self.codigos_etiqueta[i]])
+
+    def _rebanada(self, rebanada):
+        inicio, fin, paso = rebanada.indices(len(self))
+        if paso != 1:
+            return PreguntasStore.desde_preguntas(self[i] for i in range(inicio, fin, paso))
+        fin = max(inicio, fin)
+        almacen = PreguntasStore()
+        # El vocabulario de etiquetas se copia: los códigos siguen siendo válidos
+        almacen.vocabulario = self.vocabulario.copia()
+        almacen.puntuaciones = self.puntuaciones[inicio:fin]
+        almacen.años = self.años[inicio:fin]
+        almacen.codigos_etiqueta = self.codigos_etiqueta[inicio:fin]
+        base = self._desplazamientos[inicio]
+        almacen._titulos = self._titulos[base:self._desplazamientos[fin]]
+        almacen._desplazamientos = array('q', (d - base for d in self._desplazamientos[inicio:fin + 1]))
+        return almacen
+
+    def memoria(self):
+        ''' Calcula los bytes ocupados por las columnas y el vocabulario de etiquetas
+
+        SALIDA:
+           - número de bytes -> int
+        '''
+        columnas = (self.puntuaciones, self.años, self.codigos_etiqueta,
+                    self._titulos, self._desplazamientos, self.etiquetas, self.vocabulario.codigos)
+        # Las columnas proyectadas desde la caché son memoryview: se cuentan sus datos
+        return (sum(c.nbytes if isinstance(c, memoryview) else sys.getsizeof(c) for c in columnas)
+                + sum(sys.getsizeof(e) for e in self.etiquetas))
+
+
+def memoria_lista_preguntas(preguntas):
+    ''' Calcula los bytes ocupados por una lista de preguntas, incluyendo tuplas y campos
+
+    Cada objeto se cuenta una sola vez, aunque esté compartido por varias preguntas
+    (por ejemplo, los enteros pequeños que Python reutiliza).
+
+    ENTRADA:
+       - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
+    SALIDA:
+       - número de bytes -> int
+    '''
+    vistos = set()
+    total = sys.getsizeof(preguntas)
+    for p in preguntas:
+        for objeto in (p,) + tuple(p):
+            if id(objeto) not in vistos:
+                vistos.add(id(objeto))
+                total += sys.getsizeof(objeto)
+    return total
+
+
+def comparar_memoria(fichero):
+    ''' Compara la memoria de la lista de tuplas con nombre con la del almacén columnar
+
+    ENTRADA:
+       - fichero: nombre del fichero de entrada -> str
+    SALIDA:
+       - diccionario con los bytes de cada representación y la proporción entre ambas
+                               -> {str: int | float}
+    '''
+    preguntas = leer_preguntas(fichero, cache=False)
+    lista = memoria_lista_preguntas(preguntas)
+    del preguntas
+    columnar = PreguntasStore.desde_fichero(fichero, cache=False).memoria()
+    return {'lista': lista, 'columnar': columnar, 'proporcion': lista / columnar}
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+''' Recuentos aproximados de memoria fija para las palabras clave y las etiquetas
+
+Un Counter exacto guarda una entrada por cada término distinto. Con la colección completa de
+Kaggle son cientos de miles de términos, aunque los informes solo consultan los más frecuentes.
+Este módulo ofrece dos contadores aproximados cuya memoria no depende del número de términos:
+
+    - ContadorSpaceSaving: mantiene como máximo 'capacidad' términos con su frecuencia
+      estimada y el error máximo de la estimación. Cada estimación está entre la frecuencia
+      real y la real más total / capacidad, así que todo término con frecuencia mayor que
+      total / capacidad está siempre entre los guardados
+    - ContadorCountMin: Count-Min Sketch (una tabla de 'profundidad' filas por 'anchura'
+      columnas) más una lista de los 'candidatos' términos con mayor estimación. Con
+      anchura = e / epsilon y profundidad = ln(1 / delta), cada estimación supera a la
+      frecuencia real en menos de epsilon * total con probabilidad 1 - delta
+
+Los dos tienen la misma interfaz que Counter para acumular y consultar (update, items), de
+modo que se pueden pasar a contar_palabras_clave y contar_etiquetas con el parámetro
+'aproximado'. Se pueden combinar (combinar) los contadores calculados por separado sobre
+fragmentos de la colección, por ejemplo en varios procesos (stackoverflow_paralelo).
+'''
+
+import heapq
+import math
+from array import array
+from operator import add
+from zlib import crc32
+
+# Semilla del segundo hash de ContadorCountMin
+SEMILLA_HASH = 0x9E3779B9
+
+
+class ContadorSpaceSaving:
+    ''' Contador aproximado Space-Saving de capacidad fija
+    '''
+
+    def __init__(self, capacidad=1000):
+        ''' Crea un contador vacío
+
+        ENTRADA:
+           - capacidad: número máximo de términos guardados -> int
+        '''
+        if capacidad < 1:
+            raise ValueError('La capacidad debe ser al menos 1: {}'.format(capacidad))
+        self.capacidad = capacidad
+        self.total = 0
+        self._cuentas = dict()
+        self._errores = dict()
+        # Términos agrupados por cuenta, en orden de llegada al grupo, para encontrar en
+        # tiempo constante un término de cuenta mínima
+        self._grupos = dict()
+        self._minimo = 0
+
+    def __len__(self):
+        return len(self._cuentas)
+
+    def vacio(self):
+        ''' Devuelve un contador vacío con la misma capacidad
+        '''
+        return ContadorSpaceSaving(self.capacidad)
+
+    def update(self, elementos):
+        ''' Cuenta una aparición de cada elemento recibido
+        '''
+        for elemento in elementos:
+            self._incrementar(elemento, 1)
+
+    def _incrementar(self, elemento, n):
+        cuentas = self._cuentas
+        grupos = self._grupos
+        cuenta = cuentas.get(elemento)
+        if cuenta is None:
+            if len(cuentas) < self.capacidad:
+                cuenta = 0
+            else:
+                # Se sustituye el término más antiguo de cuenta mínima; el nuevo hereda su
+                # cuenta, que pasa a ser el error máximo de su estimación
+                cuenta = self._minimo
+                grupo = grupos[cuenta]
+                victima = next(iter(grupo))
+                del grupo[victima]
+                del cuentas[victima]
+                del self._errores[victima]
+            self._errores[elemento] = cuenta
+        else:
+            grupo = grupos[cuenta]
+            del grupo[elemento]
+        if cuenta in grupos and not grupos[cuenta]:
+            del grupos[cuenta]
+        nueva = cuenta + n
+        cuentas[elemento] = nueva
+        grupo = grupos.get(nueva)
+        if grupo is None:
+            grupo = grupos[nueva] = dict()
+        grupo[elemento] = None
+        self.total += n
+        if len(cuentas) == 1 or nueva < self._minimo:
+            self._minimo = nueva
+        elif self._minimo not in grupos:
+            # Con n == 1 el grupo mínimo solo se vacía al subir su término a la cuenta siguiente
+            self._minimo = nueva if n == 1 else min(grupos)
+
+    def items(self):
+        ''' Devuelve los pares (termino, frecuencia estimada) guardados
+        '''
+        return self._cuentas.items()
+
+    def estimar(self, termino):
+        ''' Devuelve la frecuencia estimada de un término (0 si no está guardado)
+        '''
+        return self._cuentas.get(termino, 0)
+
+    def intervalo(self, termino):
+        ''' Devuelve el intervalo (mínimo, máximo) en que está la frecuencia real de un término
+        '''
+        if termino in self._cuentas:
+            return self._cuentas[termino] - self._errores[termino], self._cuentas[termino]
+        return 0, self._minimo if len(self) == self.capacidad else 0
+
+    def error_maximo(self):
+        ''' Cota del error de cualquier estimación: total / capacidad
+        '''
+        return self.total / self.capacidad
+
+    def mas_frecuentes(self, n=None):
+        ''' Devuelve los n términos con mayor frecuencia estimada, de mayor a menor -> [(str, int)]
+        '''
+        return _ordenar(self._cuentas.items(), n)
+
+    def combinar(self, otro):
+        ''' Añade a este contador los recuentos de otro ContadorSpaceSaving
+
+        Un término que falta en uno de los dos contadores, si este está lleno, puede haber
+        aparecido en él tantas veces como su cuenta mínima: se suma esa cantidad a su
+        estimación y a su error, de modo que se siguen cumpliendo las cotas de Space-Saving.
+        '''
+        if not isinstance(otro, ContadorSpaceSaving):
+            raise TypeError('Solo se puede combinar con otro ContadorSpaceSaving')
+        ausente_propio = self._minimo if len(self) >= self.capacidad else 0
+        ausente_otro = otro._minimo if len(otro) >= otro.capacidad else 0
+        terminos = list(self._cuentas) + [t for t in otro._cuentas if t not in self._cuentas]
+        combinados = [(t, self._cuentas.get(t, ausente_propio) + otro._cuentas.get(t, ausente_otro),
+                       self._errores.get(t, ausente_propio) + otro._errores.get(t, ausente_otro))
+                      for t in terminos]
+        # nlargest es estable: a igual cuenta se conserva el orden de los términos
+        combinados = heapq.nlargest(self.capacidad, combinados, key=lambda x: x[1])
+        total = self.total + otro.total
+        self.__init__(self.capacidad)
+        self.total = total
+        posiciones = {t: i for i, t in enumerate(terminos)}
+        for termino, cuenta, error in sorted(combinados, key=lambda x: posiciones[x[0]]):
+            self._cuentas[termino] = cuenta
+            self._errores[termino] = error
+            self._grupos.setdefault(cuenta, dict())[termino] = None
+        self._minimo = min(self._grupos) if self._grupos else 0
+        return self
+
+
+class ContadorCountMin:
+    ''' Count-Min Sketch con seguimiento de los términos más frecuentes
+    '''
+
+    def __init__(self, epsilon=0.001, delta=0.01, candidatos=1000):
+        ''' Crea un contador vacío
+
+        ENTRADA:
+           - epsilon: error máximo de las estimaciones, como fracción del total -> float
+           - delta: probabilidad de superar ese error -> float
+           - candidatos: número de términos con mayor estimación que se guardan -> int
+        '''
+        if not 0 < epsilon < 1 or not 0 < delta < 1:
+            raise ValueError('epsilon y delta deben estar entre 0 y 1: {}, {}'.format(epsilon, delta))
+        if candidatos < 1:
+            raise ValueError('El número de candidatos debe ser al menos 1: {}'.format(candidatos))
+        self.epsilon = epsilon
+        self.delta = delta
+        self.anchura = math.ceil(math.e / epsilon)
+        self.profundidad = math.ceil(math.log(1 / delta))
+        self.candidatos = candidatos
+        self.total = 0
+        self._tabla = [array('q', bytes(8 * self.anchura)) for _ in range(self.profundidad)]
+        self._candidatos = dict()
+        # Montículo (estimación, término) de los candidatos. Las estimaciones solo crecen, así
+        # que una entrada desfasada se corrige al llegar a la cima
+        self._monticulo = []
+
+    def __len__(self):
+        return len(self._candidatos)
+
+    def vacio(self):
+        ''' Devuelve un contador vacío con la misma configuración
+        '''
+        return ContadorCountMin(self.epsilon, self.delta, self.candidatos)
+
+    def _columnas(self, termino):
+        # Hash determinista (no depende de PYTHONHASHSEED), para poder combinar contadores de
+        # procesos distintos. La fila i usa la columna (h1 + i * h2) % anchura
+        datos = termino.encode('utf-8')
+        h1, h2 = crc32(datos), crc32(datos, SEMILLA_HASH) | 1
+        return [(h1 + i * h2) % self.anchura for i in range(self.profundidad)]
+
+    def update(self, elementos):
+        ''' Cuenta una aparición de cada elemento recibido
+        '''
+        tabla = self._tabla
+        anchura = self.anchura
+        considerar = self._considerar
+        n = 0
+        # Mismo cálculo de columnas que _columnas, sin crear una lista por elemento
+        for elemento in elementos:
+            datos = elemento.encode('utf-8')
+            h1, h2 = crc32(datos), crc32(datos, SEMILLA_HASH) | 1
+            estimacion = None
+            for fila in tabla:
+                columna = h1 % anchura
+                valor = fila[columna] = fila[columna] + 1
+                if estimacion is None or valor < estimacion:
+                    estimacion = valor
+                h1 += h2
+            n += 1
+            considerar(elemento, estimacion)
+        self.total += n
+
+    def _considerar(self, termino, estimacion):
+        candidatos = self._candidatos
+        if termino in candidatos:
+            candidatos[termino] = estimacion
+            return
+        if len(candidatos) < self.candidatos:
+            candidatos[termino] = estimacion
+            heapq.heappush(self._monticulo, (estimacion, termino))
+            return
+        monticulo = self._monticulo
+        while monticulo[0][0] != candidatos[monticulo[0][1]]:
+            heapq.heapreplace(monticulo, (candidatos[monticulo[0][1]], monticulo[0][1]))
+        if estimacion > monticulo[0][0]:
+            del candidatos[heapq.heapreplace(monticulo, (estimacion, termino))[1]]
+            candidatos[termino] = estimacion
+
+    def estimar(self, termino):
+        ''' Devuelve la frecuencia estimada de un término (nunca menor que la real)
+        '''
+        return min(fila[columna] for fila, columna in zip(self._tabla, self._columnas(termino)))
+
+    def items(self):
+        ''' Devuelve los pares (termino, frecuencia estimada) de los candidatos
+        '''
+        return [(termino, self.estimar(termino)) for termino in self._candidatos]
+
+    def error_maximo(self):
+        ''' Cota del error de las estimaciones (con probabilidad 1 - delta): epsilon * total
+        '''
+        return self.epsilon * self.total
+
+    def mas_frecuentes(self, n=None):
+        ''' Devuelve los n términos con mayor frecuencia estimada, de mayor a menor -> [(str, int)]
+        '''
+        return _ordenar(self.items(), n)
+
+    def combinar(self, otro):
+        ''' Añade a este contador los recuentos de otro ContadorCountMin con la misma configuración
+        '''
+        if not isinstance(otro, ContadorCountMin) or (self.anchura, self.profundidad) != (otro.anchura, otro.profundidad):
+            raise ValueError('Solo se puede combinar con un ContadorCountMin de la misma anchura y profundidad')
+        self._tabla = [array('q', map(add, a, b)) for a, b in zip(self._tabla, otro._tabla)]
+        self.total += otro.total
+        terminos = list(self._candidatos) + [t for t in otro._candidatos if t not in self._candidatos]
+        estimaciones = [(t, self.estimar(t)) for t in terminos]
+        elegidos = {t for t, _ in heapq.nlargest(self.candidatos, estimaciones, key=lambda x: x[1])}
+        self._candidatos = {t: e for t, e in estimaciones if t in elegidos}
+        self._monticulo = [(e, t) for t, e in self._candidatos.items()]
+        heapq.heapify(self._monticulo)
+        return self
+
+
+def _ordenar(frecuencias, n):
+    frecuencias = list(frecuencias)
+    if n is not None:
+        return heapq.nlargest(n, frecuencias, key=lambda x: x[1])
+    return sorted(frecuencias, key=lambda x: x[1], reverse=True)
+
+
+def exhaustividad_top_k(exactas, aproximadas, k):
+    ''' Calcula qué fracción de los k términos más frecuentes reales recupera un recuento aproximado
+
+    Los empates en la posición k se tienen en cuenta: cualquier término con la misma frecuencia
+    real que el k-ésimo cuenta como acierto.
+
+    ENTRADA:
+       - exactas: frecuencias exactas -> {str: int} | [(str, int)]
+       - aproximadas: frecuencias estimadas -> {str: int} | [(str, int)]
+       - k: número de términos más frecuentes que se comparan -> int
+    SALIDA:
+       - fracción de aciertos entre los k términos más frecuentes estimados, entre 0 y 1 -> float
+    '''
+    exactas = _ordenar(exactas.items() if hasattr(exactas, 'items') else exactas, None)
+    aproximadas = _ordenar(aproximadas.items() if hasattr(aproximadas, 'items') else aproximadas, k)
+    k = min(k, len(exactas))
+    if k == 0:
+        return 1.0
+    corte = exactas[k - 1][1]
+    validos = {termino for termino, frecuencia in exactas if frecuencia >= corte}
+    return sum(1 for termino, _ in aproximadas if termino in validos) / k
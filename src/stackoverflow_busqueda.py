@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+''' Índice invertido sobre los títulos de las preguntas
+
+IndiceInvertido asocia cada palabra clave (obtenida con calcular_palabras_clave, con la misma
+normalización y stopwords que el resto de informes) a la lista de posiciones de las preguntas
+en cuyo título aparece. Cada lista se guarda comprimida: posiciones en orden creciente,
+codificadas como diferencias con la anterior en enteros de longitud variable (varint), seguidas
+del número de apariciones del término en el título.
+
+Las consultas combinan varios términos con AND u OR y ordenan los resultados por puntuación de
+la pregunta o por relevancia BM25. El índice se puede guardar en disco y volver a cargar.
+
+FORMATO DEL FICHERO:
+--------------------
+    - 8 bytes: identificador y versión del formato (MAGIA)
+    - 4 bytes: longitud de la cabecera (entero sin signo, little-endian)
+    - cabecera JSON con el número de preguntas, las stopwords, el orden de bytes con que se
+      escribieron los arrays y, para cada término, la posición y longitud de su lista y el
+      número de preguntas en que aparece
+    - listas de apariciones concatenadas
+    - longitudes de los títulos (array('i')) y puntuaciones de las preguntas (array('i')), en
+      el orden de bytes de la máquina que los escribió; al cargarlos en una máquina con el
+      orden contrario se invierten
+'''
+
+import heapq
+import json
+import math
+import struct
+import sys
+from array import array
+from collections import Counter
+
+from stackoverflow_SOLUCION import calcular_palabras_clave, extractor_palabras_clave
+
+MAGIA = b'SOINDIC1'
+
+
+def _codificar_varint(numero, destino):
+    while numero >= 0x80:
+        destino.append((numero & 0x7F) | 0x80)
+        numero >>= 7
+    destino.append(numero)
+
+
+def _decodificar_lista(datos):
+    ''' Decodifica una lista de apariciones en una lista de pares (posicion, frecuencia)
+    '''
+    pares = []
+    numeros = []
+    numero = desplazamiento = 0
+    for byte in datos:
+        numero |= (byte & 0x7F) << desplazamiento
+        if byte & 0x80:
+            desplazamiento += 7
+        else:
+            numeros.append(numero)
+            numero = desplazamiento = 0
+    posicion = 0
+    for diferencia, frecuencia in zip(numeros[::2], numeros[1::2]):
+        posicion += diferencia
+        pares.append((posicion, frecuencia))
+    return pares
+
+
+class IndiceInvertido:
+    ''' Índice invertido de los títulos de una colección de preguntas
+
+    Los resultados de las búsquedas son posiciones en la colección a partir de la que se
+    construyó el índice.
+    '''
+
+    # Parámetros habituales de BM25
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, stopwords=frozenset()):
+        self.stopwords = frozenset(stopwords)
+        self.listas = dict()
+        self.documentos = dict()
+        self.longitudes = array('i')
+        self.puntuaciones = array('i')
+
+    @classmethod
+    def desde_preguntas(cls, preguntas, stopwords=frozenset()):
+        ''' Construye el índice de una colección de preguntas
+
+        ENTRADA:
+           - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
+           - stopwords: palabras huecas, que no se indexan
+        SALIDA:
+           - índice invertido de los títulos -> IndiceInvertido
+        '''
+        indice = cls(stopwords)
+        listas = dict()
+        ultimas = dict()
+        extraer = extractor_palabras_clave()
+        for posicion, p in enumerate(preguntas):
+            terminos = extraer(p.titulo, indice.stopwords)
+            indice.longitudes.append(len(terminos))
+            indice.puntuaciones.append(p.puntuacion)
+            for termino, frecuencia in Counter(terminos).items():
+                lista = listas.get(termino)
+                if lista is None:
+                    lista = listas[termino] = bytearray()
+                _codificar_varint(posicion - ultimas.get(termino, 0), lista)
+                _codificar_varint(frecuencia, lista)
+                ultimas[termino] = posicion
+                indice.documentos[termino] = indice.documentos.get(termino, 0) + 1
+        indice.listas = {termino: bytes(lista) for termino, lista in listas.items()}
+        return indice
+
+    def __len__(self):
+        return len(self.puntuaciones)
+
+    def apariciones(self, termino):
+        ''' Devuelve los pares (posicion, frecuencia) de un término, ordenados por posición
+        '''
+        return _decodificar_lista(self.listas.get(termino, b''))
+
+    def buscar(self, consulta, modo='and', orden='puntuacion', limite=10):
+        ''' Busca las preguntas cuyo título contiene los términos de una consulta
+
+        ENTRADA:
+           - consulta: texto de la consulta; se normaliza igual que los títulos -> str
+           - modo: 'and' (todos los términos) u 'or' (alguno de los términos) -> str
+           - orden: 'puntuacion' (de la pregunta) o 'bm25' (relevancia del título) -> str
+           - limite: número máximo de resultados; None para devolverlos todos -> int
+        SALIDA:
+           - lista de tuplas (posicion, valor) ordenada de mayor a menor valor, donde valor es
+             la puntuación de la pregunta o su relevancia BM25  -> [(int, int | float)]
+        '''
+        if modo not in ('and', 'or'):
+            raise ValueError("modo debe ser 'and' u 'or': {!r}".format(modo))
+        if orden not in ('puntuacion', 'bm25'):
+            raise ValueError("orden debe ser 'puntuacion' o 'bm25': {!r}".format(orden))
+        terminos = list(dict.fromkeys(calcular_palabras_clave(consulta, self.stopwords)))
+        if not terminos or not len(self):
+            # Sin términos o sin preguntas no hay resultados (ni longitud media para BM25)
+            return []
+        listas = {t: dict(self.apariciones(t)) for t in terminos}
+        if modo == 'and':
+            # Se parte de la lista más corta y se comprueba la pertenencia a las demás
+            posiciones = set(min(listas.values(), key=len))
+            for lista in listas.values():
+                posiciones.intersection_update(lista)
+        else:
+            posiciones = set()
+            for lista in listas.values():
+                posiciones.update(lista)
+
+        if orden == 'puntuacion':
+            puntuaciones = self.puntuaciones
+            valores = ((p, puntuaciones[p]) for p in posiciones)
+        else:
+            media = sum(self.longitudes) / len(self)
+            valores = ((p, self._bm25(p, listas, media)) for p in posiciones)
+        # A igual valor, primero la pregunta que aparece antes en la colección
+        clave = lambda x: (-x[1], x[0])
+        if limite is None:
+            return sorted(valores, key=clave)
+        return heapq.nsmallest(limite, valores, key=clave)
+
+    def _bm25(self, posicion, listas, media):
+        n = len(self)
+        longitud = self.longitudes[posicion]
+        total = 0.0
+        for termino, lista in listas.items():
+            frecuencia = lista.get(posicion)
+            if frecuencia is None:
+                continue
+            documentos = self.documentos[termino]
+            idf = math.log(1 + (n - documentos + 0.5) / (documentos + 0.5))
+            total += idf * frecuencia * (self.K1 + 1) / (
+                frecuencia + self.K1 * (1 - self.B + self.B * longitud / media))
+        return total
+
+    def guardar(self, fichero):
+        ''' Guarda el índice en un fichero binario
+
+        ENTRADA:
+           - fichero: nombre del fichero de destino -> str
+        '''
+        terminos = dict()
+        desplazamiento = 0
+        for termino, lista in self.listas.items():
+            terminos[termino] = [desplazamiento, len(lista), self.documentos[termino]]
+            desplazamiento += len(lista)
+        cabecera = json.dumps({'preguntas': len(self), 'stopwords': sorted(self.stopwords),
+                               'orden_bytes': sys.byteorder, 'terminos': terminos}).encode('utf-8')
+        with open(fichero, 'wb') as f:
+            f.write(MAGIA)
+            f.write(struct.pack('<I', len(cabecera)))
+            f.write(cabecera)
+            for lista in self.listas.values():
+                f.write(lista)
+            self.longitudes.tofile(f)
+            self.puntuaciones.tofile(f)
+
+    @classmethod
+    def cargar(cls, fichero):
+        ''' Carga un índice guardado con guardar
+
+        ENTRADA:
+           - fichero: nombre del fichero -> str
+        SALIDA:
+           - índice invertido -> IndiceInvertido
+        '''
+        with open(fichero, 'rb') as f:
+            if f.read(len(MAGIA)) != MAGIA:
+                raise ValueError('{} no es un fichero de índice invertido'.format(fichero))
+            longitud, = struct.unpack('<I', f.read(4))
+            cabecera = json.loads(f.read(longitud))
+            datos = f.read(sum(l for _, l, _ in cabecera['terminos'].values()))
+            indice = cls(cabecera['stopwords'])
+            indice.listas = {t: datos[d:d + l] for t, (d, l, _) in cabecera['terminos'].items()}
+            indice.documentos = {t: n for t, (_, _, n) in cabecera['terminos'].items()}
+            indice.longitudes.fromfile(f, cabecera['preguntas'])
+            indice.puntuaciones.fromfile(f, cabecera['preguntas'])
+        if cabecera.get('orden_bytes', sys.byteorder) != sys.byteorder:
+            indice.longitudes.byteswap()
+            indice.puntuaciones.byteswap()
+        return indice
+
+
+def buscar_recorriendo(preguntas, consulta, modo='and', stopwords=frozenset()):
+    ''' Busca las preguntas cuyo título contiene los términos de una consulta, sin índice
+
+    Recorre todos los títulos; sirve como referencia para comprobar y medir IndiceInvertido.
+
+    ENTRADA:
+       - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
+       - consulta: texto de la consulta -> str
+       - modo: 'and' (todos los términos) u 'or' (alguno de los términos) -> str
+       - stopwords: palabras huecas, que no se tienen en cuenta
+    SALIDA:
+       - posiciones de las preguntas encontradas, de menor a mayor -> [int]
+    '''
+    stopwords = frozenset(stopwords)
+    terminos = set(calcular_palabras_clave(consulta, stopwords))
+    if not terminos:
+        return []
+    combinar = terminos.issubset if modo == 'and' else terminos.intersection
+    extraer = extractor_palabras_clave()
+    return [i for i, p in enumerate(preguntas)
+            if combinar(extraer(p.titulo, stopwords))]
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+''' Caché binaria en disco de las preguntas leídas de un fichero CSV
+
+La primera vez que se lee un fichero se guarda a su lado un fichero '<fichero>.cache' con las
+preguntas por columnas. Las lecturas siguientes proyectan ese fichero en memoria (mmap) y
+obtienen las columnas sin analizar el CSV ni convertir cadenas a enteros.
+
+FORMATO DEL FICHERO DE CACHÉ:
+-----------------------------
+    - 8 bytes: identificador y versión del formato (MAGIA)
+    - 4 bytes: longitud de la cabecera (entero sin signo, little-endian)
+    - cabecera JSON con la huella del CSV de origen, el vocabulario de etiquetas y la posición,
+      longitud y tipo de cada columna
+    - columnas en formato binario nativo, cada una alineada a 8 bytes
+
+La caché deja de ser válida cuando cambia el tamaño, la fecha de modificación o el contenido
+(resumen SHA-1) del fichero de origen. Si solo cambia la fecha de modificación se recalcula el
+resumen, y si coincide la caché se sigue usando y se guarda en ella la nueva fecha, para no
+tener que volver a calcular el resumen en las lecturas siguientes.
+
+Los agregados calculados a partir de un fichero (por ejemplo, el cubo etiqueta-año) también se
+pueden guardar a su lado con cargar_agregado, con la misma regla de invalidación.
+'''
+
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+MAGIA = b'SOCACHE1'
+EXTENSION = '.cache'
+ALINEAMIENTO = 8
+
+Columnas = namedtuple('Columnas', 'puntuaciones, años, codigos_etiqueta, etiquetas, titulos, desplazamientos')
+
+
+def fichero_cache(fichero):
+    ''' Devuelve el nombre del fichero de caché asociado a un fichero de preguntas
+    '''
+    return fichero + EXTENSION
+
+
+def calcular_huella(fichero, con_resumen=True):
+    ''' Calcula la huella de un fichero: tamaño, fecha de modificación y resumen SHA-1
+
+    ENTRADA:
+       - fichero: nombre del fichero -> str
+       - con_resumen: si es False no se lee el fichero y el resumen queda a None -> bool
+    SALIDA:
+       - diccionario con las claves 'tamaño', 'mtime_ns' y 'sha1' -> {str: int | str}
+    '''
+    estado = os.stat(fichero)
+    huella = {'tamaño': estado.st_size, 'mtime_ns': estado.st_mtime_ns, 'sha1': None}
+    if con_resumen:
+        resumen = hashlib.sha1()
+        with open(fichero, 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 20), b''):
+                resumen.update(bloque)
+        huella['sha1'] = resumen.hexdigest()
+    return huella
+
+
+def huella_valida(fichero, huella, verificar_resumen=False):
+    ''' Comprueba si una huella guardada corresponde al estado actual de un fichero
+
+    Si solo ha cambiado la fecha de modificación y el resumen SHA-1 coincide, la huella se
+    actualiza con la nueva fecha (y el llamador debería volver a guardarla).
+
+    ENTRADA:
+       - fichero: nombre del fichero -> str
+       - huella: huella guardada, como la que devuelve calcular_huella -> {str: int | str}
+       - verificar_resumen: si es True se compara siempre el resumen SHA-1 -> bool
+    SALIDA:
+       - True si la huella sigue siendo válida -> bool
+    '''
+    actual = calcular_huella(fichero, con_resumen=False)
+    if actual['tamaño'] != huella['tamaño']:
+        return False
+    if actual['mtime_ns'] == huella['mtime_ns'] and not verificar_resumen:
+        return True
+    if calcular_huella(fichero)['sha1'] != huella['sha1']:
+        return False
+    huella['mtime_ns'] = actual['mtime_ns']
+    return True
+
+
+def guardar_cache(fichero, preguntas, huella):
+    ''' Guarda las preguntas leídas de un fichero en su fichero de caché
+
+    Si no se puede escribir el fichero de caché (por ejemplo, en un directorio de solo
+    lectura) no se hace nada.
+
+    ENTRADA:
+       - fichero: nombre del fichero de preguntas de origen -> str
+       - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
+       - huella: huella del fichero tomada con calcular_huella ANTES de leerlo; si el fichero
+                 cambia mientras se lee, la caché quedará invalidada en la siguiente lectura
+                 -> {str: int | str}
+    '''
+    codigos = dict()
+    columnas = {'puntuaciones': array('i'), 'años': array('i'), 'codigos_etiqueta': array('i'),
+                'desplazamientos': array('q', [0])}
+    titulos = bytearray()
+    for p in preguntas:
+        columnas['puntuaciones'].append(p.puntuacion)
+        columnas['años'].append(p.año)
+        columnas['codigos_etiqueta'].append(codigos.setdefault(p.etiqueta, len(codigos)))
+        titulos += p.titulo.encode('utf-8')
+        columnas['desplazamientos'].append(len(titulos))
+    columnas['titulos'] = array('B', titulos)
+    escribir_columnas(fichero, columnas, list(codigos), huella)
+
+
+def escribir_columnas(fichero, columnas, etiquetas, huella):
+    ''' Escribe en el fichero de caché unas columnas ya construidas
+
+    ENTRADA:
+       - fichero: nombre del fichero de preguntas de origen -> str
+       - columnas: diccionario con los arrays 'puntuaciones', 'años', 'codigos_etiqueta',
+                   'titulos' y 'desplazamientos' -> {str: array}
+       - etiquetas: vocabulario de etiquetas, indexado por código -> [str]
+       - huella: huella del fichero tomada antes de leerlo (ver guardar_cache) -> {str: int | str}
+    '''
+    cabecera = {'huella': huella, 'orden_bytes': sys.byteorder,
+                'etiquetas': etiquetas, 'columnas': dict()}
+    # Las posiciones de las columnas dependen de la longitud de la cabecera, que a su vez
+    # las contiene: se reserva espacio de sobra y se rellena con espacios
+    desplazamiento = 0
+    for nombre, columna in columnas.items():
+        longitud = len(columna) * columna.itemsize
+        cabecera['columnas'][nombre] = [desplazamiento, longitud, columna.typecode]
+        desplazamiento += -(-longitud // ALINEAMIENTO) * ALINEAMIENTO
+    texto = json.dumps(cabecera).encode('utf-8')
+    inicio_datos = -(-(len(MAGIA) + 4 + len(texto) + 64) // ALINEAMIENTO) * ALINEAMIENTO
+    for posicion in cabecera['columnas'].values():
+        posicion[0] += inicio_datos
+    texto = json.dumps(cabecera).encode('utf-8')
+    texto += b' ' * (inicio_datos - len(MAGIA) - 4 - len(texto))
+
+    destino = fichero_cache(fichero)
+    temporal = destino + '.tmp'
+    try:
+        with open(temporal, 'wb') as f:
+            f.write(MAGIA)
+            f.write(struct.pack('<I', len(texto)))
+            f.write(texto)
+            for nombre, columna in columnas.items():
+                f.seek(cabecera['columnas'][nombre][0])
+                columna.tofile(f)
+        os.replace(temporal, destino)
+    except OSError:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def cargar_cache(fichero, verificar_resumen=False):
+    ''' Carga las columnas de un fichero de preguntas desde su fichero de caché
+
+    Las columnas numéricas se devuelven como memoryview sobre el fichero proyectado en
+    memoria, por lo que la carga no copia ni convierte los datos.
+
+    ENTRADA:
+       - fichero: nombre del fichero de preguntas de origen -> str
+       - verificar_resumen: si es True se compara siempre el resumen SHA-1 del origen -> bool
+    SALIDA:
+       - columnas de las preguntas, o None si no hay caché o ya no es válida -> Columnas
+    '''
+    try:
+        with open(fichero_cache(fichero), 'rb') as f:
+            if f.read(len(MAGIA)) != MAGIA:
+                return None
+            longitud, = struct.unpack('<I', f.read(4))
+            cabecera = json.loads(f.read(longitud))
+            if cabecera['orden_bytes'] != sys.byteorder:
+                return None
+            mtime_ns = cabecera['huella']['mtime_ns']
+            if not huella_valida(fichero, cabecera['huella'], verificar_resumen):
+                return None
+            proyeccion = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, KeyError):
+        return None
+    if cabecera['huella']['mtime_ns'] != mtime_ns:
+        _reescribir_cabecera(fichero_cache(fichero), cabecera, longitud)
+    datos = memoryview(proyeccion)
+    columnas = dict()
+    for nombre, (desplazamiento, longitud, tipo) in cabecera['columnas'].items():
+        columnas[nombre] = datos[desplazamiento:desplazamiento + longitud].cast(tipo)
+    return Columnas(columnas['puntuaciones'], columnas['años'], columnas['codigos_etiqueta'],
+                    cabecera['etiquetas'], columnas['titulos'], columnas['desplazamientos'])
+
+
+def _reescribir_cabecera(destino, cabecera, longitud):
+    # La cabecera se reescribe en su sitio, rellenada con espacios hasta la misma longitud,
+    # para que no cambien las posiciones de las columnas
+    texto = json.dumps(cabecera).encode('utf-8')
+    if len(texto) > longitud:
+        return
+    try:
+        with open(destino, 'r+b') as f:
+            f.seek(len(MAGIA) + 4)
+            f.write(texto + b' ' * (longitud - len(texto)))
+    except OSError:
+        pass
+
+
+def borrar_cache(fichero):
+    ''' Borra el fichero de caché asociado a un fichero de preguntas, si existe
+    '''
+    try:
+        os.remove(fichero_cache(fichero))
+    except FileNotFoundError:
+        pass
+
+
+def cargar_agregado(fichero, nombre, calcular):
+    ''' Devuelve un agregado de un fichero de preguntas, guardado en disco junto al fichero
+
+    Si existe '<fichero>.<nombre>.cache' y la huella del fichero no ha cambiado, se devuelve
+    el valor guardado. Si no, se calcula, se guarda y se devuelve.
+
+    ENTRADA:
+       - fichero: nombre del fichero de preguntas de origen -> str
+       - nombre: nombre del agregado, que forma parte del nombre del fichero de caché -> str
+       - calcular: función sin parámetros que calcula el agregado
+    SALIDA:
+       - valor del agregado
+    '''
+    destino = '{}.{}{}'.format(fichero, nombre, EXTENSION)
+    try:
+        with open(destino, 'rb') as f:
+            huella, valor = pickle.load(f)
+        mtime_ns = huella['mtime_ns']
+        if huella_valida(fichero, huella):
+            if huella['mtime_ns'] != mtime_ns:
+                _guardar_agregado(destino, huella, valor)
+            return valor
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        pass
+    # La huella se toma antes de calcular: si el fichero cambia mientras tanto, la caché
+    # quedará invalidada en la siguiente lectura
+    huella = calcular_huella(fichero)
+    valor = calcular()
+    _guardar_agregado(destino, huella, valor)
+    return valor
+
+
+def _guardar_agregado(destino, huella, valor):
+    temporal = destino + '.tmp'
+    try:
+        with open(temporal, 'wb') as f:
+            pickle.dump((huella, valor), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, destino)
+    except OSError:
+        if os.path.exists(temporal):
+            os.remove(temporal)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+''' Lectura en paralelo del fichero CSV de preguntas
+
+leer_preguntas_paralelo proyecta el fichero en memoria (mmap), lo divide en fragmentos de
+bytes que terminan en un final de registro y analiza cada fragmento en un proceso distinto.
+Cada proceso devuelve las columnas de su fragmento y el proceso principal las concatena en
+orden, así que el resultado es idéntico al de leer_preguntas:
+
+    - los fragmentos se cortan después de un '\n' que no está dentro de un título entre
+      comillas. Para saberlo se cuentan las comillas desde el principio del fichero: fuera de
+      un campo entre comillas su número es par, porque las comillas de dentro de un campo van
+      duplicadas (formato CSV habitual, el que escribe el módulo csv)
+    - cada fragmento se decodifica como el fichero completo en leer_preguntas: UTF-8 y saltos
+      de línea universales ('\r\n' pasa a ser '\n', también dentro de los títulos). Como un
+      corte nunca cae en medio de un carácter, los títulos con caracteres mal codificados
+      (por ejemplo 'vÃƒÂ­a FTP') se leen igual que en la lectura secuencial
+'''
+
+import csv
+import io
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from stackoverflow_SOLUCION import Pregunta
+from stackoverflow_vocabulario import VocabularioEtiquetas
+
+
+def calcular_fragmentos(fichero, partes):
+    ''' Divide un fichero CSV en fragmentos de bytes que empiezan y terminan en un registro
+
+    ENTRADA:
+       - fichero: nombre del fichero CSV -> str
+       - partes: número de fragmentos deseado; puede haber menos si el fichero es pequeño -> int
+    SALIDA:
+       - lista de tuplas (inicio, fin) con las posiciones en bytes de cada fragmento -> [(int, int)]
+    '''
+    with open(fichero, 'rb') as f:
+        tamaño = os.fstat(f.fileno()).st_size
+        if tamaño == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+            fronteras = [0]
+            comillas = contadas = 0
+            for k in range(1, partes):
+                posicion = max(tamaño * k // partes, fronteras[-1])
+                while True:
+                    fin = datos.find(b'\n', posicion)
+                    if fin < 0:
+                        break
+                    comillas += datos[contadas:fin].count(b'"')
+                    contadas = fin
+                    if comillas % 2 == 0:
+                        break
+                    posicion = fin + 1
+                if fin < 0 or fin + 1 == tamaño:
+                    break
+                fronteras.append(fin + 1)
+    fronteras.append(tamaño)
+    return list(zip(fronteras, fronteras[1:]))
+
+
+def _analizar_fragmento(fichero, inicio, fin, cabecera):
+    ''' Analiza un fragmento del fichero y devuelve sus columnas (puntuaciones, titulos, años, etiquetas)
+    '''
+    with open(fichero, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+            texto = io.TextIOWrapper(io.BytesIO(datos[inicio:fin]), encoding='utf-8')
+    lector = csv.reader(texto)
+    if cabecera:
+        next(lector, None)
+    puntuaciones, titulos, años, etiquetas = [], [], [], []
+    for puntuacion, titulo, año, etiqueta in lector:
+        puntuaciones.append(int(puntuacion))
+        titulos.append(titulo)
+        años.append(int(año))
+        etiquetas.append(etiqueta)
+    return puntuaciones, titulos, años, etiquetas
+
+
+def leer_preguntas_paralelo(fichero, procesos=None, partes=None):
+    ''' Lee el fichero de registros analizando fragmentos en varios procesos
+
+    ENTRADA:
+       - fichero: nombre del fichero de entrada -> str
+       - procesos: número de procesos; por defecto, el número de procesadores. Con un solo
+                   proceso los fragmentos se analizan en el proceso actual -> int
+       - partes: número de fragmentos; por defecto, cuatro por proceso -> int
+    SALIDA:
+       - lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
+    '''
+    procesos = procesos or os.cpu_count()
+    fragmentos = calcular_fragmentos(fichero, partes or procesos * 4)
+    argumentos = ([fichero] * len(fragmentos), [i for i, _ in fragmentos], [f for _, f in fragmentos],
+                  [k == 0 for k in range(len(fragmentos))])
+    if procesos == 1 or len(fragmentos) <= 1:
+        columnas = list(map(_analizar_fragmento, *argumentos))
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            columnas = list(ejecutor.map(_analizar_fragmento, *argumentos))
+    # Cada proceso crea sus propias cadenas: se unifican para que, como en leer_preguntas, las
+    # preguntas de una misma etiqueta compartan el mismo objeto str
+    canonica = VocabularioEtiquetas().canonica
+    preguntas = []
+    for puntuaciones, titulos, años, etiquetas in columnas:
+        preguntas.extend(map(Pregunta, puntuaciones, titulos, años, map(canonica, etiquetas)))
+    return preguntas
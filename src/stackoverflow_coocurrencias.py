@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+''' Matriz documento-término dispersa y análisis de coocurrencia de palabras clave
+
+MatrizDocumentoTermino guarda las palabras clave de los títulos (calculadas con
+calcular_palabras_clave y las stopwords, o, si se pide con normalizados=True, a partir de los
+títulos ya normalizados de una PreguntasNormalizadas) en formato CSR (compressed sparse row) con arrays de
+NumPy: la fila i es la pregunta i, y sus términos son indices[indptr[i]:indptr[i + 1]], en el
+orden en que aparecen en el título (un término repetido aparece dos veces). Junto a ella se
+guardan el año y el código de etiqueta de cada pregunta.
+
+A partir de la matriz se calculan, con operaciones vectorizadas y sin recorrer las preguntas
+en Python, tablas de frecuencias dispersas (MatrizDispersa):
+
+    - bigramas: pares de palabras clave consecutivas en un título (término x término)
+    - coocurrencias: número de preguntas en las que aparecen juntas dos palabras clave
+      distintas (término x término, solo la mitad superior: el primer término es el que
+      entró antes en el vocabulario)
+    - palabras_por_etiqueta: frecuencia de cada palabra clave en cada etiqueta (término x etiqueta)
+    - palabras_por_año: frecuencia de cada palabra clave en cada año (término x año)
+
+Cada celda de una tabla se identifica con un único entero (fila * columnas + columna); las
+frecuencias se obtienen con np.unique sobre esos enteros, de modo que la memoria depende del
+número de celdas no vacías y no del tamaño de la tabla completa. Las coocurrencias se calculan
+por bloques de preguntas para acotar el tamaño de la lista de pares.
+
+La matriz se puede guardar y cargar en formato .npz (guardar, cargar). SciPy no es necesario;
+si está instalado, a_scipy convierte las matrices en scipy.sparse.csr_matrix.
+
+USO:
+    python stackoverflow_coocurrencias.py [--fichero CSV] [--guardar NPZ] [--top 20]
+'''
+
+import argparse
+import heapq
+
+import numpy as np
+
+from stackoverflow_SOLUCION import leer_preguntas, extractor_palabras_clave
+from stackoverflow_numpy import columnas_numpy
+from stackoverflow_normalizacion import palabras_clave_normalizadas
+
+# Número de preguntas de cada bloque en el cálculo de las coocurrencias
+TAMAÑO_BLOQUE = 20000
+
+
+class MatrizDispersa:
+    ''' Tabla de frecuencias dispersa en formato CSR, con nombres de filas y columnas
+    '''
+
+    def __init__(self, indptr, indices, datos, filas, columnas):
+        ''' Crea la tabla a partir de sus arrays CSR
+
+        ENTRADA:
+           - indptr: posición del primer elemento de cada fila, más el total al final -> np.ndarray
+           - indices: columna de cada elemento no nulo -> np.ndarray
+           - datos: valor de cada elemento no nulo -> np.ndarray
+           - filas: nombre de cada fila -> [str | int]
+           - columnas: nombre de cada columna -> [str | int]
+        '''
+        self.indptr = indptr
+        self.indices = indices
+        self.datos = datos
+        self.filas = filas
+        self.columnas = columnas
+        self._posicion_fila = {nombre: i for i, nombre in enumerate(filas)}
+        self._posicion_columna = {nombre: j for j, nombre in enumerate(columnas)}
+
+    @classmethod
+    def desde_celdas(cls, celdas, pesos, filas, columnas):
+        ''' Crea la tabla sumando los pesos de cada celda
+
+        ENTRADA:
+           - celdas: celda de cada observación, codificada como fila * len(columnas) + columna
+                     -> np.ndarray(int64)
+           - pesos: peso de cada observación, o None para contar 1 por observación -> np.ndarray
+           - filas, columnas: nombres de las filas y las columnas -> [str | int]
+        SALIDA:
+           - tabla de frecuencias -> MatrizDispersa
+        '''
+        if pesos is None:
+            unicas, datos = np.unique(celdas, return_counts=True)
+        else:
+            unicas, inversa = np.unique(celdas, return_inverse=True)
+            datos = np.bincount(inversa, weights=pesos, minlength=len(unicas)).astype(np.int64)
+        # np.unique ordena las celdas: quedan ordenadas por fila y, dentro de cada fila, por columna
+        n_columnas = max(len(columnas), 1)
+        indices_fila = unicas // n_columnas
+        indptr = np.zeros(len(filas) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(indices_fila, minlength=len(filas)), out=indptr[1:])
+        return cls(indptr, (unicas % n_columnas).astype(np.int32), datos.astype(np.int64), filas, columnas)
+
+    @property
+    def forma(self):
+        return len(self.filas), len(self.columnas)
+
+    def __len__(self):
+        ''' Número de celdas no vacías
+        '''
+        return len(self.datos)
+
+    def valor(self, fila, columna):
+        ''' Devuelve el valor de la celda (fila, columna), indicadas por su nombre
+        '''
+        i = self._posicion_fila.get(fila)
+        if i is None:
+            return 0
+        inicio, fin = self.indptr[i], self.indptr[i + 1]
+        j = self._posicion_columna.get(columna)
+        encontrados = np.flatnonzero(self.indices[inicio:fin] == j)
+        return int(self.datos[inicio + encontrados[0]]) if len(encontrados) else 0
+
+    def fila(self, nombre, top_n=None):
+        ''' Devuelve los elementos no nulos de una fila, de mayor a menor valor
+
+        ENTRADA:
+           - nombre: nombre de la fila -> str | int
+           - top_n: si no es None, solo se devuelven los top_n mayores -> int
+        SALIDA:
+           - lista de tuplas (columna, valor) -> [(str | int, int)]
+        '''
+        i = self._posicion_fila.get(nombre)
+        if i is None:
+            return []
+        inicio, fin = self.indptr[i], self.indptr[i + 1]
+        elementos = zip((self.columnas[j] for j in self.indices[inicio:fin].tolist()),
+                        self.datos[inicio:fin].tolist())
+        return _mayores(elementos, top_n)
+
+    def columna(self, nombre, top_n=None):
+        ''' Devuelve los elementos no nulos de una columna, de mayor a menor valor
+
+        ENTRADA:
+           - nombre: nombre de la columna -> str | int
+           - top_n: si no es None, solo se devuelven los top_n mayores -> int
+        SALIDA:
+           - lista de tuplas (fila, valor) -> [(str | int, int)]
+        '''
+        j = self._posicion_columna.get(nombre)
+        if j is None:
+            return []
+        posiciones = np.flatnonzero(self.indices == j)
+        filas = np.searchsorted(self.indptr, posiciones, side='right') - 1
+        return _mayores(zip((self.filas[i] for i in filas.tolist()), self.datos[posiciones].tolist()), top_n)
+
+    def mas_frecuentes(self, top_n=None):
+        ''' Devuelve las celdas no vacías de mayor a menor valor
+
+        ENTRADA:
+           - top_n: si no es None, solo se devuelven las top_n celdas con mayor valor -> int
+        SALIDA:
+           - lista de tuplas ((fila, columna), valor) -> [((str | int, str | int), int)]
+        '''
+        if top_n is None:
+            posiciones = np.argsort(-self.datos, kind='stable')
+        else:
+            # Se seleccionan los candidatos con np.partition y solo se ordenan ellos
+            top_n = min(top_n, len(self.datos))
+            if top_n <= 0:
+                return []
+            umbral = -np.partition(-self.datos, top_n - 1)[top_n - 1]
+            candidatas = np.flatnonzero(self.datos >= umbral)
+            posiciones = candidatas[np.argsort(-self.datos[candidatas], kind='stable')][:top_n]
+        filas = np.searchsorted(self.indptr, posiciones, side='right') - 1
+        return [((self.filas[i], self.columnas[j]), dato) for i, j, dato in
+                zip(filas.tolist(), self.indices[posiciones].tolist(), self.datos[posiciones].tolist())]
+
+    def a_diccionario(self):
+        ''' Devuelve la tabla como diccionario de diccionarios {fila: {columna: valor}}
+        '''
+        tabla = dict()
+        indices, datos = self.indices.tolist(), self.datos.tolist()
+        for i, (inicio, fin) in enumerate(zip(self.indptr[:-1].tolist(), self.indptr[1:].tolist())):
+            if inicio < fin:
+                tabla[self.filas[i]] = {self.columnas[j]: d for j, d in zip(indices[inicio:fin], datos[inicio:fin])}
+        return tabla
+
+    def a_scipy(self):
+        ''' Devuelve la tabla como scipy.sparse.csr_matrix (necesita SciPy)
+        '''
+        from scipy.sparse import csr_matrix
+        return csr_matrix((self.datos, self.indices, self.indptr), shape=self.forma)
+
+
+class MatrizDocumentoTermino:
+    ''' Palabras clave de cada pregunta en formato CSR, con el año y la etiqueta de cada pregunta
+    '''
+
+    def __init__(self, indptr, indices, vocabulario, años, codigos_etiqueta, etiquetas):
+        self.indptr = indptr
+        self.indices = indices
+        self.vocabulario = vocabulario
+        self.años = años
+        self.codigos_etiqueta = codigos_etiqueta
+        self.etiquetas = etiquetas
+
+    @classmethod
+    def desde_preguntas(cls, preguntas, stopwords=frozenset(), normalizados=False):
+        ''' Construye la matriz de una colección de preguntas
+
+        Por defecto las palabras clave son las de calcular_palabras_clave, como en
+        contar_palabras_clave, para cualquier colección. Con normalizados=True se toman de los
+        títulos normalizados de una PreguntasNormalizadas (como en
+        contar_palabras_clave_normalizadas), que pueden diferir de las anteriores.
+
+        ENTRADA:
+           - preguntas: colección de preguntas (puntuacion, titulo, año, etiqueta)
+                        -> [Pregunta(int, str, int, str)] | PreguntasStore | PreguntasNormalizadas
+           - stopwords: palabras huecas, que no se incluyen en la matriz
+           - normalizados: si se usan los títulos normalizados de una PreguntasNormalizadas -> bool
+        SALIDA:
+           - matriz documento-término -> MatrizDocumentoTermino
+        '''
+        stopwords = frozenset(stopwords)
+        codigos = dict()
+        indices = []
+        longitudes = np.empty(len(preguntas), dtype=np.int64)
+        if normalizados:
+            if not hasattr(preguntas, 'titulos_normalizados'):
+                raise TypeError('normalizados=True necesita una PreguntasNormalizadas')
+            # Títulos ya normalizados: solo falta quitar las stopwords
+            titulos = preguntas.titulos_normalizados
+            extraer = palabras_clave_normalizadas
+        else:
+            titulos = (p.titulo for p in preguntas)
+            extraer = extractor_palabras_clave()
+        for i, titulo in enumerate(titulos):
+            terminos = extraer(titulo, stopwords)
+            indices.extend([codigos.setdefault(t, len(codigos)) for t in terminos])
+            longitudes[i] = len(terminos)
+        indptr = np.zeros(len(preguntas) + 1, dtype=np.int64)
+        np.cumsum(longitudes, out=indptr[1:])
+        columnas = columnas_numpy(preguntas)
+        return cls(indptr, np.array(indices, dtype=np.int32), list(codigos), columnas.años,
+                   columnas.codigos_etiqueta, columnas.etiquetas)
+
+    @property
+    def forma(self):
+        return len(self.indptr) - 1, len(self.vocabulario)
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def terminos(self, i):
+        ''' Devuelve las palabras clave de la pregunta i, en el orden del título
+        '''
+        return [self.vocabulario[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]].tolist()]
+
+    def _filas(self):
+        # Fila (pregunta) de cada elemento de indices
+        return np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.indptr))
+
+    def frecuencias(self):
+        ''' Devuelve la frecuencia total de cada palabra clave, en el orden del vocabulario
+                                                                        -> np.ndarray
+        '''
+        return np.bincount(self.indices, minlength=len(self.vocabulario))
+
+    def bigramas(self):
+        ''' Cuenta los pares de palabras clave consecutivas de los títulos
+
+        Las stopwords y los términos descartados por calcular_palabras_clave no se tienen en
+        cuenta: 'how to read a file' da el bigrama ('read', 'file').
+
+        SALIDA:
+           - tabla término x término con el número de veces que el término de la columna
+             sigue al de la fila -> MatrizDispersa
+        '''
+        n_terminos = len(self.vocabulario)
+        # Un par (k, k + 1) es un bigrama si los dos elementos están en la misma fila
+        misma_fila = np.ones(max(len(self.indices) - 1, 0), dtype=bool)
+        finales = self.indptr[1:-1] - 1
+        misma_fila[finales[(finales >= 0) & (finales < len(misma_fila))]] = False
+        primeros = self.indices[:-1][misma_fila].astype(np.int64)
+        segundos = self.indices[1:][misma_fila].astype(np.int64)
+        return MatrizDispersa.desde_celdas(primeros * n_terminos + segundos, None,
+                                           self.vocabulario, self.vocabulario)
+
+    def coocurrencias(self, tamaño_bloque=TAMAÑO_BLOQUE):
+        ''' Cuenta en cuántas preguntas aparece cada par de palabras clave distintas
+
+        ENTRADA:
+           - tamaño_bloque: número de preguntas cuyos pares se generan a la vez; acota la
+                            memoria temporal del cálculo -> int
+        SALIDA:
+           - tabla término x término con el número de preguntas que contienen los dos
+             términos. Cada par aparece una sola vez, con el término de menor código (el que
+             entró antes en el vocabulario) en la fila -> MatrizDispersa
+        '''
+        n_terminos = len(self.vocabulario)
+        # Términos distintos de cada pregunta, ordenados por código: (fila, término) únicos
+        unicas = np.unique(self._filas() * n_terminos + self.indices)
+        filas, terminos = unicas // n_terminos, unicas % n_terminos
+        indptr = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(filas, minlength=len(self)), out=indptr[1:])
+
+        celdas, pesos = [], []
+        for inicio in range(0, len(self), tamaño_bloque):
+            fin = min(inicio + tamaño_bloque, len(self))
+            primeros, segundos = _pares(indptr[inicio:fin + 1])
+            bloque, cuentas = np.unique(terminos[primeros] * n_terminos + terminos[segundos],
+                                        return_counts=True)
+            celdas.append(bloque)
+            pesos.append(cuentas)
+        if not celdas:
+            return MatrizDispersa.desde_celdas(np.empty(0, dtype=np.int64), None,
+                                               self.vocabulario, self.vocabulario)
+        return MatrizDispersa.desde_celdas(np.concatenate(celdas), np.concatenate(pesos),
+                                           self.vocabulario, self.vocabulario)
+
+    def palabras_por_etiqueta(self):
+        ''' Calcula la frecuencia de cada palabra clave en las preguntas de cada etiqueta
+
+        SALIDA:
+           - tabla término x etiqueta -> MatrizDispersa
+        '''
+        codigos = self.codigos_etiqueta[self._filas()]
+        return MatrizDispersa.desde_celdas(self.indices.astype(np.int64) * len(self.etiquetas) + codigos,
+                                           None, self.vocabulario, self.etiquetas)
+
+    def palabras_por_año(self):
+        ''' Calcula la frecuencia de cada palabra clave en las preguntas de cada año
+
+        SALIDA:
+           - tabla término x año, con los años ordenados -> MatrizDispersa
+        '''
+        años, indice_año = np.unique(self.años, return_inverse=True)
+        return MatrizDispersa.desde_celdas(self.indices.astype(np.int64) * len(años) + indice_año[self._filas()],
+                                           None, self.vocabulario, años.tolist())
+
+    def a_scipy(self, binaria=False):
+        ''' Devuelve la matriz como scipy.sparse.csr_matrix (necesita SciPy)
+
+        ENTRADA:
+           - binaria: si es True, cada celda vale 1 si el término aparece en la pregunta; si
+                      no, el número de veces que aparece -> bool
+        '''
+        from scipy.sparse import csr_matrix
+        matriz = csr_matrix((np.ones(len(self.indices), dtype=np.int64), self.indices, self.indptr),
+                            shape=self.forma)
+        # csr_matrix admite índices repetidos en una fila; sum_duplicates los suma
+        matriz.sum_duplicates()
+        if binaria:
+            matriz.data[:] = 1
+        return matriz
+
+    def guardar(self, fichero):
+        ''' Guarda la matriz en un fichero .npz
+        '''
+        vocabulario, desplazamientos_vocabulario = _codificar_cadenas(self.vocabulario)
+        etiquetas, desplazamientos_etiquetas = _codificar_cadenas(self.etiquetas)
+        np.savez(fichero, indptr=self.indptr, indices=self.indices, años=self.años,
+                 codigos_etiqueta=self.codigos_etiqueta,
+                 vocabulario=vocabulario, desplazamientos_vocabulario=desplazamientos_vocabulario,
+                 etiquetas=etiquetas, desplazamientos_etiquetas=desplazamientos_etiquetas)
+
+    @classmethod
+    def cargar(cls, fichero):
+        ''' Carga una matriz guardada con guardar
+        '''
+        with np.load(fichero, allow_pickle=False) as datos:
+            vocabulario = _decodificar_cadenas(datos['vocabulario'], datos['desplazamientos_vocabulario'])
+            etiquetas = _decodificar_cadenas(datos['etiquetas'], datos['desplazamientos_etiquetas'])
+            return cls(datos['indptr'], datos['indices'], vocabulario,
+                       datos['años'], datos['codigos_etiqueta'], etiquetas)
+
+
+def _pares(indptr):
+    ''' Devuelve las posiciones (i, j), con i < j, de todos los pares de elementos de una
+    misma fila de una matriz CSR
+    '''
+    longitudes = np.diff(indptr)
+    posiciones = np.arange(indptr[0], indptr[-1], dtype=np.int64)
+    # Cada elemento forma pareja con los que le siguen en su fila
+    finales = np.repeat(indptr[1:], longitudes)
+    parejas = finales - posiciones - 1
+    primeros = np.repeat(posiciones, parejas)
+    inicios_grupo = np.repeat(np.cumsum(parejas) - parejas, parejas)
+    segundos = primeros + 1 + (np.arange(len(primeros), dtype=np.int64) - inicios_grupo)
+    return primeros, segundos
+
+
+def _mayores(elementos, top_n):
+    if top_n is None:
+        return sorted(elementos, key=lambda x: x[1], reverse=True)
+    return heapq.nlargest(top_n, elementos, key=lambda x: x[1])
+
+
+def _codificar_cadenas(cadenas):
+    # Cadenas concatenadas en UTF-8 y la posición en la que empieza cada una (más el final):
+    # no hace falta pickle para cargarlas y admiten cualquier carácter, también '\n' o ''
+    codificadas = [cadena.encode('utf-8') for cadena in cadenas]
+    desplazamientos = np.zeros(len(codificadas) + 1, dtype=np.int64)
+    np.cumsum([len(c) for c in codificadas], out=desplazamientos[1:])
+    return np.frombuffer(b''.join(codificadas), dtype=np.uint8), desplazamientos
+
+
+def _decodificar_cadenas(datos, desplazamientos):
+    texto = datos.tobytes()
+    limites = desplazamientos.tolist()
+    return [texto[inicio:fin].decode('utf-8') for inicio, fin in zip(limites, limites[1:])]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Coocurrencia de palabras clave en los títulos de las preguntas')
+    parser.add_argument('--fichero', default='../data/stackoverflow_python_questions.csv')
+    parser.add_argument('--stopwords', default='../data/stopwords.txt')
+    parser.add_argument('--guardar', help='fichero .npz en el que se guarda la matriz documento-término')
+    parser.add_argument('--top', type=int, default=20, help='número de pares que se muestran')
+    argumentos = parser.parse_args()
+
+    with open(argumentos.stopwords) as f:
+        stopwords = frozenset(p.strip() for p in f)
+    matriz = MatrizDocumentoTermino.desde_preguntas(leer_preguntas(argumentos.fichero), stopwords)
+    if argumentos.guardar:
+        matriz.guardar(argumentos.guardar)
+    print("Matriz documento-término: {} preguntas x {} términos, {} elementos".format(
+        *matriz.forma, len(matriz.indices)))
+    print("\nBigramas más frecuentes:")
+    for (primero, segundo), n in matriz.bigramas().mas_frecuentes(argumentos.top):
+        print("   {:>6d}  {} {}".format(n, primero, segundo))
+    print("\nCoocurrencias más frecuentes:")
+    for (primero, segundo), n in matriz.coocurrencias().mas_frecuentes(argumentos.top):
+        print("   {:>6d}  {} + {}".format(n, primero, segundo))
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+''' Informes incrementales sobre una colección de preguntas que crece día a día
+
+AnalizadorIncremental mantiene los recuentos de etiquetas y palabras clave, las preguntas de
+cada año, el cubo etiqueta-año y las preguntas mejor valoradas. Al añadir o eliminar un lote
+de preguntas solo se actualiza el estado afectado por el lote, sin recalcular el histórico.
+El estado se puede guardar en disco y recuperar tras un reinicio.
+
+Los informes coinciden siempre con los de las funciones de stackoverflow_SOLUCION aplicadas a
+la colección completa (las preguntas añadidas, en orden, menos las eliminadas), incluido el
+orden de los empates en contar_palabras_clave y calcular_preguntas_mejor_valoradas.
+'''
+
+import heapq
+import os
+import pickle
+from collections import Counter
+
+from stackoverflow_SOLUCION import extractor_palabras_clave, calcular_evoluciones
+
+
+class AnalizadorIncremental:
+    ''' Estado de los informes de una colección de preguntas, actualizable por lotes
+    '''
+
+    def __init__(self, stopwords=frozenset(), limite=10):
+        ''' Crea un analizador vacío
+
+        ENTRADA:
+           - stopwords: palabras huecas, consideradas no relevantes como palabras clave
+           - limite: número máximo de preguntas mejor valoradas que se mantienen -> int
+        '''
+        self.stopwords = frozenset(stopwords)
+        self.limite = limite
+        # Cada pregunta recibe un número de secuencia creciente al añadirse; el orden de los
+        # números de secuencia es el orden de la colección
+        self._siguiente = 0
+        self._preguntas = dict()
+        self._secuencias = dict()
+        self._etiquetas = Counter()
+        self._palabras = Counter()
+        # Primera aparición (secuencia, posición en el título) de cada palabra clave, que decide
+        # el orden de los empates. Si se elimina esa pregunta, la palabra queda pendiente de
+        # recalcular su primera aparición
+        self._primera_aparicion = dict()
+        self._pendientes = set()
+        self._por_año = dict()
+        self._cubo = dict()
+        self._mejor_valoradas = []
+        self._mejor_valoradas_validas = True
+
+    def __len__(self):
+        return len(self._preguntas)
+
+    def __iter__(self):
+        return iter(self._preguntas.values())
+
+    def añadir(self, preguntas):
+        ''' Añade un lote de preguntas al final de la colección
+
+        ENTRADA:
+           - preguntas: lote de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
+        '''
+        extraer = extractor_palabras_clave()
+        for p in preguntas:
+            secuencia = self._siguiente
+            self._siguiente += 1
+            self._preguntas[secuencia] = p
+            self._secuencias.setdefault(p, []).append(secuencia)
+            self._etiquetas[p.etiqueta] += 1
+            for i, termino in enumerate(extraer(p.titulo, self.stopwords)):
+                self._palabras[termino] += 1
+                self._primera_aparicion.setdefault(termino, (secuencia, i))
+            self._por_año.setdefault(p.año, dict())[secuencia] = p
+            self._cubo.setdefault(p.etiqueta, Counter())[p.año] += 1
+            if self._mejor_valoradas_validas:
+                elemento = (p.puntuacion, -secuencia, p.titulo)
+                if len(self._mejor_valoradas) < self.limite:
+                    heapq.heappush(self._mejor_valoradas, elemento)
+                elif elemento > self._mejor_valoradas[0]:
+                    heapq.heapreplace(self._mejor_valoradas, elemento)
+
+    def eliminar(self, preguntas):
+        ''' Elimina un lote de preguntas de la colección
+
+        Si una pregunta aparece varias veces, se elimina su primera aparición. El lote se
+        comprueba entero antes de eliminar nada: si alguna pregunta no está en la colección (o
+        aparece en el lote más veces que en la colección) se lanza ValueError y el analizador
+        queda sin cambios.
+
+        ENTRADA:
+           - preguntas: lote de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
+        '''
+        preguntas = list(preguntas)
+        for p, veces in Counter(preguntas).items():
+            if len(self._secuencias.get(p, ())) < veces:
+                raise ValueError('La pregunta no está en la colección{}: {}'.format(
+                    '' if veces == 1 else ' {} veces'.format(veces), p))
+        extraer = extractor_palabras_clave()
+        for p in preguntas:
+            secuencias = self._secuencias[p]
+            secuencia = secuencias.pop(0)
+            if not secuencias:
+                del self._secuencias[p]
+            del self._preguntas[secuencia]
+            _descontar(self._etiquetas, p.etiqueta)
+            for termino in extraer(p.titulo, self.stopwords):
+                if _descontar(self._palabras, termino):
+                    del self._primera_aparicion[termino]
+                    self._pendientes.discard(termino)
+                elif self._primera_aparicion[termino][0] == secuencia:
+                    self._pendientes.add(termino)
+            del self._por_año[p.año][secuencia]
+            if not self._por_año[p.año]:
+                del self._por_año[p.año]
+            if _descontar(self._cubo[p.etiqueta], p.año) and not self._cubo[p.etiqueta]:
+                del self._cubo[p.etiqueta]
+            # Si sale una de las mejor valoradas, la siguiente puede ser cualquier otra: se
+            # recalculan al pedir el informe
+            if (p.puntuacion, -secuencia, p.titulo) in self._mejor_valoradas:
+                self._mejor_valoradas_validas = False
+
+    def calcular_etiquetas(self):
+        return set(self._etiquetas)
+
+    def contar_etiquetas(self):
+        return dict(self._etiquetas)
+
+    def contar_palabras_clave(self, top_n=None):
+        ''' Devuelve las frecuencias de las palabras clave, como contar_palabras_clave
+
+        ENTRADA:
+           - top_n: si no es None, solo se devuelven los top_n términos más frecuentes -> int
+        SALIDA:
+           - lista de tuplas (termino, frecuencia) ordenada de mayor a menor frecuencia  -> [(str, int)]
+        '''
+        self._actualizar_primeras_apariciones()
+        primera = self._primera_aparicion
+        clave = lambda x: (-x[1], primera[x[0]])
+        if top_n is not None:
+            return heapq.nsmallest(top_n, self._palabras.items(), key=clave)
+        return sorted(self._palabras.items(), key=clave)
+
+    def _actualizar_primeras_apariciones(self):
+        # Se recorre la colección en orden hasta encontrar todas las palabras pendientes
+        pendientes = self._pendientes
+        extraer = extractor_palabras_clave()
+        for secuencia, p in self._preguntas.items():
+            if not pendientes:
+                break
+            for i, termino in enumerate(extraer(p.titulo, self.stopwords)):
+                if termino in pendientes:
+                    self._primera_aparicion[termino] = (secuencia, i)
+                    pendientes.discard(termino)
+
+    def agrupar_preguntas_por_año(self):
+        return {año: list(preguntas.values()) for año, preguntas in self._por_año.items()}
+
+    def calcular_preguntas_mejor_valoradas(self, limite=10):
+        ''' Devuelve las preguntas mejor valoradas, como calcular_preguntas_mejor_valoradas
+
+        ENTRADA:
+           - limite: número de preguntas a recuperar; no puede superar el límite del analizador -> int
+        SALIDA:
+           - lista de tuplas (titulo, puntuacion) ordenada de mayor a menor puntuacion  -> [(str, int)]
+        '''
+        if limite > self.limite:
+            raise ValueError('El analizador solo mantiene las {} mejor valoradas'.format(self.limite))
+        if not self._mejor_valoradas_validas:
+            self._mejor_valoradas = heapq.nlargest(
+                self.limite, ((p.puntuacion, -s, p.titulo) for s, p in self._preguntas.items()))
+            heapq.heapify(self._mejor_valoradas)
+            self._mejor_valoradas_validas = True
+        return [(titulo, puntuacion)
+                for puntuacion, _, titulo in heapq.nlargest(limite, self._mejor_valoradas)]
+
+    def cubo_etiqueta_año(self):
+        return {etiqueta: Counter(por_año) for etiqueta, por_año in self._cubo.items()}
+
+    def calcular_evoluciones(self, etiquetas):
+        return calcular_evoluciones(self._cubo, etiquetas)
+
+    def guardar(self, fichero):
+        ''' Guarda el estado del analizador en un fichero
+
+        El fichero se escribe primero con otro nombre y después se renombra, así que un fallo
+        a mitad de escritura no estropea el punto de control anterior.
+
+        ENTRADA:
+           - fichero: nombre del fichero de destino -> str
+        '''
+        temporal = fichero + '.tmp'
+        with open(temporal, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, fichero)
+
+    @classmethod
+    def cargar(cls, fichero):
+        ''' Recupera un analizador guardado con guardar
+
+        ENTRADA:
+           - fichero: nombre del fichero -> str
+        SALIDA:
+           - analizador con el estado guardado -> AnalizadorIncremental
+        '''
+        with open(fichero, 'rb') as f:
+            analizador = pickle.load(f)
+        if not isinstance(analizador, cls):
+            raise ValueError('{} no contiene un AnalizadorIncremental'.format(fichero))
+        return analizador
+
+
+def _descontar(contador, clave):
+    ''' Resta uno a un contador y borra la clave si llega a cero. Devuelve True si se borró
+    '''
+    contador[clave] -= 1
+    if contador[clave] == 0:
+        del contador[clave]
+        return True
+    return False
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+''' Colección de preguntas con índices secundarios por año, etiqueta y puntuación
+
+PreguntasIndexadas se construye una vez a partir de una colección de preguntas (la lista que
+devuelve leer_preguntas o un PreguntasStore) y guarda, para cada año y para cada etiqueta, la
+lista ordenada de posiciones de sus preguntas (listas de apariciones). También guarda las
+posiciones ordenadas por puntuación, para resolver rangos de puntuación con búsqueda binaria.
+
+Los filtros y sus intersecciones se resuelven con los índices, sin recorrer la colección: la
+lista de apariciones más corta se recorre una vez y sus posiciones se buscan en las demás con
+búsqueda binaria, y el rango de puntuación se comprueba sobre cada candidata. Las funciones de stackoverflow_SOLUCION
+(filtrar_por_año, filtrar_por_etiqueta, calcular_etiquetas, contar_etiquetas y
+agrupar_preguntas_por_año) usan los índices automáticamente cuando reciben una
+PreguntasIndexadas.
+'''
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class PreguntasIndexadas:
+    ''' Secuencia de preguntas de solo lectura con índices por año, etiqueta y puntuación
+    '''
+
+    def __init__(self, preguntas):
+        ''' Construye los índices en una sola pasada sobre las preguntas
+
+        ENTRADA:
+           - preguntas: colección de preguntas (puntuacion, titulo, año, etiqueta)
+                        -> [Pregunta(int, str, int, str)] | PreguntasStore
+        '''
+        if not hasattr(preguntas, '__getitem__'):
+            preguntas = list(preguntas)
+        self.preguntas = preguntas
+        self.por_año = dict()
+        self.por_etiqueta = dict()
+        puntuaciones = array('i')
+        for posicion, p in enumerate(preguntas):
+            self.por_año.setdefault(p.año, array('i')).append(posicion)
+            self.por_etiqueta.setdefault(p.etiqueta, array('i')).append(posicion)
+            puntuaciones.append(p.puntuacion)
+        self._puntuaciones = puntuaciones
+        self._por_puntuacion = array('i', sorted(range(len(puntuaciones)), key=puntuaciones.__getitem__))
+        self._puntuaciones_ordenadas = array('i', (puntuaciones[i] for i in self._por_puntuacion))
+
+    def __len__(self):
+        return len(self.preguntas)
+
+    def __iter__(self):
+        return iter(self.preguntas)
+
+    def __getitem__(self, i):
+        return self.preguntas[i]
+
+    def posiciones(self, año=None, etiqueta=None, puntuacion_min=None, puntuacion_max=None):
+        ''' Calcula las posiciones de las preguntas que cumplen todos los criterios indicados
+
+        ENTRADA:
+           - año: año de las preguntas; None para no filtrar por año -> int
+           - etiqueta: etiqueta de las preguntas; None para no filtrar por etiqueta -> str
+           - puntuacion_min, puntuacion_max: rango cerrado de puntuaciones; None para dejar
+             el extremo abierto -> int
+        SALIDA:
+           - posiciones de las preguntas seleccionadas, de menor a mayor -> [int]
+        '''
+        listas = []
+        if año is not None:
+            listas.append(self.por_año.get(año, ()))
+        if etiqueta is not None:
+            listas.append(self.por_etiqueta.get(etiqueta, ()))
+        por_puntuacion = puntuacion_min is not None or puntuacion_max is not None
+        if not listas:
+            if por_puntuacion:
+                # El índice de puntuación está ordenado por puntuación, no por posición
+                return sorted(self._posiciones_por_puntuacion(puntuacion_min, puntuacion_max))
+            return list(range(len(self)))
+        # Las listas de apariciones están ordenadas: se recorre la más corta y se busca cada
+        # posición en las demás con búsqueda binaria, avanzando el inicio de la búsqueda
+        listas.sort(key=len)
+        resultado = list(listas[0])
+        for otra in listas[1:]:
+            comunes = []
+            inicio = 0
+            for i in resultado:
+                inicio = bisect_left(otra, i, inicio)
+                if inicio == len(otra):
+                    break
+                if otra[inicio] == i:
+                    comunes.append(i)
+            resultado = comunes
+        if por_puntuacion:
+            # La puntuación de cada candidata se comprueba directamente, sin intersecar
+            puntuaciones = self._puntuaciones
+            minimo = -float('inf') if puntuacion_min is None else puntuacion_min
+            maximo = float('inf') if puntuacion_max is None else puntuacion_max
+            resultado = [i for i in resultado if minimo <= puntuaciones[i] <= maximo]
+        return resultado
+
+    def _posiciones_por_puntuacion(self, minimo, maximo):
+        inicio = 0 if minimo is None else bisect_left(self._puntuaciones_ordenadas, minimo)
+        fin = len(self) if maximo is None else bisect_right(self._puntuaciones_ordenadas, maximo)
+        return self._por_puntuacion[inicio:fin]
+
+    def filtrar(self, año=None, etiqueta=None, puntuacion_min=None, puntuacion_max=None):
+        ''' Selecciona las preguntas que cumplen todos los criterios indicados
+
+        Los parámetros son los mismos que los de posiciones.
+
+        SALIDA:
+           - lista de preguntas seleccionadas, en el orden de la colección -> [Pregunta(int, str, int, str)]
+        '''
+        preguntas = self.preguntas
+        return [preguntas[i] for i in self.posiciones(año, etiqueta, puntuacion_min, puntuacion_max)]
+
+    def filtrar_por_año(self, año):
+        return self.filtrar(año=año)
+
+    def filtrar_por_etiqueta(self, etiqueta):
+        return self.filtrar(etiqueta=etiqueta)
+
+    def filtrar_por_puntuacion(self, minimo=None, maximo=None):
+        return self.filtrar(puntuacion_min=minimo, puntuacion_max=maximo)
+
+    def calcular_etiquetas(self):
+        return set(self.por_etiqueta)
+
+    def contar_etiquetas(self):
+        return {etiqueta: len(posiciones) for etiqueta, posiciones in self.por_etiqueta.items()}
+
+    def agrupar_preguntas_por_año(self):
+        preguntas = self.preguntas
+        return {año: [preguntas[i] for i in posiciones] for año, posiciones in self.por_año.items()}
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+''' Generación por lotes de las gráficas de un informe
+
+generar_informe recibe una especificación con la lista de gráficas de un informe y las guarda
+todas en un directorio, junto con una página index.html que las muestra. Los datos de todas
+las gráficas se obtienen del cubo etiqueta-año (cubo_etiqueta_año), que se calcula con una
+sola pasada sobre las preguntas:
+
+    - distribución: frecuencia total de cada etiqueta, sumando sus años en el cubo
+    - evolución: frecuencias de cada etiqueta por año (calcular_evoluciones)
+
+Las gráficas se dibujan sin pantalla (matplotlib.figure.Figure con Agg, igual que los
+mostrar_* con el parámetro 'fichero') y se pueden repartir entre varios procesos.
+
+FORMATO DE LA ESPECIFICACIÓN:
+-----------------------------
+Lista de gráficas; cada una es un diccionario con las claves:
+    - tipo: 'distribucion' o 'evolucion'
+    - etiquetas: lista de etiquetas de la gráfica
+    - titulo (opcional): título de la gráfica
+    - nombre (opcional): nombre del fichero, sin extensión ni directorios (no puede contener
+      separadores de ruta, para que el fichero quede dentro del directorio de salida). Por
+      defecto es el número de la gráfica y su tipo ('01_distribucion'); dos gráficas no pueden
+      tener el mismo nombre, porque una sobrescribiría el fichero de la otra
+
+Por ejemplo, en JSON:
+
+    [{"tipo": "distribucion", "etiquetas": ["list", "file", "string"], "titulo": "Estructuras"},
+     {"tipo": "evolucion", "etiquetas": ["django", "flask"], "nombre": "web"}]
+
+USO:
+    python stackoverflow_informes.py <especificación JSON> <directorio> [--fichero CSV] [--procesos N]
+'''
+
+import argparse
+import html
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from stackoverflow_SOLUCION import (leer_preguntas, cubo_etiqueta_año, calcular_evoluciones,
+                                    dibujar_tarta, dibujar_evolucion)
+
+TIPOS = ('distribucion', 'evolucion')
+
+
+def preparar_graficas(preguntas, especificacion, cubo=None, backend='python'):
+    ''' Calcula los datos de todas las gráficas de una especificación con una sola pasada
+
+    ENTRADA:
+       - preguntas: colección de preguntas (puntuacion, titulo, año, etiqueta)
+                    -> [Pregunta(int, str, int, str)] | PreguntasStore
+       - especificacion: lista de gráficas (ver el formato en la documentación del módulo) -> [dict]
+       - cubo: cubo de frecuencias ya calculado con cubo_etiqueta_año(preguntas). Si es None
+               se calcula a partir de las preguntas -> {str: {int: int}}
+       - backend: 'python' o 'numpy', usado para calcular el cubo -> str
+    SALIDA:
+       - lista de gráficas, cada una con su tipo, nombre, título, etiquetas y los datos que
+         se dibujan ('tamaños' o 'años' y 'evoluciones') -> [dict]
+    '''
+    nombres = []
+    for i, grafica in enumerate(especificacion):
+        if grafica.get('tipo') not in TIPOS:
+            raise ValueError("La gráfica {} tiene un tipo desconocido: {!r}".format(i, grafica.get('tipo')))
+        nombre = grafica.get('nombre')
+        if nombre and (os.path.basename(nombre) != nombre or '/' in nombre or '\\' in nombre
+                       or nombre in ('.', '..')):
+            raise ValueError("La gráfica {} tiene un nombre de fichero no válido: {!r}".format(i, nombre))
+        # Sin nombre se usa el número y el tipo, que también puede coincidir con uno explícito
+        nombre = nombre or '{:02d}_{}'.format(i + 1, grafica['tipo'])
+        if nombre in nombres:
+            raise ValueError("La gráfica {} repite el nombre de la gráfica {}: {!r}".format(
+                i, nombres.index(nombre), nombre))
+        nombres.append(nombre)
+    if cubo is None:
+        cubo = cubo_etiqueta_año(preguntas, backend=backend)
+    graficas = []
+    for grafica, nombre in zip(especificacion, nombres):
+        etiquetas = list(grafica['etiquetas'])
+        preparada = {'tipo': grafica['tipo'], 'etiquetas': etiquetas, 'nombre': nombre,
+                     'titulo': grafica.get('titulo', '')}
+        if grafica['tipo'] == 'distribucion':
+            preparada['tamaños'] = [sum(cubo.get(e, {}).values()) for e in etiquetas]
+        else:
+            preparada['años'], preparada['evoluciones'] = calcular_evoluciones(cubo, etiquetas)
+        graficas.append(preparada)
+    return graficas
+
+
+def dibujar_grafica(grafica, fichero):
+    ''' Dibuja una gráfica preparada con preparar_graficas y la guarda en un fichero (.png o .svg)
+    '''
+    from matplotlib.figure import Figure
+    figura = Figure()
+    ejes = figura.add_subplot()
+    if grafica['tipo'] == 'distribucion':
+        dibujar_tarta(ejes, grafica['tamaños'], grafica['etiquetas'])
+    else:
+        dibujar_evolucion(ejes, grafica['años'], grafica['evoluciones'], grafica['etiquetas'])
+    if grafica['titulo']:
+        ejes.set_title(grafica['titulo'])
+    figura.savefig(fichero)
+    return fichero
+
+
+def escribir_indice(graficas, ficheros, directorio, titulo='Informe de preguntas'):
+    ''' Escribe la página index.html del informe y devuelve su nombre
+    '''
+    indice = os.path.join(directorio, 'index.html')
+    with open(indice, 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"><title>{0}</title></head>\n'
+                '<body>\n<h1>{0}</h1>\n'.format(html.escape(titulo)))
+        for grafica, fichero in zip(graficas, ficheros):
+            f.write('<h2>{}</h2>\n<p>{}</p>\n<img src="{}">\n'.format(
+                html.escape(grafica['titulo'] or grafica['nombre']),
+                html.escape(', '.join(grafica['etiquetas'])),
+                html.escape(os.path.basename(fichero))))
+        f.write('</body>\n</html>\n')
+    return indice
+
+
+def generar_informe(preguntas, especificacion, directorio, formato='png', procesos=1,
+                    titulo='Informe de preguntas', backend='python'):
+    ''' Genera todas las gráficas de una especificación en un directorio, con una página índice
+
+    ENTRADA:
+       - preguntas: colección de preguntas (puntuacion, titulo, año, etiqueta)
+                    -> [Pregunta(int, str, int, str)] | PreguntasStore
+       - especificacion: lista de gráficas (ver el formato en la documentación del módulo) -> [dict]
+       - directorio: directorio de salida; se crea si no existe -> str
+       - formato: 'png' o 'svg' -> str
+       - procesos: número de procesos entre los que se reparte el dibujo de las gráficas -> int
+       - titulo: título de la página índice -> str
+       - backend: 'python' o 'numpy', usado para calcular el cubo -> str
+    SALIDA:
+       - nombre de la página index.html generada -> str
+    '''
+    if formato not in ('png', 'svg'):
+        raise ValueError("formato debe ser 'png' o 'svg': {!r}".format(formato))
+    graficas = preparar_graficas(preguntas, especificacion, backend=backend)
+    os.makedirs(directorio, exist_ok=True)
+    ficheros = [os.path.join(directorio, '{}.{}'.format(g['nombre'], formato)) for g in graficas]
+    if procesos > 1 and len(graficas) > 1:
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            list(ejecutor.map(dibujar_grafica, graficas, ficheros))
+    else:
+        list(map(dibujar_grafica, graficas, ficheros))
+    return escribir_indice(graficas, ficheros, directorio, titulo)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Genera las gráficas de un informe de preguntas')
+    parser.add_argument('especificacion', help='fichero JSON con la lista de gráficas')
+    parser.add_argument('directorio', help='directorio de salida')
+    parser.add_argument('--fichero', default='../data/stackoverflow_python_questions.csv',
+                        help='fichero CSV de preguntas')
+    parser.add_argument('--formato', choices=('png', 'svg'), default='png')
+    parser.add_argument('--procesos', type=int, default=1, help='procesos para dibujar las gráficas')
+    argumentos = parser.parse_args()
+
+    with open(argumentos.especificacion, encoding='utf-8') as f:
+        especificacion = json.load(f)
+    indice = generar_informe(leer_preguntas(argumentos.fichero), especificacion, argumentos.directorio,
+                             argumentos.formato, argumentos.procesos)
+    print(indice)
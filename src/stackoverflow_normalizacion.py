@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+''' Normalización de los títulos de las preguntas en una sola pasada
+
+normalizar_titulo aplica a cada título, en este orden:
+
+    - reparación de mojibake: texto UTF-8 que se decodificó como cp1252 (o latin-1) una o
+      varias veces, como 'vÃƒÂ­a' (vía) o 'WhatÃ¢Â€Â™s' (What’s). Cada tramo sospechoso se
+      vuelve a codificar en cp1252, con latin-1 para los caracteres que cp1252 no tiene, y
+      se decodifica como UTF-8; si no es UTF-8 válido, el tramo se deja como estaba
+    - normalización Unicode NFC
+    - paso a minúsculas y separación en términos por cualquier espacio en blanco (espacios
+      repetidos, tabuladores, espacios de no separación...)
+    - eliminación de los símbolos de SIMBOLOS en los extremos de cada término, y descarte
+      de los términos que no estén formados solo por letras
+
+El resultado es el título normalizado: sus términos separados por un espacio. Las palabras
+clave son esos términos menos las stopwords (palabras_clave_normalizadas), así que basta con
+normalizar cada título una vez y guardarlo. Con títulos sin esos problemas, las palabras
+clave coinciden con las de calcular_palabras_clave.
+
+Los títulos ASCII (casi todos) no necesitan reparación ni NFC y pasan directamente a la
+separación en términos.
+
+PreguntasNormalizadas guarda los títulos normalizados junto a las preguntas (y en disco junto
+al fichero, con cargar_agregado); contar_palabras_clave_normalizadas y
+MatrizDocumentoTermino.desde_preguntas(..., normalizados=True) los usan en lugar de volver a
+procesar los títulos.
+
+Como la normalización repara y separa algunos títulos de otra forma, sus recuentos pueden
+diferir de los de contar_palabras_clave, que sigue procesando los títulos originales también
+con una PreguntasNormalizadas (igual que MatrizDocumentoTermino si no se pide lo contrario).
+Para contar con los títulos normalizados hay que usar contar_palabras_clave_normalizadas.
+'''
+
+import codecs
+import re
+import unicodedata
+from collections import Counter
+
+from stackoverflow_SOLUCION import leer_preguntas, ordenar_frecuencias, SIMBOLOS
+from stackoverflow_cache import cargar_agregado
+from stackoverflow_paralelo import fragmentar, mapear
+
+
+def _bytes_continuacion():
+    # Caracteres en los que se convierten los bytes de continuación UTF-8 (0x80-0xBF) al
+    # decodificarlos como latin-1 o como cp1252 (si cp1252 los define)
+    caracteres = []
+    for byte in range(0x80, 0xC0):
+        caracteres.append(chr(byte))
+        caracteres.append(bytes([byte]).decode('cp1252', errors='ignore'))
+    return ''.join(caracteres)
+
+
+# Tramo de mojibake: uno o varios bytes iniciales de UTF-8 (0xC2-0xF4, que en cp1252 y
+# latin-1 son 'Â'-'ô') seguidos de bytes de continuación
+MOJIBAKE = re.compile('(?:[\xc2-\xf4][{}]+)+'.format(re.escape(_bytes_continuacion())))
+MAXIMO_RONDAS = 3
+
+
+def _latin1_si_falta(error):
+    # Los caracteres que cp1252 no puede codificar se codifican en latin-1 (si tampoco se
+    # puede, el error se propaga y el tramo no se repara)
+    return error.object[error.start:error.end].encode('latin-1'), error.end
+
+
+codecs.register_error('stackoverflow_latin1', _latin1_si_falta)
+
+
+def _reparar_tramo(coincidencia):
+    tramo = coincidencia.group()
+    try:
+        return tramo.encode('cp1252', 'stackoverflow_latin1').decode('utf-8')
+    except UnicodeError:
+        return tramo
+
+
+def reparar_mojibake(texto):
+    ''' Deshace la decodificación errónea de texto UTF-8 como cp1252 o latin-1
+
+    ENTRADA:
+       - texto: texto que puede contener mojibake -> str
+    SALIDA:
+       - texto reparado; los tramos que no son mojibake se devuelven sin cambios -> str
+    '''
+    # Cada ronda deshace una decodificación errónea
+    for _ in range(MAXIMO_RONDAS):
+        reparado = MOJIBAKE.sub(_reparar_tramo, texto)
+        if reparado == texto:
+            break
+        texto = reparado
+    return texto
+
+
+def normalizar_titulo(titulo):
+    ''' Normaliza un título: repara el mojibake, aplica NFC y lo separa en términos
+
+    ENTRADA:
+       - titulo: título de una pregunta -> str
+    SALIDA:
+       - términos del título, en minúsculas y formados solo por letras, separados por un
+         espacio -> str
+    '''
+    if not titulo.isascii():
+        titulo = unicodedata.normalize('NFC', reparar_mojibake(titulo))
+    return ' '.join([t for t in (t.strip(SIMBOLOS) for t in titulo.lower().split()) if t.isalpha()])
+
+
+def normalizar_titulos(titulos, procesos=1, tamaño_lote=None):
+    ''' Normaliza una columna de títulos
+
+    ENTRADA:
+       - titulos: títulos de las preguntas -> [str]
+       - procesos: número de procesos entre los que se reparte la columna -> int
+       - tamaño_lote: número de títulos de cada fragmento con varios procesos; por defecto
+                      se reparten cuatro fragmentos por proceso -> int
+    SALIDA:
+       - títulos normalizados, en el mismo orden -> [str]
+    '''
+    if procesos > 1 and len(titulos) > 1:
+        normalizados = []
+        for parcial in mapear(_normalizar_fragmento, fragmentar(list(titulos), procesos, tamaño_lote), procesos):
+            normalizados.extend(parcial)
+        return normalizados
+    return _normalizar_fragmento(titulos)
+
+
+def _normalizar_fragmento(titulos):
+    return list(map(normalizar_titulo, titulos))
+
+
+def palabras_clave_normalizadas(normalizado, stopwords=frozenset()):
+    ''' Devuelve las palabras clave de un título normalizado con normalizar_titulo
+
+    ENTRADA:
+       - normalizado: título normalizado -> str
+       - stopwords: palabras huecas, consideradas no relevantes como palabras clave -> frozenset(str)
+    SALIDA:
+       - lista de palabras clave del título  -> [str]
+    '''
+    return [t for t in normalizado.split() if t not in stopwords]
+
+
+class PreguntasNormalizadas:
+    ''' Colección de preguntas con sus títulos normalizados
+    '''
+
+    def __init__(self, preguntas, normalizados=None, procesos=1):
+        ''' Crea la colección, normalizando los títulos si no se reciben
+
+        ENTRADA:
+           - preguntas: colección de preguntas (puntuacion, titulo, año, etiqueta)
+                        -> [Pregunta(int, str, int, str)] | PreguntasStore
+           - normalizados: títulos ya normalizados, alineados con las preguntas -> [str]
+           - procesos: número de procesos para normalizar los títulos -> int
+        '''
+        self.preguntas = preguntas
+        if normalizados is None:
+            normalizados = normalizar_titulos([p.titulo for p in preguntas], procesos)
+        elif len(normalizados) != len(preguntas):
+            raise ValueError('Hay {} títulos normalizados para {} preguntas'.format(
+                len(normalizados), len(preguntas)))
+        self.titulos_normalizados = normalizados
+
+    @classmethod
+    def desde_fichero(cls, fichero, procesos=1):
+        ''' Lee las preguntas de un fichero; los títulos normalizados se guardan a su lado y
+        solo se recalculan si cambia el fichero
+        '''
+        preguntas = leer_preguntas(fichero)
+        normalizados = cargar_agregado(fichero, 'titulos_normalizados',
+                                       lambda: normalizar_titulos([p.titulo for p in preguntas], procesos))
+        return cls(preguntas, normalizados)
+
+    def __len__(self):
+        return len(self.preguntas)
+
+    def __iter__(self):
+        return iter(self.preguntas)
+
+    def __getitem__(self, i):
+        return self.preguntas[i]
+
+    def palabras_clave(self, i, stopwords=frozenset()):
+        ''' Devuelve las palabras clave del título de la pregunta i
+        '''
+        return palabras_clave_normalizadas(self.titulos_normalizados[i], stopwords)
+
+
+def contar_palabras_clave_normalizadas(normalizadas, stopwords=frozenset(), top_n=None):
+    ''' Calcula las frecuencias de las palabras clave a partir de los títulos normalizados
+
+    Es la versión de contar_palabras_clave sobre los títulos normalizados: no vuelve a procesar
+    los títulos, pero sus recuentos pueden diferir en los títulos que la normalización repara.
+
+    ENTRADA:
+       - normalizadas: preguntas con sus títulos normalizados -> PreguntasNormalizadas
+       - stopwords: palabras huecas, consideradas no relevantes como palabras clave
+       - top_n: si no es None, solo se devuelven los top_n términos más frecuentes -> int
+    SALIDA:
+       - lista de tuplas (termino, frecuencia) ordenada de mayor a menor frecuencia  -> [(str, int)]
+    '''
+    stopwords = frozenset(stopwords)
+    frecuencias = Counter()
+    for normalizado in normalizadas.titulos_normalizados:
+        frecuencias.update([t for t in normalizado.split() if t not in stopwords])
+    return ordenar_frecuencias(frecuencias, top_n)
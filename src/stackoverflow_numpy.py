@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+''' Backend NumPy para los cálculos numéricos sobre las preguntas
+
+Las funciones de stackoverflow_SOLUCION que reciben backend='numpy' delegan en este módulo,
+que trabaja sobre columnas de enteros en lugar de recorrer las tuplas con nombre:
+
+    - filtrar_por_año: máscara booleana sobre la columna de años
+    - contar_etiquetas: bincount sobre los códigos de etiqueta
+    - cubo_etiqueta_año: bincount de dos dimensiones sobre (código de etiqueta, año)
+    - calcular_preguntas_mejor_valoradas: argpartition sobre las puntuaciones
+
+Con un PreguntasStore las columnas se copian directamente de sus arrays. Con una lista de
+preguntas hay que construirlas recorriéndola. En los dos casos columnas_numpy las guarda en
+la colección (en la ListaPreguntas que devuelve leer_preguntas) y las reutiliza mientras no
+cambie. Con una list normal se construyen en cada llamada, sin guardarlas; también se pueden
+calcular una vez y pasar en el parámetro 'columnas' de cada función.
+
+Los resultados son idénticos a los del backend 'python', incluido el orden de los empates.
+'''
+
+from collections import Counter, namedtuple
+
+import numpy as np
+
+ColumnasNumpy = namedtuple('ColumnasNumpy', 'puntuaciones, años, codigos_etiqueta, etiquetas')
+
+
+def columnas_numpy(preguntas):
+    ''' Devuelve las columnas numéricas de una colección de preguntas como arrays de NumPy
+
+    Si la colección admite atributos (ListaPreguntas, PreguntasStore...), las columnas se
+    guardan en ella y se reutilizan en las llamadas siguientes mientras no cambie. Una
+    ListaPreguntas las descarta al modificarse; un PreguntasStore solo crece, así que basta
+    con comprobar su longitud.
+
+    ENTRADA:
+       - preguntas: colección de preguntas (puntuacion, titulo, año, etiqueta)
+                    -> [Pregunta(int, str, int, str)] | PreguntasStore
+    SALIDA:
+       - columnas de puntuaciones, años y códigos de etiqueta, y el vocabulario de etiquetas
+         indexado por código  -> ColumnasNumpy(np.ndarray, np.ndarray, np.ndarray, [str])
+    '''
+    guardadas = getattr(preguntas, '_columnas_numpy', None)
+    if guardadas is not None and guardadas[0] == len(preguntas):
+        return guardadas[1]
+    columnas = _construir_columnas(preguntas)
+    try:
+        preguntas._columnas_numpy = (len(preguntas), columnas)
+    except AttributeError:
+        pass
+    return columnas
+
+
+def olvidar_columnas(preguntas):
+    ''' Descarta las columnas guardadas en una colección por columnas_numpy
+    '''
+    if getattr(preguntas, '_columnas_numpy', None) is not None:
+        preguntas._columnas_numpy = None
+
+
+def _construir_columnas(preguntas):
+    if hasattr(preguntas, 'codigos_etiqueta'):
+        return ColumnasNumpy(np.array(preguntas.puntuaciones, dtype=np.int64),
+                             np.array(preguntas.años, dtype=np.int64),
+                             np.array(preguntas.codigos_etiqueta, dtype=np.int64),
+                             list(preguntas.etiquetas))
+    n = len(preguntas)
+    codigos = dict()
+    return ColumnasNumpy(np.fromiter((p.puntuacion for p in preguntas), dtype=np.int64, count=n),
+                         np.fromiter((p.año for p in preguntas), dtype=np.int64, count=n),
+                         np.fromiter((codigos.setdefault(p.etiqueta, len(codigos)) for p in preguntas),
+                                     dtype=np.int64, count=n),
+                         list(codigos))
+
+
+def filtrar_por_año(preguntas, año, columnas=None):
+    columnas = columnas or columnas_numpy(preguntas)
+    return [preguntas[i] for i in np.flatnonzero(columnas.años == año).tolist()]
+
+
+def contar_etiquetas(preguntas, columnas=None):
+    columnas = columnas or columnas_numpy(preguntas)
+    frecuencias = np.bincount(columnas.codigos_etiqueta, minlength=len(columnas.etiquetas))
+    etiquetas = columnas.etiquetas
+    codigos = np.flatnonzero(frecuencias)
+    # Los códigos siguen el orden de primera aparición, igual que las claves de Counter
+    return dict(zip([etiquetas[c] for c in codigos.tolist()], frecuencias[codigos].tolist()))
+
+
+def calcular_preguntas_mejor_valoradas(preguntas, limite=10, columnas=None):
+    columnas = columnas or columnas_numpy(preguntas)
+    puntuaciones = columnas.puntuaciones
+    n = len(puntuaciones)
+    limite = min(limite, n)
+    if limite <= 0:
+        return []
+    if limite < n:
+        # Umbral: la puntuación que ocupa la posición 'limite' de mayor a menor. Se toman
+        # todas las candidatas que lo alcanzan para poder desempatar por posición
+        umbral = puntuaciones[np.argpartition(puntuaciones, n - limite)[n - limite]]
+        candidatas = np.flatnonzero(puntuaciones >= umbral)
+    else:
+        candidatas = np.arange(n)
+    # lexsort ordena por la última clave: puntuación descendente y, a igualdad, posición
+    orden = candidatas[np.lexsort((candidatas, -puntuaciones[candidatas]))][:limite]
+    return [(preguntas[i].titulo, int(puntuaciones[i])) for i in orden.tolist()]
+
+
+def cubo_etiqueta_año(preguntas, medida='frecuencia', columnas=None):
+    columnas = columnas or columnas_numpy(preguntas)
+    if len(columnas.años) == 0:
+        return dict()
+    años, indice_año = np.unique(columnas.años, return_inverse=True)
+    celdas = columnas.codigos_etiqueta * len(años) + indice_año
+    tamaño = len(columnas.etiquetas) * len(años)
+    frecuencias = np.bincount(celdas, minlength=tamaño).reshape(-1, len(años))
+    if medida == 'frecuencia':
+        valores = frecuencias
+    else:
+        # Las sumas con pesos se calculan en coma flotante; son exactas para enteros < 2**53
+        valores = np.rint(np.bincount(celdas, weights=columnas.puntuaciones, minlength=tamaño))
+        valores = valores.astype(np.int64).reshape(-1, len(años))
+    # Solo se convierten a objetos de Python las celdas no vacías, recorridas por filas
+    filas, columnas_año = np.nonzero(frecuencias)
+    años = años[columnas_año].tolist()
+    cuentas = frecuencias[filas, columnas_año].tolist()
+    valores = valores[filas, columnas_año].tolist()
+    etiquetas = columnas.etiquetas
+    cubo = dict()
+    for codigo, año, n, valor in zip(filas.tolist(), años, cuentas, valores):
+        por_año = cubo.get(etiquetas[codigo])
+        if por_año is None:
+            por_año = cubo[etiquetas[codigo]] = dict() if medida == 'media' else Counter()
+        por_año[año] = valor / n if medida == 'media' else valor
+    return cubo
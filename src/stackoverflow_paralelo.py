@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+''' Versiones paralelas (varios procesos) de las funciones de recuento
+
+Cada función divide la colección de preguntas en fragmentos consecutivos, calcula en un
+proceso distinto el resultado parcial de cada fragmento (map) y combina los parciales en el
+orden de los fragmentos (reduce). A los procesos solo se envía la columna que necesita cada
+recuento (etiquetas, títulos o años), no las preguntas completas.
+
+Como los parciales se combinan en orden, el orden de primera aparición de cada clave es el
+mismo que en la versión secuencial, y los resultados son idénticos, incluido el orden de los
+empates en contar_palabras_clave.
+
+fragmentar y mapear son las dos mitades de ese esquema y se pueden usar para paralelizar otros
+cálculos por columnas (por ejemplo, normalizar_titulos en stackoverflow_normalizacion).
+
+Con el parámetro 'aproximado' cada proceso cuenta su fragmento con un contador aproximado
+vacío del mismo tipo (ver stackoverflow_aproximado) y los parciales se combinan con combinar.
+'''
+
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from stackoverflow_SOLUCION import extractor_palabras_clave, ordenar_frecuencias
+
+
+def fragmentar(columna, procesos, tamaño_lote=None):
+    ''' Divide una columna en fragmentos consecutivos de tamaño_lote elementos
+
+    ENTRADA:
+       - columna: valores que se reparten entre los procesos -> list
+       - procesos: número de procesos entre los que se reparten los fragmentos -> int
+       - tamaño_lote: número de elementos de cada fragmento; por defecto se hacen cuatro
+                      fragmentos por proceso -> int
+    SALIDA:
+       - fragmentos consecutivos de la columna, en orden -> [list]
+    '''
+    if tamaño_lote is None:
+        # Cuatro fragmentos por proceso para repartir mejor la carga
+        tamaño_lote = max(1, -(-len(columna) // (procesos * 4)))
+    return [columna[i:i + tamaño_lote] for i in range(0, len(columna), tamaño_lote)]
+
+
+def mapear(funcion, fragmentos, procesos, *args):
+    ''' Aplica una función a cada fragmento en un proceso y devuelve los resultados en orden
+
+    ENTRADA:
+       - funcion: función de nivel de módulo (para poder enviarla a otro proceso) que recibe
+                  un fragmento y los parámetros args
+       - fragmentos: fragmentos de una columna, como los que devuelve fragmentar -> [list]
+       - procesos: número máximo de procesos -> int
+       - args: parámetros adicionales, iguales para todos los fragmentos
+    SALIDA:
+       - resultado de la función para cada fragmento, en el orden de los fragmentos -> list
+    '''
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        return list(ejecutor.map(funcion, fragmentos, *([a] * len(fragmentos) for a in args)))
+
+
+def _contar(etiquetas, aproximado=None):
+    frecuencias = Counter() if aproximado is None else aproximado.vacio()
+    frecuencias.update(etiquetas)
+    return frecuencias
+
+
+def _contar_palabras(titulos, stopwords, aproximado=None):
+    frecuencias = Counter() if aproximado is None else aproximado.vacio()
+    extraer = extractor_palabras_clave()
+    for titulo in titulos:
+        frecuencias.update(extraer(titulo, stopwords))
+    return frecuencias
+
+
+def _indices_por_año(años):
+    indices_por_año = dict()
+    for i, año in enumerate(años):
+        indices_por_año.setdefault(año, []).append(i)
+    return indices_por_año
+
+
+def contar_etiquetas_paralelo(preguntas, procesos=None, tamaño_lote=None, aproximado=None):
+    ''' Calcula las frecuencias de las etiquetas de una lista de preguntas usando varios procesos
+
+    ENTRADA:
+       - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
+       - procesos: número de procesos; por defecto, el número de procesadores -> int
+       - tamaño_lote: número de preguntas de cada fragmento; por defecto se reparten
+                      cuatro fragmentos por proceso -> int
+       - aproximado: si no es None, contador aproximado en el que se combinan los parciales
+                                           -> ContadorSpaceSaving | ContadorCountMin
+    SALIDA:
+       - diccionario cuyas claves son las etiquetas y los valores las frecuecias  -> {str: int}
+    '''
+    procesos = procesos or os.cpu_count()
+    fragmentos = fragmentar([p.etiqueta for p in preguntas], procesos, tamaño_lote)
+    parciales = mapear(_contar, fragmentos, procesos, aproximado)
+    if aproximado is not None:
+        for parcial in parciales:
+            aproximado.combinar(parcial)
+        return dict(aproximado.items())
+    frecuencias = Counter()
+    for parcial in parciales:
+        frecuencias.update(parcial)
+    return dict(frecuencias)
+
+
+def contar_palabras_clave_paralelo(preguntas, stopwords=frozenset(), top_n=None,
+                                   procesos=None, tamaño_lote=None, aproximado=None):
+    ''' Calcula las frecuencias de las palabras clave de una lista de preguntas usando varios procesos
+
+    ENTRADA:
+       - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
+       - stopwords: palabras huecas, consideradas no relevantes como palabras clave
+       - top_n: si no es None, solo se devuelven los top_n términos más frecuentes -> int
+       - procesos: número de procesos; por defecto, el número de procesadores -> int
+       - tamaño_lote: número de preguntas de cada fragmento; por defecto se reparten
+                      cuatro fragmentos por proceso -> int
+       - aproximado: si no es None, contador aproximado en el que se combinan los parciales
+                                           -> ContadorSpaceSaving | ContadorCountMin
+    SALIDA:
+       - lista de tuplas (termino, frecuencia) ordenada de mayor a menor frecuencia  -> [(str, int)]
+    '''
+    procesos = procesos or os.cpu_count()
+    fragmentos = fragmentar([p.titulo for p in preguntas], procesos, tamaño_lote)
+    parciales = mapear(_contar_palabras, fragmentos, procesos, frozenset(stopwords), aproximado)
+    if aproximado is not None:
+        for parcial in parciales:
+            aproximado.combinar(parcial)
+        return ordenar_frecuencias(aproximado, top_n)
+    frecuencias = Counter()
+    for parcial in parciales:
+        frecuencias.update(parcial)
+    return ordenar_frecuencias(frecuencias, top_n)
+
+
+def agrupar_preguntas_por_año_paralelo(preguntas, procesos=None, tamaño_lote=None):
+    ''' Calcula un diccionario con una lista de preguntas por cada año usando varios procesos
+
+    Los procesos solo reciben los años y devuelven posiciones; las listas se construyen con
+    las preguntas originales, sin copiarlas entre procesos.
+
+    ENTRADA:
+       - preguntas: lista de preguntas (puntuacion, titulo, año, etiqueta) -> [Pregunta(int, str, int, str)]
+       - procesos: número de procesos; por defecto, el número de procesadores -> int
+       - tamaño_lote: número de preguntas de cada fragmento; por defecto se reparten
+                      cuatro fragmentos por proceso -> int
+    SALIDA:
+       - diccionario cuyas claves son los años y los valores la lista de preguntas de cada año
+                               -> {int: [Pregunta(int, str, int, str)]}
+    '''
+    procesos = procesos or os.cpu_count()
+    preguntas = list(preguntas)
+    fragmentos = fragmentar([p.año for p in preguntas], procesos, tamaño_lote)
+    preguntas_por_año = dict()
+    inicio = 0
+    for fragmento, parcial in zip(fragmentos, mapear(_indices_por_año, fragmentos, procesos)):
+        for año, indices in parcial.items():
+            preguntas_por_año.setdefault(año, []).extend(preguntas[inicio + i] for i in indices)
+        inicio += len(fragmento)
+    return preguntas_por_año
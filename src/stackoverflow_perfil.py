@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+''' Instrumentación de las funciones de análisis de preguntas
+
+Las funciones de stackoverflow_SOLUCION están decoradas con instrumentar. Mientras la
+instrumentación está desactivada (por defecto) el decorador solo añade una comprobación por
+llamada. Cuando está activa, registra para cada función:
+
+    - llamadas: número de llamadas
+    - segundos: tiempo de reloj acumulado
+    - filas: número de preguntas procesadas (o devueltas, en las funciones de lectura)
+    - memoria_neta: bytes reservados por las llamadas que siguen vivos al terminar
+    - memoria_pico: máximo de bytes reservados durante una llamada, también en las llamadas
+      anidadas dentro de otra función instrumentada
+
+Las medidas de memoria usan tracemalloc y solo se toman si se pide expresamente, porque
+ralentizan mucho la ejecución. tracemalloc solo tiene un pico para todo el proceso: cada llamada
+lo reinicia al empezar y, al terminar, pasa a la llamada que la contiene (en el mismo hilo) el
+máximo que ha visto, para que el pico de esta incluya lo anterior a la llamada anidada. Con
+varios hilos a la vez, el pico de cada llamada incluye también lo que reservan los demás.
+
+ACTIVACIÓN:
+-----------
+    - con el gestor de contexto perfilando:
+
+        with perfilando(memoria=True, fichero_pstats='informe.pstats'):
+            contar_palabras_clave(preguntas, stopwords)
+        print(informe_perfil())
+
+    - con variables de entorno, para todo el proceso. El informe se escribe en la salida de
+      errores al terminar:
+        STACKOVERFLOW_PERFIL=1                activa la instrumentación
+        STACKOVERFLOW_PERFIL_MEMORIA=1        mide también la memoria
+        STACKOVERFLOW_PERFIL_PSTATS=<fichero> guarda además un perfil de cProfile
+'''
+
+import atexit
+import cProfile
+import json
+import os
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+
+_activo = False
+_memoria = False
+_registros = dict()
+# Por hilo: pila con el máximo de memoria reservada visto en cada llamada instrumentada en curso
+_hilo = threading.local()
+
+
+def instrumentar(funcion=None, *, filas='entrada'):
+    ''' Decorador que registra el tiempo, llamadas, filas y memoria de una función
+
+    ENTRADA:
+       - funcion: función decorada
+       - filas: de dónde se obtiene el número de filas procesadas: 'entrada' (longitud del
+                primer parámetro), 'salida' (longitud del resultado) o None (una por llamada) -> str
+    '''
+    if funcion is None:
+        return lambda f: instrumentar(f, filas=filas)
+    nombre = funcion.__name__
+
+    @wraps(funcion)
+    def envoltorio(*args, **kwargs):
+        if not _activo:
+            return funcion(*args, **kwargs)
+        return _medir(funcion, nombre, filas, args, kwargs)
+    return envoltorio
+
+
+def _medir(funcion, nombre, filas, args, kwargs):
+    memoria = _memoria and tracemalloc.is_tracing()
+    if memoria:
+        picos = getattr(_hilo, 'picos', None)
+        if picos is None:
+            picos = _hilo.picos = []
+        memoria_inicial, pico_anterior = tracemalloc.get_traced_memory()
+        if picos:
+            # El pico de la llamada que contiene a esta no se pierde al reiniciarlo
+            picos[-1] = max(picos[-1], pico_anterior)
+        tracemalloc.reset_peak()
+        picos.append(memoria_inicial)
+    inicio = perf_counter()
+    try:
+        resultado = funcion(*args, **kwargs)
+    finally:
+        segundos = perf_counter() - inicio
+        if memoria:
+            actual, pico = tracemalloc.get_traced_memory()
+            pico = max(picos.pop(), pico)
+            if picos:
+                picos[-1] = max(picos[-1], pico)
+    registro = _registros.get(nombre)
+    if registro is None:
+        registro = _registros[nombre] = {'llamadas': 0, 'segundos': 0.0, 'filas': 0,
+                                         'memoria_neta': 0, 'memoria_pico': 0}
+    registro['llamadas'] += 1
+    registro['segundos'] += segundos
+    registro['filas'] += _contar_filas(filas, args, resultado)
+    if memoria:
+        registro['memoria_neta'] += actual - memoria_inicial
+        registro['memoria_pico'] = max(registro['memoria_pico'], pico - memoria_inicial)
+    return resultado
+
+
+def _contar_filas(filas, args, resultado):
+    objeto = args[0] if filas == 'entrada' and args else resultado if filas == 'salida' else None
+    if objeto is None or isinstance(objeto, str) or not hasattr(objeto, '__len__'):
+        return 1
+    return len(objeto)
+
+
+def perfil_activo():
+    ''' Indica si la instrumentación está activa
+    '''
+    return _activo
+
+
+@contextmanager
+def perfilando(memoria=False, fichero_pstats=None):
+    ''' Activa la instrumentación dentro de un bloque with
+
+    Los registros se acumulan con los de activaciones anteriores; se pueden borrar con
+    reiniciar_perfil.
+
+    ENTRADA:
+       - memoria: si es True se miden también las reservas de memoria con tracemalloc -> bool
+       - fichero_pstats: si no es None, se ejecuta el bloque bajo cProfile y se guarda el perfil
+                         en este fichero, que se puede analizar con el módulo pstats -> str
+    SALIDA:
+       - registros de la instrumentación, por nombre de función -> {str: {str: int | float}}
+    '''
+    global _activo, _memoria
+    anterior = _activo, _memoria
+    iniciar_tracemalloc = memoria and not tracemalloc.is_tracing()
+    if iniciar_tracemalloc:
+        tracemalloc.start()
+    perfilador = cProfile.Profile() if fichero_pstats else None
+    _activo, _memoria = True, memoria
+    if perfilador is not None:
+        perfilador.enable()
+    try:
+        yield _registros
+    finally:
+        if perfilador is not None:
+            perfilador.disable()
+            perfilador.dump_stats(fichero_pstats)
+        _activo, _memoria = anterior
+        if iniciar_tracemalloc:
+            tracemalloc.stop()
+
+
+def registros_perfil():
+    ''' Devuelve una copia de los registros de la instrumentación
+    '''
+    return {nombre: dict(registro) for nombre, registro in _registros.items()}
+
+
+def reiniciar_perfil():
+    ''' Borra los registros de la instrumentación
+    '''
+    _registros.clear()
+
+
+def informe_perfil():
+    ''' Devuelve un informe en texto con los registros, de mayor a menor tiempo acumulado
+    '''
+    lineas = ['{:36s} {:>9s} {:>11s} {:>11s} {:>12s} {:>12s}'.format(
+        'función', 'llamadas', 'ms', 'filas', 'mem. neta', 'mem. pico')]
+    for nombre, r in sorted(_registros.items(), key=lambda x: x[1]['segundos'], reverse=True):
+        lineas.append('{:36s} {:9d} {:11.1f} {:11d} {:12d} {:12d}'.format(
+            nombre, r['llamadas'], r['segundos'] * 1000, r['filas'], r['memoria_neta'], r['memoria_pico']))
+    return '\n'.join(lineas)
+
+
+def guardar_perfil(fichero):
+    ''' Guarda los registros de la instrumentación en un fichero JSON
+    '''
+    with open(fichero, 'w', encoding='utf-8') as f:
+        json.dump(_registros, f, indent=2, ensure_ascii=False)
+
+
+def _activar_desde_entorno():
+    global _activo, _memoria
+    if os.environ.get('STACKOVERFLOW_PERFIL', '0') in ('', '0'):
+        return
+    _activo = True
+    _memoria = os.environ.get('STACKOVERFLOW_PERFIL_MEMORIA', '0') not in ('', '0')
+    if _memoria:
+        tracemalloc.start()
+    fichero_pstats = os.environ.get('STACKOVERFLOW_PERFIL_PSTATS')
+    perfilador = None
+    if fichero_pstats:
+        perfilador = cProfile.Profile()
+        perfilador.enable()
+
+    def terminar():
+        if perfilador is not None:
+            perfilador.disable()
+            perfilador.dump_stats(fichero_pstats)
+        print(informe_perfil(), file=sys.stderr)
+    atexit.register(terminar)
+
+
+_activar_desde_entorno()
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+''' Servicio HTTP local de consultas sobre las preguntas
+
+ServicioPreguntas carga las preguntas una sola vez y atiende consultas HTTP GET con asyncio.
+Solo escucha en 127.0.0.1. Cada consulta llama a una función de stackoverflow_SOLUCION en un
+ejecutor (un hilo aparte), de modo que el bucle de eventos sigue aceptando conexiones mientras
+se calcula; las respuestas se guardan en una caché con caducidad (TTL) y tamaño máximo (LRU)
+por ruta y parámetros, y si llegan a la vez varias consultas iguales se calcula una sola.
+
+RUTAS:
+------
+    /filtrar_por_año?año=2012
+    /calcular_etiquetas
+    /calcular_preguntas_mejor_valoradas?limite=10
+    /contar_etiquetas
+    /contar_palabras_clave?top_n=20
+    /metricas                  número de consultas y latencias p50/p99 (ms) de cada ruta,
+                               errores de cada ruta, y aciertos y fallos de la caché
+
+Las respuestas son JSON. Una ruta desconocida devuelve 404, una petición mal formada o unos
+parámetros incorrectos 400, más de MAXIMO_CABECERAS cabeceras (o más de MAXIMO_BYTES_CABECERAS
+bytes de cabeceras) 431, y un error inesperado al calcular la respuesta 500, con el error en el
+cuerpo JSON.
+
+En la caché solo cuenta como fallo la consulta que calcula la respuesta; las consultas iguales
+que esperan a ese mismo cálculo se cuentan aparte, como compartidas.
+
+USO:
+    python stackoverflow_servicio.py [--puerto 8000] [--fichero CSV] [--ttl 300] [--maximo-cache 256]
+'''
+
+import argparse
+import asyncio
+import json
+import math
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl, unquote
+
+from stackoverflow_SOLUCION import (Pregunta, leer_preguntas, filtrar_por_año, calcular_etiquetas,
+                                    calcular_preguntas_mejor_valoradas, contar_etiquetas,
+                                    contar_palabras_clave)
+
+HOST = '127.0.0.1'
+MUESTRAS_LATENCIA = 10000
+MAXIMO_CABECERAS = 100
+MAXIMO_BYTES_CABECERAS = 16384
+ESTADOS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           431: 'Request Header Fields Too Large', 500: 'Internal Server Error'}
+
+
+class PeticionIncorrecta(Exception):
+    ''' Petición HTTP que no se puede atender; 'estado' es el código de la respuesta
+    '''
+
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+class CacheTTL:
+    ''' Caché de tamaño máximo limitado (se descarta la entrada usada hace más tiempo) cuyas
+    entradas caducan ttl segundos después de guardarse
+    '''
+
+    def __init__(self, maximo=256, ttl=300):
+        self.maximo = maximo
+        self.ttl = ttl
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = OrderedDict()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def obtener(self, clave):
+        entrada = self._entradas.get(clave)
+        if entrada is None or time.monotonic() - entrada[0] > self.ttl:
+            if entrada is not None:
+                del self._entradas[clave]
+            self.fallos += 1
+            return None
+        self._entradas.move_to_end(clave)
+        self.aciertos += 1
+        return entrada[1]
+
+    def guardar(self, clave, valor):
+        self._entradas[clave] = (time.monotonic(), valor)
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.maximo:
+            self._entradas.popitem(last=False)
+
+
+def percentil(valores, p):
+    ''' Percentil p (entre 0 y 100) de una lista de valores, por el método del rango más cercano
+    '''
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+class ServicioPreguntas:
+    ''' Servicio de consultas sobre una colección de preguntas cargada en memoria
+    '''
+
+    def __init__(self, preguntas, stopwords=frozenset(), maximo_cache=256, ttl=300, hilos=None):
+        ''' Crea el servicio
+
+        ENTRADA:
+           - preguntas: colección de preguntas (puntuacion, titulo, año, etiqueta)
+                        -> [Pregunta(int, str, int, str)] | PreguntasStore
+           - stopwords: palabras huecas para contar_palabras_clave
+           - maximo_cache: número máximo de respuestas guardadas en la caché -> int
+           - ttl: segundos que una respuesta sigue siendo válida en la caché -> float
+           - hilos: número de hilos del ejecutor de las consultas; por defecto, el de
+                    ThreadPoolExecutor -> int
+        '''
+        self.preguntas = preguntas
+        self.stopwords = frozenset(stopwords)
+        self.cache = CacheTTL(maximo_cache, ttl)
+        self.ejecutor = ThreadPoolExecutor(max_workers=hilos)
+        self.latencias = dict()
+        self.errores = dict()
+        self.compartidas = 0
+        self._en_curso = dict()
+        # ruta -> (función que calcula la respuesta, parámetros admitidos y su conversión)
+        self.rutas = {
+            '/filtrar_por_año': (self._filtrar_por_año, {'año': int}),
+            '/calcular_etiquetas': (self._calcular_etiquetas, {}),
+            '/calcular_preguntas_mejor_valoradas': (self._calcular_preguntas_mejor_valoradas, {'limite': int}),
+            '/contar_etiquetas': (self._contar_etiquetas, {}),
+            '/contar_palabras_clave': (self._contar_palabras_clave, {'top_n': int}),
+        }
+
+    def _filtrar_por_año(self, año):
+        return [dict(zip(Pregunta._fields, p)) for p in filtrar_por_año(self.preguntas, año)]
+
+    def _calcular_etiquetas(self):
+        return sorted(calcular_etiquetas(self.preguntas))
+
+    def _calcular_preguntas_mejor_valoradas(self, limite=10):
+        return calcular_preguntas_mejor_valoradas(self.preguntas, limite)
+
+    def _contar_etiquetas(self):
+        return contar_etiquetas(self.preguntas)
+
+    def _contar_palabras_clave(self, top_n=None):
+        return contar_palabras_clave(self.preguntas, self.stopwords, top_n)
+
+    async def responder(self, objetivo):
+        ''' Calcula la respuesta a una consulta
+
+        ENTRADA:
+           - objetivo: ruta de la consulta con sus parámetros, p. ej. '/contar_palabras_clave?top_n=5' -> str
+        SALIDA:
+           - tupla (código de estado HTTP, cuerpo JSON de la respuesta) -> (int, bytes)
+        '''
+        partes = urlsplit(objetivo)
+        ruta = unquote(partes.path)
+        if ruta == '/metricas':
+            return 200, _json(self.metricas())
+        if ruta not in self.rutas:
+            return 404, _json({'error': 'Ruta desconocida: {}'.format(ruta)})
+        funcion, admitidos = self.rutas[ruta]
+        try:
+            parametros = {nombre: admitidos[nombre](valor) for nombre, valor in parse_qsl(partes.query)}
+        except (KeyError, ValueError) as e:
+            return 400, _json({'error': 'Parámetro incorrecto: {}'.format(e)})
+
+        clave = (ruta, tuple(sorted(parametros.items())))
+        try:
+            # Las consultas iguales que llegan mientras se calcula esperan al mismo resultado
+            futuro = self._en_curso.get(clave)
+            if futuro is not None:
+                self.compartidas += 1
+                return 200, await asyncio.shield(futuro)
+            cuerpo = self.cache.obtener(clave)
+            if cuerpo is None:
+                cuerpo = await self._calcular(clave, funcion, parametros)
+        except ValueError as e:
+            return 400, _json({'error': str(e)})
+        return 200, cuerpo
+
+    async def _calcular(self, clave, funcion, parametros):
+        bucle = asyncio.get_running_loop()
+        futuro = bucle.run_in_executor(self.ejecutor, lambda: _json(funcion(**parametros)))
+        self._en_curso[clave] = futuro
+        try:
+            cuerpo = await futuro
+        finally:
+            del self._en_curso[clave]
+        self.cache.guardar(clave, cuerpo)
+        return cuerpo
+
+    async def atender(self, lector, escritor):
+        ''' Atiende una conexión HTTP: lee una petición GET y escribe su respuesta
+        '''
+        try:
+            objetivo = None
+            try:
+                peticion = await leer_peticion(lector)
+            except PeticionIncorrecta as e:
+                estado, cuerpo = e.estado, _json({'error': str(e)})
+            else:
+                if peticion is None:
+                    # La conexión se cerró sin enviar ninguna petición
+                    return
+                inicio = time.perf_counter()
+                metodo, objetivo = peticion
+                if metodo != 'GET':
+                    estado, cuerpo = 405, _json({'error': 'Solo se admite GET'})
+                else:
+                    try:
+                        estado, cuerpo = await self.responder(objetivo)
+                    except Exception as e:
+                        estado, cuerpo = 500, _json({'error': 'Error interno: {!r}'.format(e)})
+            escritor.write('HTTP/1.1 {} {}\r\nContent-Type: application/json; charset=utf-8\r\n'
+                           'Content-Length: {}\r\nConnection: close\r\n\r\n'.format(
+                               estado, ESTADOS[estado], len(cuerpo)).encode('latin-1') + cuerpo)
+            await escritor.drain()
+            if objetivo is None:
+                return
+            ruta = unquote(urlsplit(objetivo).path)
+            if estado == 200:
+                self.latencias.setdefault(ruta, deque(maxlen=MUESTRAS_LATENCIA)).append(
+                    time.perf_counter() - inicio)
+            elif estado == 500:
+                self.errores[ruta] = self.errores.get(ruta, 0) + 1
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    def metricas(self):
+        ''' Devuelve el número de consultas y las latencias p50 y p99 (en ms) de cada ruta, el
+        número de errores (500) de cada ruta, y los aciertos, fallos y consultas compartidas de la caché
+        '''
+        rutas = {ruta: {'consultas': len(muestras),
+                        'p50_ms': percentil(muestras, 50) * 1000,
+                        'p99_ms': percentil(muestras, 99) * 1000}
+                 for ruta, muestras in self.latencias.items()}
+        return {'rutas': rutas,
+                'errores': dict(self.errores),
+                'cache': {'aciertos': self.cache.aciertos, 'fallos': self.cache.fallos,
+                          'compartidas': self.compartidas, 'entradas': len(self.cache)}}
+
+    async def iniciar(self, puerto=8000):
+        ''' Empieza a escuchar en 127.0.0.1 y devuelve el servidor de asyncio
+
+        ENTRADA:
+           - puerto: puerto TCP; con 0 se elige uno libre (ver servidor.sockets) -> int
+        SALIDA:
+           - servidor en marcha -> asyncio.Server
+        '''
+        return await asyncio.start_server(self.atender, HOST, puerto)
+
+    async def servir(self, puerto=8000):
+        ''' Atiende consultas indefinidamente
+        '''
+        servidor = await self.iniciar(puerto)
+        async with servidor:
+            await servidor.serve_forever()
+
+
+async def leer_peticion(lector):
+    ''' Lee la línea de petición y las cabeceras de una petición HTTP
+
+    ENTRADA:
+       - lector: flujo de la conexión -> asyncio.StreamReader
+    SALIDA:
+       - tupla (método, objetivo), o None si la conexión se cierra sin enviar nada -> (str, str)
+    Lanza PeticionIncorrecta con estado 400 si la línea de petición está mal formada, y con
+    estado 431 si las cabeceras superan MAXIMO_CABECERAS o MAXIMO_BYTES_CABECERAS.
+    '''
+    try:
+        linea = await lector.readline()
+    except ValueError:
+        # Línea más larga que el límite del StreamReader
+        raise PeticionIncorrecta(400, 'Línea de petición demasiado larga')
+    if not linea:
+        return None
+    partes = linea.decode('latin-1').rstrip('\r\n').split(' ')
+    if len(partes) != 3 or not partes[1].startswith('/') or not partes[2].startswith('HTTP/'):
+        raise PeticionIncorrecta(400, 'Línea de petición mal formada')
+    cabeceras = bytes_cabeceras = 0
+    while True:
+        try:
+            cabecera = await lector.readline()
+        except ValueError:
+            raise PeticionIncorrecta(431, 'Cabecera demasiado larga')
+        if cabecera in (b'\r\n', b'\n', b''):
+            break
+        cabeceras += 1
+        bytes_cabeceras += len(cabecera)
+        if cabeceras > MAXIMO_CABECERAS or bytes_cabeceras > MAXIMO_BYTES_CABECERAS:
+            raise PeticionIncorrecta(431, 'Demasiadas cabeceras')
+    return partes[0], partes[1]
+
+
+def consultar(puerto, objetivo):
+    ''' Hace una consulta GET al servicio local y devuelve (código de estado, respuesta decodificada)
+
+    Es una función bloqueante (urllib), pensada para pruebas y medidas.
+    '''
+    try:
+        with urllib.request.urlopen('http://{}:{}{}'.format(HOST, puerto, objetivo)) as respuesta:
+            return respuesta.status, json.loads(respuesta.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+def _json(datos):
+    return json.dumps(datos, ensure_ascii=False).encode('utf-8')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Servicio HTTP local de consultas sobre las preguntas')
+    parser.add_argument('--puerto', type=int, default=8000)
+    parser.add_argument('--fichero', default='../data/stackoverflow_python_questions.csv')
+    parser.add_argument('--stopwords', default='../data/stopwords.txt')
+    parser.add_argument('--ttl', type=float, default=300, help='segundos de validez de las respuestas')
+    parser.add_argument('--maximo-cache', type=int, default=256, help='respuestas guardadas como máximo')
+    argumentos = parser.parse_args()
+
+    with open(argumentos.stopwords) as f:
+        stopwords = frozenset(p.strip() for p in f)
+    servicio = ServicioPreguntas(leer_preguntas(argumentos.fichero), stopwords,
+                                 argumentos.maximo_cache, argumentos.ttl)
+    print('Escuchando en http://{}:{}'.format(HOST, argumentos.puerto))
+    asyncio.run(servicio.servir(argumentos.puerto))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+''' Generador de colecciones sintéticas de preguntas a partir de la colección real
+
+Para medir el rendimiento con millones de preguntas se genera un fichero CSV con el mismo
+formato que data/stackoverflow_python_questions.csv. Cada pregunta sintética toma:
+
+    - el par (año, etiqueta) de una pregunta real elegida al azar, de forma que se conservan
+      la distribución de etiquetas, la de años y su relación
+    - la puntuación de otra pregunta real elegida al azar
+    - un título con tantas palabras como el de otra pregunta real elegida al azar, formado por
+      palabras escogidas según su frecuencia en los títulos reales (con sus mayúsculas y
+      signos de puntuación, para que la tokenización tenga el mismo trabajo)
+
+El fichero se escribe por bloques, sin tener en memoria más que un bloque de preguntas.
+
+USO:
+    python stackoverflow_sintetico.py <fichero origen> <fichero destino> <número de preguntas>
+'''
+
+import csv
+import random
+import sys
+from collections import Counter
+from itertools import accumulate
+
+from stackoverflow_SOLUCION import leer_preguntas
+
+TAMAÑO_BLOQUE = 50000
+
+
+def generar_dataset(origen, destino, filas, semilla=0):
+    ''' Genera un fichero de preguntas sintéticas con las distribuciones del fichero de origen
+
+    ENTRADA:
+       - origen: nombre del fichero de preguntas real -> str
+       - destino: nombre del fichero que se generará -> str
+       - filas: número de preguntas que se generarán -> int
+       - semilla: semilla del generador aleatorio, para obtener siempre el mismo fichero -> int
+    '''
+    aleatorio = random.Random(semilla)
+    preguntas = leer_preguntas(origen)
+    años_etiquetas = [(p.año, p.etiqueta) for p in preguntas]
+    puntuaciones = [p.puntuacion for p in preguntas]
+    longitudes = [len(p.titulo.split(' ')) for p in preguntas]
+    palabras = Counter(palabra for p in preguntas for palabra in p.titulo.split(' '))
+    vocabulario = list(palabras)
+    pesos_acumulados = list(accumulate(palabras.values()))
+
+    with open(destino, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f, lineterminator='\r\n')
+        escritor.writerow(['score', 'title', 'year', 'tag'])
+        for inicio in range(0, filas, TAMAÑO_BLOQUE):
+            n = min(TAMAÑO_BLOQUE, filas - inicio)
+            longitudes_bloque = aleatorio.choices(longitudes, k=n)
+            # Todas las palabras del bloque se eligen de una vez y se reparten entre los títulos
+            palabras_bloque = aleatorio.choices(vocabulario, cum_weights=pesos_acumulados, k=sum(longitudes_bloque))
+            posicion = 0
+            filas_bloque = []
+            for longitud, (año, etiqueta), puntuacion in zip(longitudes_bloque,
+                                                             aleatorio.choices(años_etiquetas, k=n),
+                                                             aleatorio.choices(puntuaciones, k=n)):
+                titulo = ' '.join(palabras_bloque[posicion:posicion + longitud])
+                posicion += longitud
+                filas_bloque.append((puntuacion, titulo, año, etiqueta))
+            escritor.writerows(filas_bloque)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 4:
+        sys.exit('USO: python stackoverflow_sintetico.py <fichero origen> <fichero destino> <número de preguntas>')
+    generar_dataset(sys.argv[1], sys.argv[2], int(sys.argv[3]))
@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+''' Resúmenes materializados de una colección de preguntas y planificador de consultas
+
+PreguntasMaterializadas envuelve una colección de preguntas y guarda los resúmenes que más
+se consultan, calculados la primera vez que se piden (o todos al crearla, con precalcular):
+
+    - etiquetas_por_año: frecuencia de cada etiqueta en cada año
+    - cubo: cubo etiqueta-año (cubo_etiqueta_año)
+    - posiciones_por_año, posiciones_por_etiqueta: posiciones de las preguntas de cada grupo
+    - mejor_valoradas, mejor_valoradas_por_año, mejor_valoradas_por_etiqueta: las 'limite'
+      preguntas con mayor puntuación, en total y de cada grupo
+    - palabras, palabras_por_año: frecuencias de las palabras clave con las stopwords de la
+      colección, en total y de cada año
+
+Si se crea con desde_fichero, los resúmenes se guardan junto al fichero de preguntas con
+cargar_agregado (stackoverflow_cache), de modo que en la siguiente ejecución se cargan sin
+recalcularlos, y dejan de valer cuando cambia el fichero.
+
+PLANIFICADOR:
+-------------
+filtrar_por_año y filtrar_por_etiqueta no recorren las preguntas: toman sus posiciones de un
+resumen y devuelven una VistaFiltrada, una lista de preguntas que recuerda el filtro con que se
+obtuvo. Las funciones de stackoverflow_SOLUCION preguntan primero a la colección o a la vista (con los mismos ganchos que PreguntasIndexadas,
+más frecuencias_palabras_clave y preguntas_mejor_valoradas), que contesta con un resumen
+cuando lo tiene, o devuelve None para que la función recorra las preguntas. Por ejemplo:
+
+    contar_etiquetas(filtrar_por_año(p, 2015))                    -> etiquetas_por_año
+    contar_palabras_clave(filtrar_por_año(p, 2015), stopwords)    -> palabras_por_año
+    calcular_preguntas_mejor_valoradas(filtrar_por_etiqueta(p, 'django'))
+                                                                  -> mejor_valoradas_por_etiqueta
+
+El atributo 'planes' cuenta cuántas consultas de cada tipo se han contestado con un resumen y
+cuántas recorriendo las preguntas. Los resultados son siempre los mismos que los del recorrido,
+incluido el orden de las claves y de los empates.
+
+INVALIDACIÓN:
+-------------
+Los resúmenes se descartan al modificar la colección a través de PreguntasMaterializadas (con
+añadir o con los métodos de list: p[i] = ..., del p[i], append, extend, insert, pop, remove,
+clear, sort y reverse), al llamar a invalidar, o si la colección envuelta cambia sin pasar por
+PreguntasMaterializadas: una ListaPreguntas (la que devuelve leer_preguntas) avisa de cualquier
+modificación; de otras colecciones solo se detectan los cambios de tamaño, y si se modifican
+sin cambiar de tamaño hay que llamar a invalidar. Una VistaFiltrada ya creada conserva
+sus preguntas, pero si ella o su colección cambian deja de usar los resúmenes.
+'''
+
+import hashlib
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from stackoverflow_SOLUCION import (ListaPreguntas, leer_preguntas, filtrar_por_año, filtrar_por_etiqueta,
+                                    contar_etiquetas, agrupar_preguntas_por_año, cubo_etiqueta_año,
+                                    calcular_preguntas_mejor_valoradas, mejor_valoradas_por_grupo,
+                                    extractor_palabras_clave)
+from stackoverflow_cache import cargar_agregado
+
+
+class PreguntasMaterializadas:
+    ''' Colección de preguntas con resúmenes precalculados
+    '''
+
+    def __init__(self, preguntas, stopwords=frozenset(), limite=10, fichero=None, precalcular=False):
+        ''' Crea la colección; los resúmenes se calculan al pedirlos por primera vez
+
+        ENTRADA:
+           - preguntas: colección de preguntas (puntuacion, titulo, año, etiqueta)
+                        -> [Pregunta(int, str, int, str)] | PreguntasStore
+           - stopwords: palabras huecas de los resúmenes de palabras clave
+           - limite: número de preguntas mejor valoradas que se guardan de cada grupo -> int
+           - fichero: fichero del que se han leído las preguntas; si no es None, los resúmenes
+                      se guardan a su lado -> str
+           - precalcular: si es True, todos los resúmenes se calculan ahora -> bool
+        '''
+        self.preguntas = preguntas
+        self.stopwords = frozenset(stopwords)
+        self.limite = limite
+        self.fichero = fichero
+        self.planes = Counter()
+        self.version = 0
+        self._resumenes = dict()
+        self._estado = self._estado_coleccion()
+        if precalcular:
+            for nombre in RESUMENES:
+                self.resumen(nombre)
+
+    @classmethod
+    def desde_fichero(cls, fichero, stopwords=frozenset(), limite=10, precalcular=False):
+        ''' Lee las preguntas de un fichero y guarda sus resúmenes junto a él
+        '''
+        return cls(leer_preguntas(fichero), stopwords, limite, fichero, precalcular)
+
+    def __len__(self):
+        return len(self.preguntas)
+
+    def __iter__(self):
+        return iter(self.preguntas)
+
+    def __getitem__(self, i):
+        return self.preguntas[i]
+
+    def resumen(self, nombre):
+        ''' Devuelve un resumen, calculándolo si todavía no está materializado
+
+        ENTRADA:
+           - nombre: nombre del resumen (ver RESUMENES) -> str
+        '''
+        self.comprobar()
+        valor = self._resumenes.get(nombre)
+        if valor is None:
+            calcular = lambda: RESUMENES[nombre](self)
+            if self.fichero is not None:
+                valor = cargar_agregado(self.fichero, self._nombre_agregado(nombre), calcular)
+            else:
+                valor = calcular()
+            self._resumenes[nombre] = valor
+        return valor
+
+    def _nombre_agregado(self, nombre):
+        # Los resúmenes dependen de las stopwords y del límite con que se calculan
+        huella = hashlib.sha1('\n'.join(sorted(self.stopwords)).encode('utf-8')).hexdigest()[:12]
+        return 'resumen_{}_{}_{}'.format(nombre, self.limite, huella)
+
+    def materializados(self):
+        ''' Devuelve los nombres de los resúmenes ya calculados
+        '''
+        return set(self._resumenes)
+
+    def invalidar(self):
+        ''' Descarta todos los resúmenes; se recalcularán al pedirlos
+        '''
+        self._resumenes.clear()
+        self._estado = self._estado_coleccion()
+        self.version += 1
+
+    def comprobar(self):
+        ''' Descarta los resúmenes si la colección envuelta ha cambiado sin pasar por
+        PreguntasMaterializadas (ver INVALIDACIÓN en la documentación del módulo)
+        '''
+        if self._estado_coleccion() != self._estado:
+            # La colección ya no coincide con el fichero de origen
+            self.fichero = None
+            self.invalidar()
+
+    def _estado_coleccion(self):
+        return len(self.preguntas), getattr(self.preguntas, 'modificaciones', None)
+
+    def añadir(self, preguntas):
+        ''' Añade preguntas al final de la colección y descarta los resúmenes
+
+        Desde ese momento los resúmenes ya no se guardan junto al fichero de origen, porque
+        la colección ya no coincide con él.
+
+        ENTRADA:
+           - preguntas: preguntas que se añaden (puntuacion, titulo, año, etiqueta)
+                        -> [Pregunta(int, str, int, str)]
+        '''
+        if hasattr(self.preguntas, 'añadir'):
+            for p in preguntas:
+                self.preguntas.añadir(*p)
+        else:
+            self.preguntas.extend(preguntas)
+        self._modificada()
+
+    def _modificada(self):
+        self.fichero = None
+        self.invalidar()
+
+    def _plan(self, consulta, resumen):
+        self.planes[consulta, 'resumen' if resumen else 'recorrido'] += 1
+
+    # Ganchos de las funciones de stackoverflow_SOLUCION
+    def filtrar_por_año(self, año):
+        return VistaFiltrada(self, año=año)
+
+    def filtrar_por_etiqueta(self, etiqueta):
+        return VistaFiltrada(self, etiqueta=etiqueta)
+
+    def calcular_etiquetas(self):
+        self._plan('calcular_etiquetas', True)
+        return set(self.resumen('cubo'))
+
+    def contar_etiquetas(self):
+        self._plan('contar_etiquetas', True)
+        return {etiqueta: sum(por_año.values()) for etiqueta, por_año in self.resumen('cubo').items()}
+
+    def agrupar_preguntas_por_año(self):
+        self._plan('agrupar_preguntas_por_año', True)
+        preguntas = self.preguntas
+        return {año: [preguntas[i] for i in posiciones]
+                for año, posiciones in self.resumen('posiciones_por_año').items()}
+
+    def cubo_etiqueta_año(self):
+        self._plan('cubo_etiqueta_año', True)
+        return {etiqueta: Counter(por_año) for etiqueta, por_año in self.resumen('cubo').items()}
+
+    def frecuencias_palabras_clave(self, stopwords):
+        resumen = frozenset(stopwords) == self.stopwords
+        self._plan('contar_palabras_clave', resumen)
+        return self.resumen('palabras') if resumen else None
+
+    def preguntas_mejor_valoradas(self, limite):
+        resumen = 0 <= limite <= self.limite
+        self._plan('calcular_preguntas_mejor_valoradas', resumen)
+        return self.resumen('mejor_valoradas')[:limite] if resumen else None
+
+
+def _modificar_coleccion(nombre):
+    # Método de list que se aplica a la colección envuelta y descarta los resúmenes
+    def metodo(self, *args, **kwargs):
+        try:
+            return getattr(self.preguntas, nombre)(*args, **kwargs)
+        finally:
+            self._modificada()
+    metodo.__name__ = nombre
+    return metodo
+
+
+for _metodo in ('__setitem__', '__delitem__', 'append', 'extend', 'insert', 'pop', 'remove',
+                'clear', 'sort', 'reverse'):
+    setattr(PreguntasMaterializadas, _metodo, _modificar_coleccion(_metodo))
+
+
+class VistaFiltrada(ListaPreguntas):
+    ''' Preguntas de una PreguntasMaterializadas que cumplen un filtro por año y/o etiqueta
+
+    Es una lista de preguntas (ListaPreguntas) que además recuerda de qué colección y con qué
+    filtro se ha obtenido, para que las funciones de stackoverflow_SOLUCION la contesten con
+    los resúmenes de la colección. Si la vista se modifica, o la colección cambia después de
+    crearla, deja de usar los resúmenes y las consultas recorren sus preguntas.
+    '''
+    origen = None
+    año = None
+    etiqueta = None
+    vacia = False
+
+    def __init__(self, origen, año=None, etiqueta=None, vacia=False):
+        super().__init__()
+        self.año = año
+        self.etiqueta = etiqueta
+        self.vacia = vacia
+        grupos = []
+        if año is not None:
+            grupos.append(origen.resumen('posiciones_por_año').get(año, ()))
+        if etiqueta is not None:
+            grupos.append(origen.resumen('posiciones_por_etiqueta').get(etiqueta, ()))
+        if vacia:
+            posiciones = ()
+        elif len(grupos) == 2:
+            posiciones = _interseccion(*grupos)
+        elif grupos:
+            posiciones = grupos[0]
+        else:
+            posiciones = range(len(origen))
+        preguntas = origen.preguntas
+        super().extend([preguntas[i] for i in posiciones])
+        self.origen = origen
+        self._version = origen.version
+
+    def _al_modificar(self):
+        super()._al_modificar()
+        self.origen = None
+
+    def _vigente(self):
+        # True si la vista y su colección siguen como al crearla
+        origen = self.origen
+        if origen is None:
+            return False
+        origen.comprobar()
+        return origen.version == self._version
+
+    def _refinar(self, año=None, etiqueta=None):
+        # Dos filtros distintos sobre el mismo campo no dejan ninguna pregunta
+        vacia = (self.vacia or (año is not None and self.año not in (None, año)) or
+                 (etiqueta is not None and self.etiqueta not in (None, etiqueta)))
+        return VistaFiltrada(self.origen, self.año if año is None else año,
+                             self.etiqueta if etiqueta is None else etiqueta, vacia)
+
+    def _solo(self, campo):
+        # True si la vista filtra exactamente por el campo indicado
+        return not self.vacia and (self.año is not None) == (campo == 'año') and \
+            (self.etiqueta is not None) == (campo == 'etiqueta')
+
+    # Ganchos de las funciones de stackoverflow_SOLUCION
+    def filtrar_por_año(self, año):
+        if not self._vigente():
+            return filtrar_por_año(list(self), año)
+        return self._refinar(año=año)
+
+    def filtrar_por_etiqueta(self, etiqueta):
+        if not self._vigente():
+            return filtrar_por_etiqueta(list(self), etiqueta)
+        return self._refinar(etiqueta=etiqueta)
+
+    def contar_etiquetas(self):
+        if not self._vigente():
+            return contar_etiquetas(list(self))
+        plan = self.origen._plan
+        if self.vacia:
+            plan('contar_etiquetas', True)
+            return dict()
+        if self.etiqueta is not None:
+            # Una sola etiqueta: basta el número de preguntas de la vista
+            plan('contar_etiquetas', True)
+            return {self.etiqueta: len(self)} if self else dict()
+        if self.año is not None:
+            plan('contar_etiquetas', True)
+            return dict(self.origen.resumen('etiquetas_por_año').get(self.año, {}))
+        return self.origen.contar_etiquetas()
+
+    def calcular_etiquetas(self):
+        return set(self.contar_etiquetas())
+
+    def agrupar_preguntas_por_año(self):
+        if self.origen is not None:
+            self.origen._plan('agrupar_preguntas_por_año', False)
+        return agrupar_preguntas_por_año(list(self))
+
+    def frecuencias_palabras_clave(self, stopwords):
+        if not self._vigente():
+            return None
+        resumen = self._solo('año') and frozenset(stopwords) == self.origen.stopwords
+        self.origen._plan('contar_palabras_clave', resumen)
+        if not resumen:
+            return None
+        return self.origen.resumen('palabras_por_año').get(self.año, Counter())
+
+    def preguntas_mejor_valoradas(self, limite):
+        if not self._vigente():
+            return None
+        campo = 'año' if self._solo('año') else 'etiqueta' if self._solo('etiqueta') else None
+        resumen = campo is not None and 0 <= limite <= self.origen.limite
+        self.origen._plan('calcular_preguntas_mejor_valoradas', resumen)
+        if not resumen:
+            return None
+        grupo = self.año if campo == 'año' else self.etiqueta
+        return self.origen.resumen('mejor_valoradas_por_' + campo).get(grupo, [])[:limite]
+
+
+def _interseccion(corta, larga):
+    # Posiciones comunes a dos listas ordenadas: se busca cada posición de la más corta en la
+    # otra con búsqueda binaria, avanzando el inicio de la búsqueda
+    if len(corta) > len(larga):
+        corta, larga = larga, corta
+    comunes = []
+    inicio = 0
+    for i in corta:
+        inicio = bisect_left(larga, i, inicio)
+        if inicio == len(larga):
+            break
+        if larga[inicio] == i:
+            comunes.append(i)
+    return comunes
+
+
+def _etiquetas_por_año(coleccion):
+    etiquetas_por_año = dict()
+    for p in coleccion.preguntas:
+        etiquetas_por_año.setdefault(p.año, Counter())[p.etiqueta] += 1
+    return etiquetas_por_año
+
+
+def _posiciones_por(campo):
+    def calcular(coleccion):
+        posiciones = dict()
+        for i, p in enumerate(coleccion.preguntas):
+            posiciones.setdefault(getattr(p, campo), array('i')).append(i)
+        return posiciones
+    return calcular
+
+
+def _palabras_por_año(coleccion):
+    extraer = extractor_palabras_clave()
+    stopwords = coleccion.stopwords
+    palabras_por_año = dict()
+    for p in coleccion.preguntas:
+        frecuencias = palabras_por_año.get(p.año)
+        if frecuencias is None:
+            frecuencias = palabras_por_año[p.año] = Counter()
+        frecuencias.update(extraer(p.titulo, stopwords))
+    return palabras_por_año
+
+
+def _palabras(coleccion):
+    extraer = extractor_palabras_clave()
+    frecuencias = Counter()
+    for p in coleccion.preguntas:
+        frecuencias.update(extraer(p.titulo, coleccion.stopwords))
+    return frecuencias
+
+
+# Nombre de cada resumen -> función que lo calcula a partir de la colección
+RESUMENES = {
+    'etiquetas_por_año': _etiquetas_por_año,
+    'cubo': lambda c: cubo_etiqueta_año(c.preguntas),
+    'posiciones_por_año': _posiciones_por('año'),
+    'posiciones_por_etiqueta': _posiciones_por('etiqueta'),
+    'mejor_valoradas': lambda c: calcular_preguntas_mejor_valoradas(c.preguntas, c.limite),
+    'mejor_valoradas_por_año': lambda c: mejor_valoradas_por_grupo(c.preguntas, 'año', c.limite),
+    'mejor_valoradas_por_etiqueta': lambda c: mejor_valoradas_por_grupo(c.preguntas, 'etiqueta', c.limite),
+    'palabras': _palabras,
+    'palabras_por_año': _palabras_por_año,
+}